@@ -7,9 +7,17 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional, Dict, Any
 import logging
 
+from ..analyzer import calculate_text_similarity
+from ..compaction import compact_job_description
+from ..routing import (
+    STAGE_ANALYZE, STAGE_QUICK_FEEDBACK, get_llm_metrics, get_stage_model, invoke_stage, resolve_route
+)
+from ..skills import get_skill_taxonomy
+
 logger = logging.getLogger(__name__)
 
 class AnalysisResult(BaseModel):
@@ -32,27 +40,52 @@ class AnalysisResult(BaseModel):
 
     structured_resume: Dict[str, Any] = Field(default_factory=dict)
 
-class ResumeAnalyzerAgent:
-    """AI Agent for analyzing resume-job description compatibility"""
+    # Set by the service, never by the model (hidden from the output schema)
+    degraded: SkipJsonSchema[bool] = False
+    degraded_reason: SkipJsonSchema[Optional[str]] = None
 
-    def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.2,
-            openai_api_key=openai_api_key
-        )
+class ScoresOnlyResult(BaseModel):
+    """Scores and keyword lists only, for ranking (depth="scores")"""
+    overall_score: float = Field(..., ge=0, le=100)
+    skills_score: float = Field(..., ge=0, le=100)
+    experience_score: float = Field(..., ge=0, le=100)
+    education_score: float = Field(..., ge=0, le=100)
+    similarity_score: float = Field(..., ge=0, le=100)
+    keyword_match_percentage: float = Field(..., ge=0, le=100)
+
+    matched_keywords: List[str] = Field(default_factory=list)
+    missing_keywords: List[str] = Field(default_factory=list)
+
+class DeepAnalysisResult(AnalysisResult):
+    """Standard analysis plus a development plan and market context (depth="deep")"""
+    development_plan: List[str] = Field(default_factory=list)
+    market_context: str = ""
+    interview_focus_areas: List[str] = Field(default_factory=list)
+
+
+DEPTH_SCORES = "scores"
+DEPTH_STANDARD = "standard"
+DEPTH_DEEP = "deep"
+ANALYSIS_DEPTHS = (DEPTH_SCORES, DEPTH_STANDARD, DEPTH_DEEP)
+
+# Output token caps per depth; None keeps the analyze route's max_tokens
+ANALYSIS_DEPTH_MAX_TOKENS = {DEPTH_SCORES: 400, DEPTH_STANDARD: None, DEPTH_DEEP: 3500}
 
-        # Analysis prompt for comprehensive evaluation
-        self.analysis_prompt = ChatPromptTemplate.from_template("""
-You are an expert Resume Analyst AI. Your task is to provide a comprehensive analysis of how well a candidate's resume matches a specific job description.
 
-Resume Data (JSON):
-{resume_data}
 
-Job Description:
-{job_description}
+def analysis_max_tokens(depth: str, route_overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[int]:
+    """Completion token limit of an analysis at depth (the depth's cap, else the analyze route's)"""
+    return ANALYSIS_DEPTH_MAX_TOKENS[depth] or resolve_route(STAGE_ANALYZE, route_overrides).max_tokens
 
-Analysis Requirements:
+
+_DEPTH_SCHEMAS = {DEPTH_SCORES: ScoresOnlyResult, DEPTH_STANDARD: AnalysisResult, DEPTH_DEEP: DeepAnalysisResult}
+
+_ANALYST_INTRO = """
+You are an expert Resume Analyst AI. Your task is to provide a comprehensive analysis of how well a candidate's resume matches a specific job description.
+
+"""
+
+_SCORE_REQUIREMENTS = """Analysis Requirements:
 1. **Overall Score (0-100)**: General compatibility rating
 2. **Skills Score (0-100)**: Technical skills match
 3. **Experience Score (0-100)**: Relevant experience assessment
@@ -62,13 +95,23 @@ Analysis Requirements:
 
 7. **Matched Keywords**: Skills/experience terms that match job requirements
 8. **Missing Keywords**: Important skills/experience not found in resume
-9. **Strengths**: What makes this candidate stand out
+"""
+
+_FEEDBACK_REQUIREMENTS = """9. **Strengths**: What makes this candidate stand out
 10. **Weaknesses**: Areas where the candidate falls short
 11. **Recommendations**: Specific, actionable improvements
 
 12. **Summary Critique**: 2-3 sentence overall assessment
 13. **Detailed Analysis**: Comprehensive feedback (200-300 words)
+"""
+
+_DEEP_REQUIREMENTS = """
+14. **Development Plan**: Ordered steps (skills, projects, certifications) that would close the gaps for this role
+15. **Market Context**: How this profile compares to what the market typically expects for this role and seniority
+16. **Interview Focus Areas**: Topics an interviewer should probe to verify fit
+"""
 
+_SCORING_GUIDELINES = """
 Scoring Guidelines:
 - **90-100**: Exceptional match, highly recommended
 - **80-89**: Strong match with minor gaps
@@ -84,15 +127,89 @@ Consider:
 - Soft skills and cultural fit indicators
 - Growth potential and adaptability
 
-Be constructive, specific, and actionable in your feedback.
-""")
+"""
+
+# Static system text per depth; each stays byte-identical across calls so the
+# provider can cache it as a prompt prefix
+_DEPTH_INSTRUCTIONS = {
+    DEPTH_SCORES: _ANALYST_INTRO + _SCORE_REQUIREMENTS + _SCORING_GUIDELINES
+    + "Return only the scores and keyword lists; do not write any commentary.\n",
+    DEPTH_STANDARD: _ANALYST_INTRO + _SCORE_REQUIREMENTS + "\n" + _FEEDBACK_REQUIREMENTS + _SCORING_GUIDELINES
+    + "Be constructive, specific, and actionable in your feedback.\n",
+    DEPTH_DEEP: _ANALYST_INTRO + _SCORE_REQUIREMENTS + "\n" + _FEEDBACK_REQUIREMENTS + _DEEP_REQUIREMENTS
+    + _SCORING_GUIDELINES + "Be constructive, specific, and actionable in your feedback.\n"
+}
+
+
+class ResumeAnalyzerAgent:
+    """AI Agent for analyzing resume-job description compatibility"""
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        llm: Optional[ChatOpenAI] = None,
+        route_overrides: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        route = resolve_route(STAGE_ANALYZE, route_overrides)
+        self.llm = llm or get_stage_model(STAGE_ANALYZE, openai_api_key, route_overrides)
+        self.model = route.model if llm is None else getattr(llm, "model_name", route.model)
+
+        # Short tips do not need the scoring model
+        feedback_route = resolve_route(STAGE_QUICK_FEEDBACK, route_overrides)
+        self.feedback_llm = llm or get_stage_model(STAGE_QUICK_FEEDBACK, openai_api_key, route_overrides)
+        self.feedback_model = feedback_route.model if llm is None else self.model
+        self.feedback_max_tokens = feedback_route.max_tokens
+        self.analysis_max_tokens = {depth: analysis_max_tokens(depth, route_overrides) for depth in ANALYSIS_DEPTHS}
+
+        # One trimmed prompt, schema and output cap per depth. Instructions and
+        # schema form a fixed prefix, followed by the JD (shared when screening
+        # many candidates for one role) and only then the candidate, so repeated
+        # calls hit the provider's prompt cache
+        self.analysis_prompts: Dict[str, ChatPromptTemplate] = {}
+        self.analysis_chains: Dict[str, Any] = {}
+        for depth in ANALYSIS_DEPTHS:
+            parser = JsonOutputParser(pydantic_object=_DEPTH_SCHEMAS[depth])
+            self.analysis_prompts[depth] = ChatPromptTemplate.from_messages([
+                ("system", _DEPTH_INSTRUCTIONS[depth] + "\n{format_instructions}\n"),
+                ("human", "Job Description:\n{job_description}"),
+                ("human", "Resume Data (JSON):\n{resume_data}")
+            ]).partial(format_instructions=parser.get_format_instructions())
+            depth_llm = llm or get_stage_model(
+                STAGE_ANALYZE, openai_api_key, route_overrides, max_tokens=ANALYSIS_DEPTH_MAX_TOKENS[depth]
+            )
+            self.analysis_chains[depth] = self.analysis_prompts[depth] | depth_llm | parser
 
+        self.analysis_prompt = self.analysis_prompts[DEPTH_STANDARD]
         self.output_parser = JsonOutputParser(pydantic_object=AnalysisResult)
+        self.format_instructions = self.output_parser.get_format_instructions()
+
+        self.quick_feedback_prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+Based on a resume analysis, provide quick, actionable feedback on the requested focus areas.
+Provide 2-3 specific, actionable tips for each focus area.
+Keep responses concise but helpful.
+"""),
+            ("human", """
+Focus areas: {focus_areas}
+
+Analysis Summary:
+- Overall Score: {overall_score}/100
+- Key Strengths: {strengths}
+- Main Weaknesses: {weaknesses}
+""")
+        ])
+
+        # Compile the chains once; they are reused for every request
+        self.analysis_chain = self.analysis_chains[DEPTH_STANDARD]
+        self.quick_feedback_chain = self.quick_feedback_prompt | self.feedback_llm
 
     async def analyze_resume_job_fit(
         self,
         resume_data: Dict[str, Any],
-        job_description: str
+        job_description: str,
+        raise_errors: bool = False,
+        trace: Optional[Dict[str, Dict[str, Any]]] = None,
+        depth: str = DEPTH_STANDARD
     ) -> AnalysisResult:
         """
         Analyze resume against job description
@@ -100,35 +217,55 @@ Be constructive, specific, and actionable in your feedback.
         Args:
             resume_data: Structured resume data
             job_description: Job description text
+            raise_errors: Re-raise LLM errors instead of returning a placeholder
+            trace: Optional dict that receives the LLM call's model, latency and token usage
+            depth: "scores" (scores and keywords only; text fields are left empty),
+                "standard" (full analysis) or "deep" (adds development plan, market
+                context and interview focus areas)
 
         Returns:
-            AnalysisResult: Comprehensive analysis
+            AnalysisResult (DeepAnalysisResult for depth="deep")
+
+        Raises:
+            ValueError: If depth is not one of ANALYSIS_DEPTHS
         """
+        if depth not in ANALYSIS_DEPTHS:
+            raise ValueError(f"depth must be one of: {', '.join(ANALYSIS_DEPTHS)}")
+
         try:
             logger.info("Starting comprehensive resume-job analysis")
 
             # Convert resume data to readable format
             resume_text = self._format_resume_for_analysis(resume_data)
 
-            # Create analysis chain
-            chain = self.analysis_prompt | self.llm | self.output_parser
-
             # Run analysis
-            result = await chain.ainvoke({
+            result = await invoke_stage(STAGE_ANALYZE, self.analysis_chains[depth], {
                 "resume_data": resume_text,
-                "job_description": job_description,
-                "format_instructions": self.output_parser.get_format_instructions()
-            })
+                "job_description": compact_job_description(job_description, self.model)
+            }, self.model, trace, max_tokens=self.analysis_max_tokens[depth])
 
-            analysis = AnalysisResult(**result)
+            if depth == DEPTH_SCORES:
+                analysis = AnalysisResult(**{"summary_critique": "", "detailed_analysis": "", **result})
+            else:
+                analysis = _DEPTH_SCHEMAS[depth](**result)
             analysis.structured_resume = resume_data
+            if resume_data.get("degraded"):
+                # Scored against a placeholder parse, so the scores are not real either
+                analysis.degraded = True
+                analysis.degraded_reason = "Resume parsing was degraded"
+            analysis.matched_keywords, analysis.missing_keywords = get_skill_taxonomy().reconcile_keywords(
+                analysis.matched_keywords, analysis.missing_keywords, resume_data, job_description
+            )
 
             logger.info(f"Analysis completed with overall score: {analysis.overall_score}")
             return analysis
 
         except Exception as e:
             logger.error(f"Error in resume analysis: {e}")
-            # Return basic analysis if AI fails
+            if raise_errors:
+                raise
+            # Return basic analysis if AI fails, flagged so the neutral scores are never taken as real
+            get_llm_metrics().increment(STAGE_ANALYZE, "degraded")
             return AnalysisResult(
                 overall_score=50.0,
                 skills_score=50.0,
@@ -143,7 +280,9 @@ Be constructive, specific, and actionable in your feedback.
                 recommendations=["Please try again or contact support"],
                 summary_critique="Analysis could not be completed due to technical issues.",
                 detailed_analysis="We encountered an error while analyzing your resume. Please ensure your resume is properly formatted and try again.",
-                structured_resume=resume_data
+                structured_resume=resume_data,
+                degraded=True,
+                degraded_reason=f"{type(e).__name__}: {e}"
             )
 
     def _format_resume_for_analysis(self, resume_data: Dict[str, Any]) -> str:
@@ -191,20 +330,9 @@ Be constructive, specific, and actionable in your feedback.
     def calculate_similarity_score(self, resume_text: str, job_text: str) -> float:
         """
         Calculate text similarity between resume and job description
-        Basic implementation - can be enhanced with better NLP
+        TF-IDF cosine similarity from the local scoring engine (0-100)
         """
-        # Simple word overlap calculation
-        resume_words = set(resume_text.lower().split())
-        job_words = set(job_text.lower().split())
-
-        intersection = resume_words.intersection(job_words)
-        union = resume_words.union(job_words)
-
-        if not union:
-            return 0.0
-
-        similarity = len(intersection) / len(union)
-        return round(similarity * 100, 2)
+        return calculate_text_similarity(resume_text, job_text)
 
     async def generate_quick_feedback(
         self,
@@ -224,27 +352,13 @@ Be constructive, specific, and actionable in your feedback.
         if not focus_areas:
             focus_areas = ['skills', 'experience', 'education']
 
-        quick_prompt = ChatPromptTemplate.from_template("""
-Based on this resume analysis, provide quick, actionable feedback on: {focus_areas}
-
-Analysis Summary:
-- Overall Score: {overall_score}/100
-- Key Strengths: {strengths}
-- Main Weaknesses: {weaknesses}
-
-Provide 2-3 specific, actionable tips for each focus area.
-Keep responses concise but helpful.
-""")
-
         try:
-            chain = quick_prompt | self.llm
-
-            result = await chain.ainvoke({
+            result = await invoke_stage(STAGE_QUICK_FEEDBACK, self.quick_feedback_chain, {
                 "focus_areas": ", ".join(focus_areas),
                 "overall_score": analysis_result.overall_score,
                 "strengths": "; ".join(analysis_result.strengths[:3]),
                 "weaknesses": "; ".join(analysis_result.weaknesses[:3])
-            })
+            }, self.feedback_model, max_tokens=self.feedback_max_tokens)
 
             return {
                 "focus_areas": focus_areas,
@@ -7,12 +7,21 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional, Dict, Any
 import json
 import logging
 
+from ..cache import ResultCache, build_resume_fingerprint, get_parsed_resume_cache
+from ..compaction import compact_resume
+from ..routing import STAGE_PARSE, get_llm_metrics, get_stage_model, invoke_stage, resolve_route
+from ..skills import get_skill_taxonomy
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever parsing_prompt or StructuredResume changes so cached parses are not reused
+PARSER_PROMPT_VERSION = "parser-2"
+
 class ContactInfo(BaseModel):
     """Contact information extracted from resume"""
     name: Optional[str] = None
@@ -58,22 +67,34 @@ class StructuredResume(BaseModel):
     certifications: List[str] = Field(default_factory=list)
     languages: List[str] = Field(default_factory=list)
 
+    # Set by the service, never by the model (hidden from the output schema)
+    degraded: SkipJsonSchema[bool] = False
+    degraded_reason: SkipJsonSchema[Optional[str]] = None
+
 class ResumeParserAgent:
     """AI Agent for parsing and structuring resume data"""
 
-    def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.1,
-            openai_api_key=openai_api_key
-        )
+    def __init__(
+        self,
+        openai_api_key: str,
+        parse_cache: Optional[ResultCache] = None,
+        llm: Optional[ChatOpenAI] = None,
+        route_overrides: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.parse_cache = parse_cache if parse_cache is not None else get_parsed_resume_cache()
+        route = resolve_route(STAGE_PARSE, route_overrides)
+        self.llm = llm or get_stage_model(STAGE_PARSE, openai_api_key, route_overrides)
+        self.model = route.model if llm is None else getattr(llm, "model_name", route.model)
+        self.max_tokens = route.max_tokens if llm is None else getattr(llm, "max_tokens", route.max_tokens)
 
-        # Define the parsing prompt
-        self.parsing_prompt = ChatPromptTemplate.from_template("""
-You are an expert Resume Parser AI. Your task is to carefully analyze the provided resume text and extract structured information.
+        self.output_parser = JsonOutputParser(pydantic_object=StructuredResume)
+        self.format_instructions = self.output_parser.get_format_instructions()
 
-Resume Text:
-{resume_text}
+        # Instructions and schema come first and never change, so every parse
+        # shares a byte-identical prefix the provider can cache; the resume goes last
+        self.parsing_prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+You are an expert Resume Parser AI. Your task is to carefully analyze the provided resume text and extract structured information.
 
 Instructions:
 1. Extract contact information (name, phone, email, LinkedIn, portfolio, location)
@@ -92,38 +113,59 @@ For dates, use the format as written in the resume.
 For skills, extract both explicitly listed skills and infer from experience descriptions.
 
 Output the structured data in the exact JSON format specified.
-""")
 
-        self.output_parser = JsonOutputParser(pydantic_object=StructuredResume)
+{format_instructions}
+"""),
+            ("human", "Resume Text:\n{resume_text}")
+        ]).partial(format_instructions=self.format_instructions)
+
+        # Compile the chain once; it is reused for every parse
+        self.chain = self.parsing_prompt | self.llm | self.output_parser
 
-    async def parse_resume(self, resume_text: str) -> StructuredResume:
+    async def parse_resume(
+        self,
+        resume_text: str,
+        raise_errors: bool = False,
+        trace: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> StructuredResume:
         """
         Parse resume text and return structured data
 
         Args:
             resume_text: Raw resume text content
+            raise_errors: Re-raise LLM errors instead of returning a placeholder
+            trace: Optional dict that receives the LLM call's model, latency and token usage
 
         Returns:
             StructuredResume: Parsed and structured resume data
         """
+        cache_key = build_resume_fingerprint(resume_text, self.model, PARSER_PROMPT_VERSION)
+        cached = await self.parse_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Parsed resume cache hit")
+            return StructuredResume(**cached)
+
         try:
             logger.info("Starting resume parsing with AI agent")
 
-            # Create the chain
-            chain = self.parsing_prompt | self.llm | self.output_parser
-
             # Run the parsing
-            result = await chain.ainvoke({
-                "resume_text": resume_text,
-                "format_instructions": self.output_parser.get_format_instructions()
-            })
+            result = await invoke_stage(
+                STAGE_PARSE, self.chain, {"resume_text": compact_resume(resume_text, self.model)}, self.model, trace,
+                max_tokens=self.max_tokens
+            )
+
+            structured_resume = StructuredResume(**result)
+            await self.parse_cache.set(cache_key, structured_resume.model_dump())
 
             logger.info("Resume parsing completed successfully")
-            return StructuredResume(**result)
+            return structured_resume
 
         except Exception as e:
             logger.error(f"Error in resume parsing: {e}")
-            # Return a basic structure if parsing fails
+            if raise_errors:
+                raise
+            # Return a basic structure if parsing fails, flagged so callers never treat it as real
+            get_llm_metrics().increment(STAGE_PARSE, "degraded")
             return StructuredResume(
                 contact_info=ContactInfo(),
                 summary="Resume parsing encountered an error. Please review manually.",
@@ -132,7 +174,9 @@ Output the structured data in the exact JSON format specified.
                 projects=[],
                 skills=[],
                 certifications=[],
-                languages=[]
+                languages=[],
+                degraded=True,
+                degraded_reason=f"{type(e).__name__}: {e}"
             )
 
     def extract_key_skills(self, structured_resume: StructuredResume) -> List[str]:
@@ -143,33 +187,24 @@ Output the structured data in the exact JSON format specified.
             structured_resume: Parsed resume data
 
         Returns:
-            List of prioritized skills
+            List of prioritized skills, with aliases ("JS", "Javascript")
+            collapsed to one canonical name
         """
-        skills = set(structured_resume.skills)
-
-        # Extract skills from experience descriptions
-        for exp in structured_resume.experience:
-            # Look for common tech keywords in descriptions
-            tech_keywords = [
-                'python', 'java', 'javascript', 'react', 'node', 'aws', 'docker',
-                'kubernetes', 'sql', 'mongodb', 'postgresql', 'git', 'linux',
-                'typescript', 'vue', 'angular', 'html', 'css', 'sass', 'webpack',
-                'jenkins', 'ci/cd', 'agile', 'scrum', 'machine learning', 'ai'
-            ]
-
-            desc_lower = exp.description_summary.lower()
-            for tech in tech_keywords:
-                if tech in desc_lower and tech not in skills:
-                    skills.add(tech.title())
+        taxonomy = get_skill_taxonomy()
+        skills = list(structured_resume.skills)
 
         # Extract from technologies lists
         for exp in structured_resume.experience:
-            skills.update(exp.technologies)
+            skills.extend(exp.technologies)
 
         for project in structured_resume.projects:
-            skills.update(project.technologies)
+            skills.extend(project.technologies)
+
+        # Extract skills from experience descriptions in one pass over each
+        for exp in structured_resume.experience:
+            skills.extend(taxonomy.matcher.skills_in(exp.description_summary))
 
-        return sorted(list(skills))
+        return sorted(taxonomy.dedupe(skills), key=str.lower)
 
     def generate_resume_summary(self, structured_resume: StructuredResume) -> str:
         """
@@ -1,11 +1,21 @@
 import json
+import logging
 import os
-from typing import Dict, List, Any
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Any, Optional, Sequence
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer, ENGLISH_STOP_WORDS
 
-# Assuming you use the official OpenAI library:
-from openai import OpenAI, AsyncOpenAI # We will use AsyncOpenAI for better integration
+from .compaction import compact_job_description, compact_resume, count_tokens
+from .llm import get_openai_client
+from .routing import LLM_DEFAULT_OUTPUT_TOKENS, STAGE_SINGLE_PASS, call_llm, resolve_route, usage_from_openai
+from .skills import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -55,68 +65,579 @@ class AnalysisSchema(BaseModel):
     keywords: Dict[str, List[str]] = Field(description="Dictionary containing 'matched_keywords' and 'missing_keywords'.")
 
 
-# Initialize the OpenAI client (using async for better performance)
-# Ensure OPENAI_API_KEY is set in your environment
-client = AsyncOpenAI() 
 
 # --- Core Analysis Function (Now ASYNC) ---
 
-async def analyze_resume_with_ai(resume_text: str, job_description: str) -> Dict[str, Any]:
-    if not client:
-        # ... (return error structure) ...
-        pass
+# Single-pass mode: one call both parses the resume and scores it against the JD
+SINGLE_PASS_SCORE_KEYS = ["overall_score", "skills_score", "experience_score", "keyword_score", "education_score"]
+
+SINGLE_PASS_SCHEMA = json.dumps(AnalysisSchema.model_json_schema())
 
-    system_prompt = f"""
+# Built once so every call starts with the same bytes (instructions + schema);
+# the provider caches that prefix, and the JD is sent before the resume so
+# screening many candidates for one role extends the cached prefix further
+SINGLE_PASS_SYSTEM_PROMPT = f"""
     You are an expert ATS (Applicant Tracking System) and resume analyst.
     Your task is to analyze the provided resume text against the job description (JD) and return a comprehensive analysis in the EXACT JSON format provided.
     
     CRITICAL INSTRUCTIONS:
     1.  Your ENTIRE response MUST be a single JSON object. DO NOT include any explanatory text or markdown wrappers like ```json.
-    2.  Strictly adhere to the structure of the AnalysisSchema.
+    2.  Strictly adhere to this JSON schema (AnalysisSchema): {SINGLE_PASS_SCHEMA}
     3.  For 'experience', 'education', and 'projects', you MUST parse the resume into separate, clean entries.
-    
-    Job Description:
-    ---
-    {job_description[:4000]}
-    ---
-    
-    Resume Text:
-    ---
-    {resume_text[:4000]}
-    ---
+    4.  'scores' MUST contain {", ".join(SINGLE_PASS_SCORE_KEYS)}, each a number from 0 to 100.
+    5.  The job description and the resume text follow in separate messages. Perform the full analysis and return the complete JSON object.
     """
 
-    try:
+
+async def analyze_resume_with_ai(
+    resume_text: str,
+    job_description: str,
+    openai_api_key: Optional[str] = None,
+    route_overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+    trace: Optional[Dict[str, Dict[str, Any]]] = None
+) -> AnalysisSchema:
+    """
+    Parse and analyze a resume in a single LLM call
+
+    Args:
+        resume_text: Raw resume text
+        job_description: Job description text
+        openai_api_key: API key (defaults to OPENAI_API_KEY)
+        route_overrides: Optional per-request model overrides keyed by stage
+        trace: Optional dict that receives the call's model, latency and token usage
+
+    Returns:
+        Validated AnalysisSchema
+
+    Raises:
+        ValueError: If the model's output is not valid JSON or does not match AnalysisSchema
+    """
+    # Shared AsyncOpenAI client backed by the process-wide connection pool; call_llm owns retries
+    client = get_openai_client(openai_api_key or api_key, max_retries=0)
+    route = resolve_route(STAGE_SINGLE_PASS, route_overrides)
+    # Fit both inputs into the model's token budgets by section instead of slicing characters
+    job_description = compact_job_description(job_description, route.model)
+    resume_text = compact_resume(resume_text, route.model)
+
+    async def attempt():
         completion = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            # FIX: Use the 'response_format' argument instead of 'response_model'
-            response_format={"type": "json_object"}, 
+            model=route.model,
+            response_format={"type": "json_object"},
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": "Perform the full analysis and return the complete JSON object."}
+                {"role": "system", "content": SINGLE_PASS_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Job Description:\n---\n{job_description}\n---"},
+                {"role": "user", "content": f"Resume Text:\n---\n{resume_text}\n---"}
             ],
-            temperature=0.0
+            temperature=route.temperature,
+            max_tokens=route.max_tokens
         )
-        
-        # FIX: Manually parse the JSON string response
-        json_string = completion.choices[0].message.content
-        analysis_data = json.loads(json_string)
-
-        # Optional: Validate against Pydantic model here if needed, but we'll return the dict
-        return analysis_data
-
-    except json.JSONDecodeError as e:
-        print(f"JSON Parsing Error from LLM: {e}. Raw response: {json_string[:200]}")
-        raise Exception("AI failed to return valid JSON output.")
-    except Exception as e:
-        # ... (Handle other exceptions) ...
-        print(f"OpenAI API Error: {e}")
-        # ... (return failure structure) ...
-        return {
-            "success": False,
-            "message": f"AI analysis failed due to: {str(e)}",
-            "scores": {"overall_score": 0},
-            "analysis": {},
-            "keywords": {},
-            "structured_resume": {}
-        }
\ No newline at end of file
+        return completion, usage_from_openai(getattr(completion, "usage", None))
+
+    estimated_tokens = count_tokens(f"{SINGLE_PASS_SYSTEM_PROMPT}{job_description}{resume_text}", route.model)
+    completion = await call_llm(
+        STAGE_SINGLE_PASS, route.model, attempt, trace,
+        estimated_tokens=estimated_tokens + (route.max_tokens or LLM_DEFAULT_OUTPUT_TOKENS),
+        max_tokens=route.max_tokens
+    )
+
+    json_string = completion.choices[0].message.content or ""
+    try:
+        return AnalysisSchema.model_validate_json(json_string)
+    except ValueError as e:
+        logger.error(f"Single-pass output failed AnalysisSchema validation: {e}. Raw response: {json_string[:200]}")
+        raise ValueError(f"AI returned output that does not match the analysis schema: {e}") from e
+
+
+def map_single_pass_result(
+    result: AnalysisSchema,
+    resume_text: str,
+    job_description: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Map a single-pass result onto the two-call response shape
+
+    Args:
+        result: Validated single-pass output
+        resume_text: Raw resume text (for the local similarity score)
+        job_description: Job description text
+
+    Returns:
+        Dict with "structured_resume" and "analysis" (AnalysisResult fields)
+    """
+    structured_resume = result.model_dump(
+        include={"contact_info", "summary", "experience", "education", "projects", "skills"}
+    )
+
+    def score(name: str) -> float:
+        return float(max(0, min(100, result.scores.get(name, 0) or 0)))
+
+    matched, missing = get_skill_taxonomy().reconcile_keywords(
+        result.keywords.get("matched_keywords", []),
+        result.keywords.get("missing_keywords", []),
+        structured_resume,
+        job_description
+    )
+
+    return {
+        "structured_resume": structured_resume,
+        "analysis": {
+            "overall_score": score("overall_score"),
+            "skills_score": score("skills_score"),
+            "experience_score": score("experience_score"),
+            "education_score": score("education_score"),
+            "similarity_score": calculate_text_similarity(resume_text, job_description),
+            "keyword_match_percentage": score("keyword_score"),
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "strengths": result.strengths,
+            "weaknesses": result.weaknesses,
+            "recommendations": result.recommendations,
+            "summary_critique": result.summary_critique,
+            "detailed_analysis": result.summary_critique
+        }
+    }
+
+
+# --- Local Scoring Engine (no LLM) ---
+# Deterministic TF-IDF/BM25 scoring that runs in a few milliseconds. Used as an
+# instant preview, as a fallback when the LLM is unavailable, and to pre-filter
+# bulk screening.
+
+# Keeps tokens such as "node.js", "c++" and "c#" intact
+TOKEN_PATTERN = re.compile(r"(?<![\w+#.])\w[\w+#.]*[\w+#]|(?<![\w+#.])\w(?![\w+#])")
+
+# Filler common to resumes and job ads that says nothing about fit
+RESUME_STOP_WORDS = frozenset(ENGLISH_STOP_WORDS | {
+    "ability", "candidate", "company", "etc", "excellent", "experience", "experienced",
+    "familiarity", "good", "including", "job", "join", "knowledge", "looking", "plus",
+    "preferred", "proficiency", "proficient", "required", "requirements", "responsibilities",
+    "role", "skills", "strong", "team", "understanding", "using", "work", "working",
+    "year", "years", "yrs"
+})
+
+SECTION_HEADINGS = {
+    "summary": ["professional summary", "career objective", "summary", "profile", "objective", "about me"],
+    "skills": ["technical skills", "core competencies", "key skills", "competencies", "technologies", "skills"],
+    "experience": ["professional experience", "work experience", "employment history", "work history", "experience"],
+    "education": ["academic background", "education", "qualifications"],
+    "projects": ["personal projects", "academic projects", "projects"],
+    "certifications": ["certifications", "certificates", "licenses"]
+}
+
+_HEADING_PATTERN = re.compile(
+    r"^\s*(" + "|".join(
+        re.escape(heading) for headings in SECTION_HEADINGS.values()
+        for heading in sorted(headings, key=len, reverse=True)
+    ) + r")\b\s*(:?)\s*(.*)$",
+    re.IGNORECASE
+)
+_HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"(?:\+?\d[\d\s().-]{7,}\d)")
+YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:years|yrs)", re.IGNORECASE)
+DATE_RANGE_PATTERN = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)", re.IGNORECASE
+)
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•·▪◦]|\d+[.)])\s*")
+
+EDUCATION_LEVELS = [
+    (4, "doctorate", re.compile(r"\b(?:ph\.?\s?d|doctorate|doctoral)\b", re.IGNORECASE)),
+    (3, "master", re.compile(r"\b(?:master'?s?|m\.s\.|msc|m\.sc|mba|m\.tech|m\.eng)\b", re.IGNORECASE)),
+    (2, "bachelor", re.compile(r"\b(?:bachelor'?s?|b\.s\.|bsc|b\.sc|b\.a\.|b\.tech|b\.e\.|undergraduate degree)\b", re.IGNORECASE)),
+    (1, "associate", re.compile(r"\b(?:associate'?s? degree|diploma)\b", re.IGNORECASE))
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into tokens, keeping names like node.js and c++ whole"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def _content_terms(text: str) -> List[str]:
+    """Tokens with stopwords and numbers (including "5+") removed"""
+    return [t for t in tokenize(text) if t not in RESUME_STOP_WORDS and not t[0].isdigit()]
+
+
+def extract_resume_sections(text: str) -> Dict[str, Any]:
+    """
+    Split resume text into contact details and common sections
+
+    Args:
+        text: Raw resume text
+
+    Returns:
+        Dict with name, email, phone, summary (str) and skills, experience,
+        education, projects and certifications (lists of lines/items)
+    """
+    sections: Dict[str, Any] = {
+        "name": "",
+        "email": "",
+        "phone": "",
+        "summary": "",
+        "skills": [],
+        "experience": [],
+        "education": [],
+        "projects": [],
+        "certifications": []
+    }
+    text = text or ""
+
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        sections["email"] = email.group(0)
+    phone = PHONE_PATTERN.search(text)
+    if phone:
+        sections["phone"] = phone.group(0).strip()
+
+    current = None
+    summary_lines = []
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        heading = _HEADING_PATTERN.match(line)
+        # A heading is a bare section name, or a section name followed by a colon
+        if heading and (not heading.group(3) or heading.group(2)):
+            current = _HEADING_TO_SECTION[heading.group(1).lower()]
+            line = heading.group(3).strip()
+            if not line:
+                continue
+
+        if current is None:
+            if not sections["name"] and not EMAIL_PATTERN.search(line) and not any(c.isdigit() for c in line) \
+                    and len(line.split()) <= 5:
+                sections["name"] = line
+            continue
+
+        line = BULLET_PATTERN.sub("", line)
+        if current == "summary":
+            summary_lines.append(line)
+        elif current == "skills":
+            sections["skills"].extend(item.strip() for item in re.split(r"[,;|•·\t]", line) if item.strip())
+        else:
+            sections[current].append(line)
+
+    sections["summary"] = " ".join(summary_lines)
+    return sections
+
+
+def calculate_text_similarity(text1: str, text2: str) -> float:
+    """
+    TF-IDF cosine similarity between two texts
+
+    Args:
+        text1: First text
+        text2: Second text
+
+    Returns:
+        Similarity from 0 to 100
+    """
+    if not (text1 or "").strip() or not (text2 or "").strip():
+        return 0.0
+
+    try:
+        matrix = TfidfVectorizer(analyzer=_content_terms).fit_transform([text1, text2])
+    except ValueError:
+        # Neither text contains a content word
+        return 0.0
+
+    similarity = matrix[0].multiply(matrix[1]).sum()
+    return round(float(min(similarity, 1.0)) * 100, 2)
+
+
+def bm25_scores(query: str, documents: Sequence[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Okapi BM25 scores of each document against a query
+
+    Scores are relative to the document set (e.g. a batch of resumes ranked
+    against one job description) and are not bounded to 0-100.
+
+    Args:
+        query: Query text, typically a job description
+        documents: Texts to score
+        k1: Term frequency saturation
+        b: Length normalization
+
+    Returns:
+        One score per document, in input order
+    """
+    if not documents:
+        return []
+
+    vectorizer = CountVectorizer(analyzer=_content_terms)
+    try:
+        term_counts = vectorizer.fit_transform(documents).tocsc().astype(np.float64)
+    except ValueError:
+        return [0.0] * len(documents)
+
+    vocabulary = vectorizer.vocabulary_
+    columns = sorted({vocabulary[t] for t in _content_terms(query) if t in vocabulary})
+    if not columns:
+        return [0.0] * len(documents)
+
+    doc_lengths = np.asarray(term_counts.sum(axis=1)).ravel()
+    avg_length = doc_lengths.mean() or 1.0
+    counts = term_counts[:, columns].toarray()
+
+    doc_freq = (counts > 0).sum(axis=0)
+    idf = np.log(1 + (len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+    norm = k1 * (1 - b + b * doc_lengths / avg_length)
+    scores = (counts * (k1 + 1) / (counts + norm[:, None]) * idf).sum(axis=1)
+    return [round(float(score), 4) for score in scores]
+
+
+def extract_keywords(text: str, top_n: int = 20) -> List[str]:
+    """
+    Most frequent content words in a text, stopwords removed
+
+    Args:
+        text: Text to extract keywords from
+        top_n: Maximum number of keywords
+
+    Returns:
+        Lowercase keywords, most frequent first (ties keep text order)
+    """
+    counts = Counter(_content_terms(text))
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    return [term for term, _ in ranked[:top_n]]
+
+
+def _years_of_experience(text: str) -> int:
+    """Years of experience stated explicitly or covered by date ranges"""
+    explicit = max((int(n) for n in YEARS_PATTERN.findall(text)), default=0)
+
+    current_year = time.localtime().tm_year
+    years = set()
+    for start, end in DATE_RANGE_PATTERN.findall(text):
+        end_year = current_year if not end.isdigit() else int(end)
+        if int(start) <= end_year:
+            years.update(range(int(start), end_year))
+    return max(explicit, len(years))
+
+
+def _education_level(text: str) -> int:
+    for level, _, pattern in EDUCATION_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
+def _education_name(level: int) -> Optional[str]:
+    return next((name for lvl, name, _ in EDUCATION_LEVELS if lvl == level), None)
+
+
+def match_keywords(resume_text: str, keywords: List[str]) -> Dict[str, List[str]]:
+    """Split keywords into those present in and missing from the resume"""
+    resume_terms = set(tokenize(resume_text))
+    return {
+        "matched_keywords": [k for k in keywords if k in resume_terms],
+        "missing_keywords": [k for k in keywords if k not in resume_terms]
+    }
+
+
+def analyze_resume_rule_based(resume_text: str, job_description: str) -> Dict[str, Any]:
+    """
+    Score a resume against a job description without calling an LLM
+
+    Args:
+        resume_text: Raw resume text
+        job_description: Job description text
+
+    Returns:
+        Dict with overall/skills/experience/education/similarity scores (0-100),
+        keyword match details, strengths, weaknesses, recommendations,
+        detailed_analysis and analysis_type "rule_based"
+    """
+    started = time.perf_counter()
+    sections = extract_resume_sections(resume_text)
+
+    jd_keywords = extract_keywords(job_description, top_n=30)
+    keyword_match = match_keywords(resume_text, jd_keywords)
+    matched, missing = keyword_match["matched_keywords"], keyword_match["missing_keywords"]
+    keyword_pct = round(100 * len(matched) / len(jd_keywords), 2) if jd_keywords else 0.0
+
+    # Skills: taxonomy skills the JD asks for, compared as sets of skill IDs
+    taxonomy = get_skill_taxonomy()
+    jd_skills = taxonomy.ids_in_text(job_description or "")
+    skill_gap = taxonomy.gap(taxonomy.ids_in_text(resume_text or ""), jd_skills)
+    missing_skills = skill_gap["missing"]
+
+    if jd_skills:
+        skills_score = skill_gap["coverage"]
+    # Otherwise JD keywords listed in the skills section count fully, elsewhere half
+    elif jd_keywords and sections["skills"]:
+        skills_terms = set(tokenize(" ".join(sections["skills"])))
+        in_skills = sum(1 for k in matched if k in skills_terms)
+        skills_score = 100 * (in_skills + 0.5 * (len(matched) - in_skills)) / len(jd_keywords)
+    else:
+        skills_score = keyword_pct * 0.8
+
+    # Experience: years against the JD's stated requirement
+    resume_years = _years_of_experience(resume_text)
+    required_years = max((int(n) for n in YEARS_PATTERN.findall(job_description or "")), default=0)
+    if required_years:
+        experience_score = min(100, 100 * resume_years / required_years) if resume_years else 40
+    else:
+        experience_score = 80 if resume_years or sections["experience"] else 40
+    if not sections["experience"]:
+        experience_score = min(experience_score, 40)
+
+    # Education: highest degree against the JD's stated requirement
+    resume_level = _education_level(resume_text)
+    required_level = _education_level(job_description or "")
+    if required_level:
+        education_score = 100 if resume_level >= required_level else 60 if resume_level else 30
+    else:
+        education_score = 85 if resume_level or sections["education"] else 50
+
+    similarity_score = calculate_text_similarity(resume_text, job_description)
+
+    overall_score = (
+        0.30 * keyword_pct + 0.25 * skills_score + 0.20 * experience_score
+        + 0.10 * education_score + 0.15 * similarity_score
+    )
+
+    strengths, weaknesses, recommendations = [], [], []
+    if keyword_pct >= 60:
+        strengths.append(f"Covers most job description keywords ({len(matched)} of {len(jd_keywords)})")
+    elif jd_keywords:
+        weaknesses.append(f"Matches only {len(matched)} of {len(jd_keywords)} job description keywords")
+    if missing_skills:
+        weaknesses.append(f"Missing required skills: {', '.join(missing_skills[:5])}")
+        recommendations.append(f"Add relevant experience with: {', '.join(missing_skills[:5])}")
+    elif missing:
+        recommendations.append(f"Add relevant experience with: {', '.join(missing[:5])}")
+    if required_years and resume_years >= required_years:
+        strengths.append(f"Meets the {required_years}+ years of experience requirement")
+    elif required_years:
+        weaknesses.append(f"Job asks for {required_years}+ years of experience; resume shows about {resume_years}")
+        recommendations.append("Make the duration of each role explicit (start and end dates)")
+    if required_level and resume_level >= required_level:
+        strengths.append("Education meets the stated requirement")
+    elif required_level:
+        weaknesses.append(f"Job asks for a {_education_name(required_level)} degree")
+    if not sections["skills"]:
+        weaknesses.append("No dedicated skills section")
+        recommendations.append("Add a skills section listing the tools and technologies you use")
+    if not sections["summary"]:
+        recommendations.append("Add a short summary tailored to the role")
+    if similarity_score < 30:
+        recommendations.append("Mirror the job description's terminology where it honestly describes your work")
+    if not recommendations:
+        recommendations.append("Quantify achievements in each role with metrics and outcomes")
+
+    return {
+        "overall_score": round(min(100, max(0, overall_score))),
+        "skills_score": round(min(100, max(0, skills_score))),
+        "experience_score": round(min(100, max(0, experience_score))),
+        "education_score": round(min(100, max(0, education_score))),
+        "similarity_score": similarity_score,
+        "keyword_match_percentage": keyword_pct,
+        "matched_keywords": matched,
+        "missing_keywords": missing,
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "recommendations": recommendations,
+        "detailed_analysis": {
+            "sections_found": [name for name in SECTION_HEADINGS if sections[name]],
+            "matched_skills": skill_gap["matched"],
+            "missing_skills": missing_skills,
+            "missing_skills_by_category": skill_gap["missing_by_category"],
+            "resume_years_experience": resume_years,
+            "required_years_experience": required_years or None,
+            "resume_education_level": _education_name(resume_level),
+            "required_education_level": _education_name(required_level),
+            "processing_ms": round((time.perf_counter() - started) * 1000, 2)
+        },
+        "analysis_type": "rule_based"
+    }
+
+
+def extract_score(text: str, pattern: str, default: int = 70) -> int:
+    """
+    Pull a numeric score out of free text
+
+    Args:
+        text: Text to search
+        pattern: Regex with one group capturing the number
+        default: Value used when the pattern does not match
+
+    Returns:
+        Score clamped to 0-100
+    """
+    # Accept negative numbers too, so they are clamped rather than ignored
+    match = re.search(pattern.replace(r"(\d+)", r"(-?\d+)"), text or "", re.IGNORECASE)
+    if not match:
+        return default
+    try:
+        return max(0, min(100, int(match.group(1))))
+    except (ValueError, IndexError):
+        return default
+
+
+def extract_section(text: str, pattern: str, fallback: str = "") -> List[str]:
+    """
+    Pull the list of items following a heading out of free text
+
+    Args:
+        text: Text to search
+        pattern: Regex whose first group captures everything after the heading
+        fallback: Item returned if the heading is present but has no items
+
+    Returns:
+        List of items (bullets stripped), or [] if the heading is not found
+    """
+    match = re.search(pattern, text or "", re.IGNORECASE | re.DOTALL)
+    if not match:
+        return []
+
+    items = []
+    for raw_line in match.group(1).splitlines():
+        line = raw_line.strip()
+        if not line:
+            if items:
+                break
+            continue
+        if line.endswith(":") and not BULLET_PATTERN.match(line):
+            break
+        items.append(BULLET_PATTERN.sub("", line))
+
+    return items or ([fallback] if fallback else [])
+
+
+def parse_ai_analysis(analysis_text: str, resume_text: str, job_description: str) -> Dict[str, Any]:
+    """
+    Convert a free-text LLM analysis into the rule-based result structure
+
+    Scores and lists come from the LLM text; similarity and keyword matching
+    are computed locally.
+
+    Args:
+        analysis_text: LLM response text
+        resume_text: Raw resume text
+        job_description: Job description text
+
+    Returns:
+        Dict with the same keys as analyze_resume_rule_based and analysis_type "ai"
+    """
+    jd_keywords = extract_keywords(job_description, top_n=30)
+    keyword_match = match_keywords(resume_text, jd_keywords)
+
+    return {
+        "overall_score": extract_score(analysis_text, r"overall(?:\s+match)?\s+score[:\s]*(\d+)"),
+        "skills_score": extract_score(analysis_text, r"skills?\s+(?:match|score)[:\s]*(\d+)"),
+        "experience_score": extract_score(analysis_text, r"experience\s+(?:relevance|match|score)[:\s]*(\d+)"),
+        "education_score": extract_score(analysis_text, r"education\s+(?:fit|match|score)[:\s]*(\d+)"),
+        "similarity_score": calculate_text_similarity(resume_text, job_description),
+        "keyword_match_percentage": (
+            round(100 * len(keyword_match["matched_keywords"]) / len(jd_keywords), 2) if jd_keywords else 0.0
+        ),
+        **keyword_match,
+        "strengths": extract_section(analysis_text, r"strengths?[:\s]*\n(.*)"),
+        "weaknesses": extract_section(analysis_text, r"weaknesses?[:\s]*\n(.*)"),
+        "recommendations": extract_section(analysis_text, r"recommendations?[:\s]*\n(.*)"),
+        "detailed_analysis": analysis_text,
+        "analysis_type": "ai"
+    }
@@ -0,0 +1,310 @@
+"""
+Result Cache - Content-addressed caching for resume analysis results
+Provides an in-process LRU cache with TTL and an optional Redis backend.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Optional imports with proper error handling
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+    logging.warning("redis not installed. Redis result cache disabled.")
+
+
+DEFAULT_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+PARSED_RESUME_TTL_SECONDS = int(os.getenv("PARSED_RESUME_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+PARSED_RESUME_MAX_ENTRIES = int(os.getenv("PARSED_RESUME_CACHE_MAX_ENTRIES", "2048"))
+
+
+def normalize_job_description(job_description: str) -> str:
+    """
+    Normalize a job description so cosmetic differences share a cache entry
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        Whitespace-collapsed job description
+    """
+    return re.sub(r"\s+", " ", job_description or "").strip()
+
+
+def build_cache_key(
+    file_bytes: bytes,
+    job_description: str,
+    model: str,
+    prompt_version: str
+) -> str:
+    """
+    Build a content-addressed cache key for an analysis request
+
+    Args:
+        file_bytes: Raw bytes of the uploaded resume
+        job_description: Job description text
+        model: Model name used for the analysis
+        prompt_version: Version tag of the prompts used
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    resume_digest = hashlib.sha256(file_bytes).hexdigest()
+    jd_digest = hashlib.sha256(
+        normalize_job_description(job_description).encode("utf-8")
+    ).hexdigest()
+
+    key_material = "|".join([resume_digest, jd_digest, model, prompt_version])
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+
+def build_resume_fingerprint(resume_text: str, model: str, prompt_version: str) -> str:
+    """
+    Build a cache key for a parsed resume
+
+    Parsing does not depend on the job description, so the key only covers
+    the extracted text and the parser configuration.
+
+    Args:
+        resume_text: Extracted resume text
+        model: Model name used by the parser
+        prompt_version: Version tag of the parsing prompt
+
+    Returns:
+        Hex SHA-256 digest identifying the parse
+    """
+    text_digest = hashlib.sha256(
+        re.sub(r"\s+", " ", resume_text or "").strip().encode("utf-8")
+    ).hexdigest()
+
+    key_material = "|".join([text_digest, model, prompt_version])
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+
+class ResultCache(ABC):
+    """Base interface for analysis result caches"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store value under key for ttl seconds"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every cached entry"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for monitoring"""
+        return {}
+
+
+class InMemoryResultCache(ResultCache):
+    """Process-local LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: int = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResultCache(ResultCache):
+    """Redis-backed cache shared across workers and replicas"""
+
+    def __init__(self, redis_url: str, ttl: int = DEFAULT_TTL_SECONDS, namespace: str = "resume-analysis"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis not installed. Install with: pip install redis")
+
+        self.ttl = ttl
+        self.namespace = namespace
+        self._client = redis_asyncio.from_url(redis_url)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self._client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            self.misses += 1
+            return None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            # A truncated or foreign value; drop it so the next write replaces it
+            logger.warning(f"Discarding corrupt Redis cache entry {key}: {e}")
+            self.misses += 1
+            try:
+                await self._client.delete(self._key(key))
+            except Exception as delete_error:
+                logger.warning(f"Redis cache delete failed: {delete_error}")
+            return None
+
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        try:
+            await self._client.set(
+                self._key(key),
+                json.dumps(value, default=str),
+                ex=ttl if ttl is not None else self.ttl
+            )
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+    async def clear(self) -> None:
+        try:
+            async for key in self._client.scan_iter(match=self._key("*")):
+                await self._client.delete(key)
+        except Exception as e:
+            logger.warning(f"Redis cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_result_cache: Optional[ResultCache] = None
+_parsed_resume_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Return the process-wide result cache, creating it from the environment
+
+    RESULT_CACHE_BACKEND selects "memory" (default) or "redis"; the Redis
+    backend reads its connection string from REDIS_URL and falls back to the
+    in-memory cache if it cannot be created.
+
+    Returns:
+        The configured ResultCache instance
+    """
+    global _result_cache
+
+    if _result_cache is None:
+        backend = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+        if backend == "redis":
+            try:
+                _result_cache = RedisResultCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+                logger.info("Using Redis result cache")
+            except Exception as e:
+                logger.warning(f"Falling back to in-memory result cache: {e}")
+
+        if _result_cache is None:
+            _result_cache = InMemoryResultCache()
+
+    return _result_cache
+
+
+def get_parsed_resume_cache() -> ResultCache:
+    """
+    Return the process-wide cache of parsed (structured) resumes
+
+    Uses the same RESULT_CACHE_BACKEND selection as the result cache, but a
+    separate namespace, size limit and TTL so that parses can be reused
+    across many job descriptions.
+
+    Returns:
+        The configured ResultCache instance
+    """
+    global _parsed_resume_cache
+
+    if _parsed_resume_cache is None:
+        backend = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+        if backend == "redis":
+            try:
+                _parsed_resume_cache = RedisResultCache(
+                    os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                    ttl=PARSED_RESUME_TTL_SECONDS,
+                    namespace="parsed-resume"
+                )
+            except Exception as e:
+                logger.warning(f"Falling back to in-memory parsed resume cache: {e}")
+
+        if _parsed_resume_cache is None:
+            _parsed_resume_cache = InMemoryResultCache(
+                max_entries=PARSED_RESUME_MAX_ENTRIES,
+                ttl=PARSED_RESUME_TTL_SECONDS
+            )
+
+    return _parsed_resume_cache
@@ -0,0 +1,374 @@
+"""
+Input Compaction - Token-budgeted cleanup of resume and job description text
+Collapses whitespace, drops page headers/footers and JD boilerplate (EEO,
+benefits), and fits what remains into a per-model token budget, keeping the
+highest-priority sections whole instead of cutting at a character offset.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+
+from .parse import PAGE_BREAK, SECTION_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# Optional imports with proper error handling
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+    logging.warning("tiktoken not installed. Using approximate token counts.")
+
+
+# "auto" uses tiktoken when its encoding is available locally, "heuristic" never loads it
+COMPACTION_TOKENIZER = os.getenv("COMPACTION_TOKENIZER", "auto").lower()
+DEFAULT_INPUT_TOKEN_BUDGETS = {"resume": 3000, "job_description": 1500}
+
+# Resume sections in the order they are kept when over budget; "header" is the
+# contact block before the first heading
+RESUME_SECTION_PRIORITY = {
+    "header": 0,
+    "skills": 1, "technical skills": 1,
+    "experience": 2, "work experience": 2, "professional experience": 2,
+    "summary": 3, "profile": 3, "objective": 3,
+    "projects": 4, "technical projects": 4,
+    "education": 5,
+    "certifications": 6,
+    "achievements": 7
+}
+
+JD_SECTION_PRIORITY = {
+    "header": 0,
+    "requirements": 1, "qualifications": 1, "skills": 1, "what you bring": 1, "must have": 1,
+    "responsibilities": 2, "what you will do": 2, "what you'll do": 2, "the role": 2, "duties": 2,
+    "nice to have": 3, "preferred qualifications": 3, "bonus": 3,
+    "about us": 4, "about the company": 4, "about the team": 4, "who we are": 4
+}
+
+# JD sections that carry no signal for matching a candidate
+JD_BOILERPLATE_HEADINGS = {
+    "benefits", "perks", "perks and benefits", "benefits and perks", "what we offer", "why join us",
+    "compensation", "salary and benefits", "equal opportunity", "equal employment opportunity", "eeo",
+    "eeo statement", "diversity and inclusion", "accommodations", "how to apply"
+}
+
+# Sentences that open an EEO statement; only these (and the EEO sentences that
+# directly follow them) are dropped, so "without regard to" elsewhere survives
+_EEO_STATEMENT = re.compile(
+    r"(?i)^(\S+\s+){0,8}?(is|are)\s+(an?|a proud)\s+equal\s+(employment\s+)?opportunity"
+    r"(\s+and\s+affirmative\s+action)?\s+employer\b"
+    r"|^all qualified applicants will receive consideration for employment\b"
+    r"|^(\S+\s+){0,6}?participates? in e-verify\b"
+    r"|^(if you|applicants|candidates)\b.{0,80}\breasonable accommodations?\b"
+)
+_EEO_CONTINUATION = re.compile(
+    r"(?i)\b(equal (employment )?opportunity|affirmative action|without regard to|reasonable accommodation"
+    r"|protected veterans?|regardless of (race|gender|age)|e-verify|disabilit(y|ies)|sexual orientation)\b"
+)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_PAGE_NUMBER_PATTERN = re.compile(r"(?i)^\W*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?\W*$")
+_HEADING_PUNCTUATION = " \t:-–—|#*"
+
+
+def _load_budgets() -> Dict[str, Dict[str, int]]:
+    """Per-model budgets from INPUT_TOKEN_BUDGETS (JSON keyed by model name)"""
+    raw = os.getenv("INPUT_TOKEN_BUDGETS", "").strip()
+    if not raw:
+        return {}
+    try:
+        budgets = json.loads(raw)
+        if not isinstance(budgets, dict):
+            raise ValueError("must be a JSON object keyed by model")
+        return budgets
+    except ValueError as e:
+        logger.error(f"Ignoring invalid INPUT_TOKEN_BUDGETS: {e}")
+        return {}
+
+
+INPUT_TOKEN_BUDGETS = _load_budgets()
+
+
+def input_token_budget(kind: str, model: Optional[str] = None) -> int:
+    """
+    Token budget for one input of an LLM call
+
+    Args:
+        kind: "resume" or "job_description"
+        model: Model the input is sent to
+
+    Returns:
+        Maximum tokens for that input
+    """
+    return int(INPUT_TOKEN_BUDGETS.get(model or "", {}).get(kind, DEFAULT_INPUT_TOKEN_BUDGETS[kind]))
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when its encoding is available offline, else approximately"""
+
+    _PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, model: Optional[str] = None):
+        self.encoding = None
+        if TIKTOKEN_AVAILABLE and COMPACTION_TOKENIZER != "heuristic":
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model or "")
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # Unknown models or no network to fetch the encoding file
+                logger.info(f"tiktoken encoding unavailable for {model or 'default'} ({e}); using approximate counts")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        # BPE vocabularies keep common words whole and split long ones every few
+        # characters; this slightly overestimates, which is the safe side for a budget
+        return sum(1 + (len(piece) - 1) // 6 for piece in self._PIECE_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=16)
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Return the shared token counter for a model"""
+    return TokenCounter(model)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count the tokens text uses for a model"""
+    return get_token_counter(model).count(text)
+
+
+def _furniture_key(line: str) -> str:
+    """Normalize a line so running headers differing only by page number compare equal"""
+    return re.sub(r"\d+", "#", " ".join(line.lower().split()))
+
+
+def strip_page_furniture(text: str, edge_lines: int = 3) -> str:
+    """
+    Remove page numbers and header/footer lines repeated across pages
+
+    Only lines near the top or bottom of a page are candidates, and the first
+    occurrence is kept so a name used as a running header is not lost.
+
+    Args:
+        text: Extracted text with pages separated by PAGE_BREAK
+        edge_lines: Lines at the top and bottom of each page checked for repeats
+
+    Returns:
+        Text with the repeated lines removed and pages joined by newlines
+    """
+    pages = []
+    seen: Dict[str, int] = {}
+    for page in text.split(PAGE_BREAK):
+        lines = [line for line in page.splitlines() if not _PAGE_NUMBER_PATTERN.match(line.strip())]
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        edges = set(content[:edge_lines] + content[-edge_lines:])
+        pages.append((lines, edges))
+        for key in {_furniture_key(lines[i]) for i in edges}:
+            seen[key] = seen.get(key, 0) + 1
+
+    repeated = {key for key, pages_seen in seen.items() if pages_seen > 1}
+    kept = []
+    emitted = set()
+    for lines, edges in pages:
+        for i, line in enumerate(lines):
+            key = _furniture_key(line)
+            if i in edges and key in repeated:
+                if key in emitted:
+                    continue
+                emitted.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces/tabs, trim lines and allow at most one blank line in a row"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace(PAGE_BREAK, "\n")
+    lines = [re.sub(r"[ \t\u00a0\u2000-\u200b]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _heading_name(line: str, known: Dict[str, int]) -> Optional[str]:
+    """Return the section name if line is a heading from known, else None"""
+    candidate = line.strip(_HEADING_PUNCTUATION).lower()
+    if candidate in known:
+        return candidate
+    return None
+
+
+def split_sections(text: str, known: Dict[str, int]) -> List[Tuple[str, List[str]]]:
+    """
+    Split text into (section name, lines) in document order
+
+    Lines before the first recognised heading form the "header" section;
+    unrecognised short lines ending in a colon start an "other" section.
+
+    Args:
+        text: Whitespace-collapsed text
+        known: Recognised headings (lowercase)
+
+    Returns:
+        List of (name, lines) tuples
+    """
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.split("\n"):
+        name = _heading_name(line, known)
+        if name is None and line.endswith(":") and len(line.split()) <= 5:
+            name = line.strip(_HEADING_PUNCTUATION).lower() or "other"
+        if name is not None:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if any(line.strip() for line in lines)]
+
+
+def fit_sections_to_budget(
+    sections: List[Tuple[str, List[str]]],
+    priority: Dict[str, int],
+    budget: int,
+    counter: TokenCounter
+) -> str:
+    """
+    Keep the highest-priority sections that fit in the budget, in document order
+
+    Whole sections are kept in priority order; the first one that does not fit
+    is cut at a line boundary and lower-priority sections are dropped.
+
+    Args:
+        sections: (name, lines) in document order
+        priority: Section name -> rank (lower is kept first; unknown sections rank last)
+        budget: Token budget for the joined text
+        counter: Token counter for the target model
+
+    Returns:
+        The kept text
+    """
+    ranked = sorted(range(len(sections)), key=lambda i: (priority.get(sections[i][0], len(priority)), i))
+    kept: Dict[int, List[str]] = {}
+    remaining = budget
+
+    for index in ranked:
+        lines = sections[index][1]
+        cost = counter.count("\n".join(lines)) + 1
+        if cost <= remaining:
+            kept[index] = lines
+            remaining -= cost
+            continue
+
+        partial = []
+        for line in lines:
+            line_cost = counter.count(line) + 1
+            if line_cost > remaining:
+                break
+            partial.append(line)
+            remaining -= line_cost
+        if partial:
+            kept[index] = partial
+        break
+
+    return "\n".join(line for index in sorted(kept) for line in kept[index]).strip()
+
+
+def compact_resume(text: str, model: Optional[str] = None, budget: Optional[int] = None) -> str:
+    """
+    Clean resume text and fit it into the model's resume token budget
+
+    Args:
+        text: Extracted resume text (pages separated by PAGE_BREAK)
+        model: Model the text is sent to (selects the tokenizer and budget)
+        budget: Token budget overriding the model's configured one
+
+    Returns:
+        Compacted resume text
+    """
+    budget = budget or input_token_budget("resume", model)
+    counter = get_token_counter(model)
+    cleaned = collapse_whitespace(strip_page_furniture(text or ""))
+    if counter.count(cleaned) <= budget:
+        return cleaned
+
+    compacted = fit_sections_to_budget(
+        split_sections(cleaned, {header: 0 for header in SECTION_HEADERS}), RESUME_SECTION_PRIORITY, budget, counter
+    )
+    logger.info(f"Resume compacted to {budget}-token budget ({len(cleaned)} -> {len(compacted)} chars)")
+    return compacted
+
+
+def _remove_eeo_statements(paragraph: str) -> str:
+    """
+    Drop EEO statements from a paragraph sentence by sentence, so unbroken JDs keep their content
+
+    A statement starts at a sentence like "We are an equal opportunity
+    employer" and runs on through the EEO sentences directly after it.
+    """
+    in_statement = False
+    lines = []
+    for line in paragraph.split("\n"):
+        kept = []
+        for sentence in _SENTENCE_SPLIT.split(line):
+            if _EEO_STATEMENT.search(sentence):
+                in_statement = True
+                continue
+            if in_statement and _EEO_CONTINUATION.search(sentence):
+                continue
+            in_statement = False
+            kept.append(sentence)
+        lines.append(" ".join(kept))
+    return "\n".join(lines).strip()
+
+
+def remove_jd_boilerplate(text: str) -> str:
+    """
+    Drop benefits/EEO sections, EEO sentences and repeated paragraphs from a job description
+
+    Args:
+        text: Whitespace-collapsed job description
+
+    Returns:
+        Job description without boilerplate
+    """
+    known = {**JD_SECTION_PRIORITY, **{heading: 0 for heading in JD_BOILERPLATE_HEADINGS}}
+    kept = []
+    seen = set()
+    for name, lines in split_sections(text, known):
+        paragraphs = "\n".join(lines).split("\n\n")
+        # A boilerplate heading covers its block up to the next blank line
+        if name in JD_BOILERPLATE_HEADINGS:
+            paragraphs = paragraphs[1:]
+        for paragraph in paragraphs:
+            paragraph = _remove_eeo_statements(paragraph)
+            key = " ".join(paragraph.lower().split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            kept.append(paragraph)
+    return "\n\n".join(kept)
+
+
+def compact_job_description(text: str, model: Optional[str] = None, budget: Optional[int] = None) -> str:
+    """
+    Clean a job description and fit it into the model's JD token budget
+
+    Args:
+        text: Job description text
+        model: Model the text is sent to (selects the tokenizer and budget)
+        budget: Token budget overriding the model's configured one
+
+    Returns:
+        Compacted job description
+    """
+    budget = budget or input_token_budget("job_description", model)
+    counter = get_token_counter(model)
+    cleaned = remove_jd_boilerplate(collapse_whitespace(text or ""))
+    if counter.count(cleaned) <= budget:
+        return cleaned
+
+    return fit_sections_to_budget(split_sections(cleaned, JD_SECTION_PRIORITY), JD_SECTION_PRIORITY, budget, counter)
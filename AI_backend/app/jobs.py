@@ -0,0 +1,483 @@
+"""
+Analysis Job Queue - Asynchronous submission and execution of resume analyses
+Decouples long-running analyses from HTTP requests. Jobs are queued, executed
+by workers, and their status/result can be polled or delivered to a webhook.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import asyncio
+import httpx
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Optional imports with proper error handling
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+    logging.warning("redis not installed. Redis job queue disabled.")
+
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", str(24 * 60 * 60)))
+JOB_WEBHOOK_RETRIES = int(os.getenv("JOB_WEBHOOK_RETRIES", "3"))
+# Comma-separated hosts webhooks may be sent to ("hooks.example.com" or
+# "*.example.com"); webhooks are disabled while this is empty
+JOB_WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+# Redis workers refresh a liveness key this often; jobs held by a worker whose
+# key has been gone for three intervals are requeued
+JOB_WORKER_HEARTBEAT_SECONDS = int(os.getenv("JOB_WORKER_HEARTBEAT_SECONDS", "30"))
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def new_job(payload: Dict[str, Any], webhook_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build a fresh job record
+
+    Args:
+        payload: Handler input (resume text, job description, mode, context)
+        webhook_url: Optional URL to POST the finished job to
+
+    Returns:
+        Job record dictionary
+    """
+    return {
+        "job_id": str(uuid.uuid4()),
+        "status": JOB_STATUS_QUEUED,
+        "created_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "webhook_url": webhook_url,
+        "payload": payload,
+        "result": None,
+        "error": None
+    }
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip the (potentially large) input payload from a job record"""
+    return {key: value for key, value in job.items() if key != "payload"}
+
+
+def _webhook_host_allowed(host: str) -> bool:
+    """Whether host matches an entry of JOB_WEBHOOK_ALLOWED_HOSTS"""
+    for allowed in JOB_WEBHOOK_ALLOWED_HOSTS:
+        if allowed.startswith("*.") and host.endswith(allowed[1:]):
+            return True
+        if host == allowed:
+            return True
+    return False
+
+
+async def validate_webhook_url(url: str) -> None:
+    """
+    Check a webhook URL is safe to POST to
+
+    The host must be on the JOB_WEBHOOK_ALLOWED_HOSTS allowlist and every
+    address it resolves to must be public, so webhooks cannot reach loopback,
+    private-network or link-local (cloud metadata) services.
+
+    Args:
+        url: Webhook URL supplied by the client
+
+    Raises:
+        ValueError: If the URL may not be used, with the reason
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("webhookUrl must be an http(s) URL.")
+    if not JOB_WEBHOOK_ALLOWED_HOSTS:
+        raise ValueError("Webhooks are disabled on this server.")
+    if not _webhook_host_allowed(host):
+        raise ValueError(f"Webhook host {host} is not allowed.")
+
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError) as e:
+        raise ValueError(f"Webhook host {host} could not be resolved.") from e
+
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Webhook host {host} resolves to a non-public address.")
+
+
+async def deliver_webhook(job: Dict[str, Any]) -> None:
+    """POST a finished job to its webhook URL, retrying transient failures"""
+    url = job.get("webhook_url")
+    if not url:
+        return
+
+    # Re-checked at delivery: the allowlist may have changed and DNS may now point elsewhere
+    try:
+        await validate_webhook_url(url)
+    except ValueError as e:
+        logger.error(f"Not delivering webhook for job {job['job_id']}: {e}")
+        return
+
+    body = public_job_view(job)
+    async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
+        for attempt in range(JOB_WEBHOOK_RETRIES):
+            try:
+                response = await client.post(url, json=body)
+                if response.status_code < 500:
+                    return
+                logger.warning(f"Webhook {url} returned {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Webhook delivery to {url} failed: {e}")
+            if attempt < JOB_WEBHOOK_RETRIES - 1:
+                await asyncio.sleep(2 ** attempt)
+
+    logger.error(f"Giving up on webhook delivery for job {job['job_id']}")
+
+
+async def execute_job(queue: "JobQueue", job: Dict[str, Any], handler: JobHandler) -> None:
+    """Run a job through handler and record its outcome"""
+    job["status"] = JOB_STATUS_RUNNING
+    job["started_at"] = datetime.now().isoformat()
+    await queue.save(job)
+
+    try:
+        job["result"] = await handler(job["payload"])
+        job["status"] = JOB_STATUS_SUCCEEDED
+    except Exception as e:
+        logger.error(f"Job {job['job_id']} failed: {e}", exc_info=True)
+        job["error"] = str(e)
+        job["status"] = JOB_STATUS_FAILED
+
+    job["finished_at"] = datetime.now().isoformat()
+    await queue.save(job)
+    await queue.ack(job)
+    await deliver_webhook(job)
+
+
+class JobQueue(ABC):
+    """Base interface for job queues"""
+
+    @abstractmethod
+    async def submit(self, job: Dict[str, Any]) -> None:
+        """Persist and enqueue a new job"""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if unknown/expired"""
+
+    @abstractmethod
+    async def save(self, job: Dict[str, Any]) -> None:
+        """Persist an updated job record"""
+
+    @abstractmethod
+    async def next_job(self, timeout: float = 5.0, worker: str = "0") -> Optional[Dict[str, Any]]:
+        """Wait for the next queued job on behalf of worker"""
+
+    async def ack(self, job: Dict[str, Any]) -> None:
+        """Mark a claimed job as finished so it is never redelivered"""
+
+    async def run_workers(self, handler: JobHandler, concurrency: int = JOB_WORKER_CONCURRENCY) -> None:
+        """Consume jobs forever with up to concurrency jobs in flight"""
+
+        async def worker(index: int):
+            logger.info(f"Job worker {index} started")
+            while True:
+                job = await self.next_job(worker=str(index))
+                if job is not None:
+                    await execute_job(self, job, handler)
+
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+
+
+class InMemoryJobQueue(JobQueue):
+    """asyncio.Queue-backed queue whose workers run inside the API process"""
+
+    def __init__(self, handler: Optional[JobHandler] = None, concurrency: int = JOB_WORKER_CONCURRENCY):
+        self.handler = handler
+        self.concurrency = concurrency
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._workers and self.handler is not None:
+            self._workers = [
+                asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+            ]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await execute_job(self, job, self.handler)
+            finally:
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Forget finished jobs whose retention period has passed"""
+        now = time.monotonic()
+        for job_id in [j for j, expires_at in self._expires_at.items() if expires_at < now]:
+            self._jobs.pop(job_id, None)
+            self._expires_at.pop(job_id, None)
+
+    async def submit(self, job: Dict[str, Any]) -> None:
+        self._ensure_started()
+        self._prune()
+        self._jobs[job["job_id"]] = job
+        await self._queue.put(job["job_id"])
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["job_id"]] = job
+        if job["status"] in (JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED):
+            self._expires_at[job["job_id"]] = time.monotonic() + JOB_RESULT_TTL_SECONDS
+
+    async def next_job(self, timeout: float = 5.0, worker: str = "0") -> Optional[Dict[str, Any]]:
+        self._ensure_started()
+        try:
+            job_id = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._queue.task_done()
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        """Cancel embedded workers (app shutdown)"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Redis-backed queue; workers run in separate processes (see job_worker.py)
+
+    Claiming a job atomically moves its id from the queue into the worker's own
+    processing list (BLMOVE, Redis >= 6.2), and the id is removed only once the
+    job has finished. Each processing list has a liveness key the worker keeps
+    refreshing; if a worker dies, the list outlives the key and any worker
+    requeues its jobs, so a crash never loses a job or leaves it "running".
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        namespace: str = "resume-jobs",
+        ttl: int = JOB_RESULT_TTL_SECONDS,
+        heartbeat_seconds: int = JOB_WORKER_HEARTBEAT_SECONDS,
+        client: Optional[Any] = None
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis not installed. Install with: pip install redis")
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self.heartbeat_seconds = heartbeat_seconds
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._client = client if client is not None else redis_asyncio.from_url(redis_url)
+        # job_id -> processing list holding it, for jobs claimed by this process
+        self._claimed: Dict[str, str] = {}
+        self._workers: set = set()
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.namespace}:job:{job_id}"
+
+    @property
+    def _queue_key(self) -> str:
+        return f"{self.namespace}:queue"
+
+    @property
+    def _processing_lists_key(self) -> str:
+        return f"{self.namespace}:processing-lists"
+
+    def _processing_key(self, worker: str) -> str:
+        return f"{self.namespace}:processing:{self.consumer_id}:{worker}"
+
+    @staticmethod
+    def _alive_key(processing_key: str) -> str:
+        return f"{processing_key}:alive"
+
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _heartbeat(self, processing_key: str) -> None:
+        """Register a processing list and mark its worker alive"""
+        await self._client.sadd(self._processing_lists_key, processing_key)
+        await self._client.set(self._alive_key(processing_key), "1", ex=self.heartbeat_seconds * 3)
+
+    async def submit(self, job: Dict[str, Any]) -> None:
+        await self.save(job)
+        await self._client.lpush(self._queue_key, job["job_id"])
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self._job_key(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await self._client.set(self._job_key(job["job_id"]), json.dumps(job, default=str), ex=self.ttl)
+
+    async def next_job(self, timeout: float = 5.0, worker: str = "0") -> Optional[Dict[str, Any]]:
+        processing_key = self._processing_key(worker)
+        self._workers.add(processing_key)
+        await self._heartbeat(processing_key)
+
+        # Oldest job (right end) moves into this worker's processing list in one step
+        job_id = await self._client.blmove(self._queue_key, processing_key, int(max(1, timeout)), "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+
+        job_id = self._decode(job_id)
+        job = await self.get(job_id)
+        if job is None:
+            # The record expired while queued; nothing to run
+            await self._client.lrem(processing_key, 1, job_id)
+            return None
+        self._claimed[job_id] = processing_key
+        return job
+
+    async def ack(self, job: Dict[str, Any]) -> None:
+        processing_key = self._claimed.pop(job["job_id"], None)
+        if processing_key is not None:
+            await self._client.lrem(processing_key, 1, job["job_id"])
+
+    async def requeue_stale(self) -> int:
+        """
+        Move jobs held by dead workers back onto the queue
+
+        Returns:
+            Number of jobs requeued
+        """
+        requeued = 0
+        for processing_key in await self._client.smembers(self._processing_lists_key):
+            processing_key = self._decode(processing_key)
+            if await self._client.exists(self._alive_key(processing_key)):
+                continue
+
+            while True:
+                # Requeue at the right end so recovered jobs run next
+                job_id = await self._client.lmove(processing_key, self._queue_key, "RIGHT", "RIGHT")
+                if job_id is None:
+                    break
+                job = await self.get(self._decode(job_id))
+                if job is not None:
+                    job.update({"status": JOB_STATUS_QUEUED, "started_at": None})
+                    await self.save(job)
+                requeued += 1
+            await self._client.srem(self._processing_lists_key, processing_key)
+
+        if requeued:
+            logger.warning(f"Requeued {requeued} job(s) from dead workers")
+        return requeued
+
+    async def run_workers(self, handler: JobHandler, concurrency: int = JOB_WORKER_CONCURRENCY) -> None:
+        """Consume jobs with up to concurrency in flight, keeping this process's workers alive"""
+
+        async def keep_alive():
+            # Redis errors are logged and retried next round: if this loop died, the
+            # alive keys would expire and other workers would rerun this process's jobs
+            while True:
+                for processing_key in list(self._workers):
+                    try:
+                        await self._heartbeat(processing_key)
+                    except Exception as e:
+                        logger.error(f"Worker heartbeat for {processing_key} failed: {e}")
+                try:
+                    await self.requeue_stale()
+                except Exception as e:
+                    logger.error(f"Stale job recovery failed: {e}")
+                await asyncio.sleep(self.heartbeat_seconds)
+
+        monitor = asyncio.create_task(keep_alive())
+        try:
+            await super().run_workers(handler, concurrency)
+        finally:
+            monitor.cancel()
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue(handler: Optional[JobHandler] = None) -> JobQueue:
+    """
+    Return the process-wide job queue, creating it from the environment
+
+    JOB_QUEUE_BACKEND selects "memory" (default; workers run as asyncio tasks
+    in this process) or "redis" (jobs are executed by job_worker.py processes).
+
+    Args:
+        handler: Job handler used by embedded in-memory workers
+
+    Returns:
+        The configured JobQueue instance
+    """
+    global _job_queue
+
+    if _job_queue is None:
+        backend = os.getenv("JOB_QUEUE_BACKEND", "memory").lower()
+        if backend == "redis":
+            _job_queue = RedisJobQueue(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            logger.info("Using Redis job queue")
+        else:
+            _job_queue = InMemoryJobQueue(handler=handler)
+
+    return _job_queue
+
+
+async def run_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Default job handler: runs ResumeAnalysisWorkflow in simple, single_pass or comprehensive mode
+
+    Args:
+        payload: Dict with resume_text, job_description, mode and additional_context
+
+    Returns:
+        The workflow result
+    """
+    from .workflows.resume_analysis_workflow import get_workflow
+
+    workflow = get_workflow()
+
+    if payload.get("mode") == "comprehensive":
+        result = await workflow.analyze_resume_comprehensive(
+            payload["resume_text"],
+            payload["job_description"],
+            payload.get("additional_context") or None
+        )
+    elif payload.get("mode") == "single_pass":
+        result = await workflow.analyze_resume_single_pass(payload["resume_text"], payload["job_description"])
+    else:
+        result = await workflow.analyze_resume_simple(payload["resume_text"], payload["job_description"])
+
+    if not result.get("success", False):
+        raise RuntimeError(result.get("error", "Analysis failed"))
+    return result
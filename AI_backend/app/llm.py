@@ -0,0 +1,142 @@
+"""
+LLM Client Registry - Process-wide, pooled LLM clients
+Builds one keep-alive HTTP connection pool per process and shares chat model
+instances across agents and requests instead of constructing them per call.
+"""
+
+from langchain_openai import ChatOpenAI
+from openai import AsyncOpenAI
+from typing import Dict, Optional, Tuple
+import httpx
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "120"))
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_chat_models: Dict[Tuple[str, float, str, Optional[int], Optional[int]], ChatOpenAI] = {}
+_openai_clients: Dict[Tuple[str, Optional[int]], AsyncOpenAI] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_HTTP_TIMEOUT_SECONDS, connect=10.0)
+
+
+def get_http_client() -> httpx.Client:
+    """Return the shared synchronous HTTP client (used by sync LangChain calls)"""
+    global _http_client
+
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared asynchronous HTTP client with keep-alive pooling"""
+    global _async_http_client
+
+    with _lock:
+        if _async_http_client is None or _async_http_client.is_closed:
+            _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        return _async_http_client
+
+
+def get_chat_model(
+    model: str,
+    temperature: float,
+    openai_api_key: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    max_retries: Optional[int] = None
+) -> ChatOpenAI:
+    """
+    Return a shared ChatOpenAI instance for a model/temperature/max_tokens/max_retries combination
+
+    Args:
+        model: OpenAI model name
+        temperature: Sampling temperature
+        openai_api_key: API key (defaults to OPENAI_API_KEY)
+        max_tokens: Completion token limit (None for the model default)
+        max_retries: SDK-level retries (None for the SDK default; 0 when the caller retries itself)
+
+    Returns:
+        ChatOpenAI backed by the process-wide connection pool
+    """
+    api_key = openai_api_key or os.getenv("OPENAI_API_KEY", "")
+    key = (model, temperature, api_key, max_tokens, max_retries)
+
+    chat_model = _chat_models.get(key)
+    if chat_model is None:
+        options = {} if max_retries is None else {"max_retries": max_retries}
+        chat_model = ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            openai_api_key=api_key,
+            max_tokens=max_tokens,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+            **options
+        )
+        with _lock:
+            chat_model = _chat_models.setdefault(key, chat_model)
+        logger.info(f"Created shared chat model {model} (temperature={temperature}, max_tokens={max_tokens})")
+
+    return chat_model
+
+
+def get_openai_client(openai_api_key: Optional[str] = None, max_retries: Optional[int] = None) -> AsyncOpenAI:
+    """
+    Return a shared AsyncOpenAI client backed by the process-wide connection pool
+
+    Args:
+        openai_api_key: API key (defaults to OPENAI_API_KEY)
+        max_retries: SDK-level retries (None for the SDK default; 0 when the caller retries itself)
+
+    Returns:
+        AsyncOpenAI client
+    """
+    api_key = openai_api_key or os.getenv("OPENAI_API_KEY", "")
+
+    key = (api_key, max_retries)
+
+    client = _openai_clients.get(key)
+    if client is None:
+        options = {} if max_retries is None else {"max_retries": max_retries}
+        client = AsyncOpenAI(api_key=api_key, http_client=get_async_http_client(), **options)
+        with _lock:
+            client = _openai_clients.setdefault(key, client)
+
+    return client
+
+
+async def close_llm_clients() -> None:
+    """Close the pooled HTTP clients and forget cached models (app shutdown)"""
+    global _http_client, _async_http_client
+
+    with _lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _http_client = None
+        _async_http_client = None
+        _chat_models.clear()
+        _openai_clients.clear()
+
+    if async_http_client is not None:
+        await async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
@@ -5,10 +5,11 @@ Extracts and structures content from PDF and DOCX files
 from PyPDF2 import PdfReader
 from dotenv import load_dotenv
 import fitz  # PyMuPDF
+import io
 import re
 import os
 import logging 
-from typing import Optional, Dict, List
+from typing import BinaryIO, Optional, Dict, List, Union
 
 # Optional imports with proper error handling
 try:
@@ -49,31 +50,66 @@ SECTION_HEADERS = [
     "certifications", "achievements"
 ]
 
+# Separates pages in extracted PDF text (a line boundary for str.splitlines)
+PAGE_BREAK = "\f"
+
+# A file path, raw bytes, or a binary file-like object
+FileSource = Union[str, bytes, BinaryIO]
+
+
+def _read_source(source: FileSource) -> Union[str, bytes]:
+    """
+    Normalize a file source to either a path string or raw bytes
+
+    Args:
+        source: File path, bytes, or binary file-like object
+
+    Returns:
+        The path unchanged, or the full contents as bytes
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def _open_pdf(source: Union[str, bytes]):
+    """Open a PDF with PyMuPDF from a path or in-memory bytes"""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
     
-def content_parse(file_path: str) -> Dict[str, any]:
+def content_parse(file_path: FileSource) -> Dict[str, any]:
     """
     Parses a resume PDF into structured sections and clean text.
     Returns both structured dictionary and full text string.
     
     Args:
-        file_path: Path to the PDF file
+        file_path: Path to the PDF file, or its contents as bytes / file-like object
         
     Returns:
         Dictionary with 'structured' and 'full_text' keys
     """
-    # FIXED: Validate file exists
-    if not os.path.exists(file_path):
-        logger.error(f"File not found: {file_path}")
-        return {"structured": {}, "full_text": ""}
-    
-    # FIXED: Validate file is PDF
-    if not file_path.lower().endswith('.pdf'):
-        logger.error(f"File is not a PDF: {file_path}")
-        return {"structured": {}, "full_text": ""}
+    source = _read_source(file_path)
+    if isinstance(source, str):
+        # FIXED: Validate file exists
+        if not os.path.exists(source):
+            logger.error(f"File not found: {source}")
+            return {"structured": {}, "full_text": ""}
+
+        # FIXED: Validate file is PDF
+        if not source.lower().endswith('.pdf'):
+            logger.error(f"File is not a PDF: {source}")
+            return {"structured": {}, "full_text": ""}
+    label = source if isinstance(source, str) else "<in-memory PDF>"
     
     text = ""
     try:
-        with fitz.open(file_path) as doc:
+        with _open_pdf(source) as doc:
             for page in doc:
                 blocks = page.get_text("blocks")
                 blocks.sort(key=lambda b: (b[1], b[0]))  # sort top-bottom, left-right
@@ -86,7 +122,7 @@ def content_parse(file_path: str) -> Dict[str, any]:
 
     # FIXED: Handle case when no text extracted
     if not text:
-        logger.warning(f"No text extracted from {file_path}")
+        logger.warning(f"No text extracted from {label}")
         return {"structured": {}, "full_text": ""}
 
     # FIXED: Escape special regex characters in section headers
@@ -113,8 +149,8 @@ def content_parse(file_path: str) -> Dict[str, any]:
             sections[header] = content
 
     # FIXED: Use debug level for full text logging (it can be very long)
-    logger.debug(f'Extracted text from {file_path}: {text[:200]}...')
-    logger.info(f'Successfully parsed {file_path} - found {len(sections)} sections')
+    logger.debug(f'Extracted text from {label}: {text[:200]}...')
+    logger.info(f'Successfully parsed {label} - found {len(sections)} sections')
     
     return {
         "structured": sections,
@@ -122,78 +158,85 @@ def content_parse(file_path: str) -> Dict[str, any]:
     }  
 
 
-def extract_text_from_file(file_path: str) -> str:
+def extract_text_from_file(file_path: FileSource, file_name: Optional[str] = None) -> str:
     """
     Extract text from PDF or DOCX file
     
     Args:
-        file_path: Path to the file
+        file_path: Path to the file, or its contents as bytes / file-like object
+        file_name: Original file name, used to pick the format for in-memory sources
         
     Returns:
         Extracted text as string
     """
-    # FIXED: Validate file exists
-    if not os.path.exists(file_path):
-        logger.error(f"File not found: {file_path}")
+    if isinstance(file_path, str):
+        # FIXED: Validate file exists
+        if not os.path.exists(file_path):
+            logger.error(f"File not found: {file_path}")
+            return ""
+        file_name = file_name or file_path
+    elif not file_name:
+        logger.error("file_name is required to extract text from an in-memory file")
         return ""
     
     try:
-        if file_path.lower().endswith('.pdf'):
+        if file_name.lower().endswith('.pdf'):
             return extract_text_from_pdf(file_path)
-        elif file_path.lower().endswith(('.docx', '.doc')):
+        elif file_name.lower().endswith(('.docx', '.doc')):
             return extract_text_from_docx(file_path)
         else:
-            logger.error(f"Unsupported file format: {file_path}")
+            logger.error(f"Unsupported file format: {file_name}")
             return ""
     except Exception as e:
-        logger.error(f"Error extracting text from {file_path}: {e}")
+        logger.error(f"Error extracting text from {file_name}: {e}")
         return ""
 
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(file_path: FileSource) -> str:
     """
     Extract text from PDF using PyMuPDF with PyPDF2 fallback
     
     Args:
-        file_path: Path to PDF file
+        file_path: Path to PDF file, or its contents as bytes / file-like object
         
     Returns:
         Extracted text as string
     """
     text = ""
+    source = _read_source(file_path)
     
     # Try PyMuPDF first (faster and more accurate)
     try:
-        with fitz.open(file_path) as doc:
+        with _open_pdf(source) as doc:
             for page in doc:
-                text += page.get_text() + "\n"
+                text += page.get_text() + PAGE_BREAK
         
         if text.strip():  # FIXED: Check if text was actually extracted
             return text.strip()
         else:
-            logger.warning(f"PyMuPDF extracted no text from {file_path}, trying PyPDF2")
+            logger.warning("PyMuPDF extracted no text, trying PyPDF2")
     except Exception as e:
-        logger.error(f"Error reading PDF with PyMuPDF {file_path}: {e}")
+        logger.error(f"Error reading PDF with PyMuPDF: {e}")
     
     # Fallback to PyPDF2
     try:
-        reader = PdfReader(file_path)
+        reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
         for page in reader.pages:
             page_text = page.extract_text()
             if page_text:  # FIXED: Check if page has text
-                text += page_text + "\n"
+                text += page_text + PAGE_BREAK
     except Exception as e2:
         logger.error(f"Error with PyPDF2 fallback: {e2}")
     
     return text.strip()
 
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(file_path: FileSource) -> str:
     """
     Extract text from DOCX file
     
     Args:
-        file_path: Path to DOCX file
+        file_path: Path to DOCX file, or its contents as bytes / file-like object
         
     Returns:
         Extracted text as string
@@ -204,7 +247,8 @@ def extract_text_from_docx(file_path: str) -> str:
         return ""
     
     try:
-        doc = DocxDocument(file_path)  # FIXED: Use renamed import
+        source = _read_source(file_path)
+        doc = DocxDocument(io.BytesIO(source) if isinstance(source, bytes) else source)  # FIXED: Use renamed import
         
         # FIXED: Also extract text from tables
         text_parts = []
@@ -224,7 +268,7 @@ def extract_text_from_docx(file_path: str) -> str:
         text = "\n".join(text_parts)
         return text.strip()
     except Exception as e:
-        logger.error(f"Error reading DOCX {file_path}: {e}")
+        logger.error(f"Error reading DOCX: {e}")
         return ""
 
 
@@ -0,0 +1,343 @@
+"""
+LLM Rate Limiter - Adaptive client-side concurrency and TPM/RPM budgets
+One limiter per model, shared by every coroutine in the process. Concurrency
+follows AIMD: it grows additively while calls succeed and is cut
+multiplicatively on 429s or latency spikes. Requests and tokens are also
+metered over a sliding minute against configured RPM/TPM budgets, so bursts
+queue locally instead of turning into a storm of 429s.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LLM_CONCURRENCY_INITIAL = float(os.getenv("LLM_CONCURRENCY_INITIAL", "8"))
+LLM_CONCURRENCY_MIN = float(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = float(os.getenv("LLM_CONCURRENCY_MAX", "64"))
+# Additive increase per fully used window (the limit grows by this much once
+# `limit` calls have succeeded) and multiplicative decrease on congestion
+LLM_CONCURRENCY_INCREASE = float(os.getenv("LLM_CONCURRENCY_INCREASE", "1"))
+LLM_CONCURRENCY_DECREASE = float(os.getenv("LLM_CONCURRENCY_DECREASE", "0.5"))
+# A call slower than this multiple of the smoothed latency counts as congestion
+LLM_LATENCY_SPIKE_FACTOR = float(os.getenv("LLM_LATENCY_SPIKE_FACTOR", "3"))
+LLM_LATENCY_MIN_SAMPLES = int(os.getenv("LLM_LATENCY_MIN_SAMPLES", "10"))
+
+# Per-minute budgets; 0 means unlimited. LLM_RATE_BUDGETS overrides them per
+# model, e.g. '{"gpt-4o-mini": {"tpm": 200000, "rpm": 500}}'
+LLM_DEFAULT_TPM = int(os.getenv("LLM_DEFAULT_TPM", "0"))
+LLM_DEFAULT_RPM = int(os.getenv("LLM_DEFAULT_RPM", "0"))
+
+BUDGET_WINDOW_SECONDS = 60.0
+_EWMA_ALPHA = 0.2
+
+
+def _load_budgets() -> Dict[str, Dict[str, int]]:
+    """Per-model budgets from the LLM_RATE_BUDGETS environment variable (JSON)"""
+    raw = os.getenv("LLM_RATE_BUDGETS", "").strip()
+    if not raw:
+        return {}
+    try:
+        budgets = json.loads(raw)
+        return {
+            model: {field: int(value) for field, value in budget.items() if field in ("tpm", "rpm")}
+            for model, budget in budgets.items()
+        }
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Ignoring invalid LLM_RATE_BUDGETS: {e}")
+        return {}
+
+
+LLM_RATE_BUDGETS = _load_budgets()
+
+
+class LimiterPermit:
+    """One admitted request; release it exactly once when the request ends"""
+
+    def __init__(self, limiter: "AdaptiveLimiter", entry: List[float], started: float):
+        self._limiter = limiter
+        self._entry = entry
+        self.started = started
+        self._released = False
+
+    def release(self, tokens: Optional[int] = None, rate_limited: bool = False, success: bool = False) -> None:
+        """
+        Free the slot and feed the outcome back into the limit
+
+        Args:
+            tokens: Actual tokens used (replaces the estimate in the TPM window)
+            rate_limited: The provider answered 429
+            success: The request completed normally
+        """
+        if not self._released:
+            self._released = True
+            self._limiter._release(self._entry, time.monotonic() - self.started, tokens, rate_limited, success)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit plus sliding-minute TPM/RPM budgets for one model"""
+
+    def __init__(
+        self,
+        name: str,
+        tpm: int = 0,
+        rpm: int = 0,
+        initial: float = LLM_CONCURRENCY_INITIAL,
+        minimum: float = LLM_CONCURRENCY_MIN,
+        maximum: float = LLM_CONCURRENCY_MAX,
+        increase: float = LLM_CONCURRENCY_INCREASE,
+        decrease: float = LLM_CONCURRENCY_DECREASE,
+        spike_factor: float = LLM_LATENCY_SPIKE_FACTOR,
+        min_samples: int = LLM_LATENCY_MIN_SAMPLES
+    ):
+        self.name = name
+        self.tpm = tpm
+        self.rpm = rpm
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._limit = max(minimum, min(maximum, initial))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Waiters woken with a slot already counted in _in_flight for them
+        self._handoffs: set = set()
+        # [started_at, tokens] per request admitted in the last minute
+        self._window: Deque[List[float]] = deque()
+        self._ewma_seconds: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        self._counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "latency_spikes": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit (whole requests)"""
+        return max(1, int(self._limit))
+
+    def _prune(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - BUDGET_WINDOW_SECONDS:
+            self._window.popleft()
+
+    def _budget_delay(self, tokens: int, now: float) -> float:
+        """Seconds until the minute budgets admit a request of this size (0 if now)"""
+        self._prune(now)
+        delay = 0.0
+        if self.rpm and len(self._window) >= self.rpm:
+            delay = self._window[0][0] + BUDGET_WINDOW_SECONDS - now
+        if self.tpm and self._window:
+            used = sum(entry[1] for entry in self._window)
+            # Walk forward until enough old entries expire; an oversized request waits for an empty window
+            for started, entry_tokens in list(self._window):
+                if used + tokens <= self.tpm:
+                    break
+                used -= entry_tokens
+                delay = max(delay, started + BUDGET_WINDOW_SECONDS - now)
+        return max(0.0, delay)
+
+    def _admit(self, tokens: int, now: float, reserved: bool = False) -> LimiterPermit:
+        entry = [now, float(tokens)]
+        self._window.append(entry)
+        if not reserved:
+            self._in_flight += 1
+        self._counters["admitted"] += 1
+        return LimiterPermit(self, entry, time.monotonic())
+
+    def try_acquire(self, tokens: int = 0) -> Optional[LimiterPermit]:
+        """
+        Admit a request only if a slot and budget are free right now (used for hedges)
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            LimiterPermit, or None if the request would have to wait
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._waiters or self._in_flight >= self.limit or self._budget_delay(tokens, now) > 0:
+                return None
+            return self._admit(tokens, now)
+
+    async def acquire(self, tokens: int = 0) -> LimiterPermit:
+        """
+        Wait for a concurrency slot and minute budget, then admit the request
+
+        Args:
+            tokens: Estimated tokens for the request (prompt plus expected completion)
+
+        Returns:
+            LimiterPermit to release when the request ends
+        """
+        queued = False
+        # Set once a releasing request has handed its slot to this one; a
+        # reserved slot is already counted in _in_flight, so newcomers can't take it
+        reserved = False
+        while True:
+            waiter = None
+            with self._lock:
+                now = time.monotonic()
+                if reserved or (self._in_flight < self.limit and not self._waiters):
+                    delay = self._budget_delay(tokens, now)
+                    if delay == 0:
+                        return self._admit(tokens, now, reserved)
+                else:
+                    delay = None
+                    waiter = asyncio.get_running_loop().create_future()
+                    self._waiters.append(waiter)
+                    if self._in_flight < self.limit:
+                        self._wake_next()
+                if not queued:
+                    queued = True
+                    self._counters["queued"] += 1
+
+            if waiter is None:
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    if reserved:
+                        with self._lock:
+                            self._return_slot()
+                    raise
+                continue
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._handoffs:
+                        # Woken but abandoned: pass the slot on
+                        self._handoffs.discard(waiter)
+                        self._return_slot()
+                    elif waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                raise
+            with self._lock:
+                self._handoffs.discard(waiter)
+            reserved = True
+
+    def _wake_next(self) -> None:
+        """Hand a slot to the oldest waiter and wake it (lock held)"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                self._handoffs.add(waiter)
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+                return
+
+    def _return_slot(self) -> None:
+        """Give back a slot reserved for a waiter that gave up (lock held)"""
+        self._in_flight -= 1
+        if self._in_flight < self.limit:
+            self._wake_next()
+
+    def _release(
+        self,
+        entry: List[float],
+        seconds: float,
+        tokens: Optional[int],
+        rate_limited: bool,
+        success: bool
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if tokens:
+                entry[1] = float(tokens)
+
+            spike = (
+                self._samples >= self.min_samples
+                and self._ewma_seconds is not None
+                and seconds > self.spike_factor * self._ewma_seconds
+            )
+            if rate_limited or spike:
+                self._counters["rate_limited" if rate_limited else "latency_spikes"] += 1
+                self._multiplicative_decrease(entry[0])
+            elif success:
+                self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+
+            if success and not spike:
+                self._samples += 1
+                self._ewma_seconds = (
+                    seconds if self._ewma_seconds is None
+                    else (1 - _EWMA_ALPHA) * self._ewma_seconds + _EWMA_ALPHA * seconds
+                )
+
+            for _ in range(max(0, self.limit - self._in_flight)):
+                self._wake_next()
+
+    def _multiplicative_decrease(self, started: float) -> None:
+        """Cut the limit once per congestion event (lock held)"""
+        # Requests that started before the last cut reflect the old limit; don't cut twice for one burst
+        if started < self._last_decrease:
+            return
+        self._limit = max(self.minimum, self._limit * self.decrease)
+        self._last_decrease = time.monotonic()
+        self._counters["decreases"] += 1
+        logger.warning(f"LLM concurrency for {self.name} reduced to {self.limit}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, utilisation and minute budgets"""
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                "concurrency_limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "rpm_budget": self.rpm or None,
+                "tpm_budget": self.tpm or None,
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": int(sum(entry[1] for entry in self._window)),
+                "smoothed_seconds": round(self._ewma_seconds, 3) if self._ewma_seconds is not None else None,
+                **self._counters
+            }
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> AdaptiveLimiter:
+    """
+    Return the process-wide limiter for a model
+
+    Args:
+        model: OpenAI model name
+
+    Returns:
+        AdaptiveLimiter with the model's TPM/RPM budget (LLM_RATE_BUDGETS, else the defaults)
+    """
+    limiter = _limiters.get(model)
+    if limiter is None:
+        budget = LLM_RATE_BUDGETS.get(model, {})
+        with _limiters_lock:
+            limiter = _limiters.setdefault(model, AdaptiveLimiter(
+                model, tpm=budget.get("tpm", LLM_DEFAULT_TPM), rpm=budget.get("rpm", LLM_DEFAULT_RPM)
+            ))
+    return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Current limits and usage for every model that has been called"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def reset_rate_limiters() -> None:
+    """Forget all limiters (tests)"""
+    with _limiters_lock:
+        _limiters.clear()
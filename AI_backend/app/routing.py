@@ -0,0 +1,733 @@
+"""
+LLM Routing - Per-stage model selection, call policy and usage metrics
+Maps each pipeline stage (parse, analyze, quick_feedback, recommendations,
+crew, single_pass) to a model, temperature and max_tokens, with optional
+per-request overrides. Every call goes through one policy (per-call deadline,
+jittered exponential backoff on 429/5xx, hedging at the stage's p95 latency)
+behind the model's adaptive rate limiter, and records per-stage latency, token
+usage, retries, hedges and timeouts. Streamed calls share the policy, limiter
+and metrics but are only retried before their first chunk and never hedged.
+"""
+
+from collections import deque
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_openai import ChatOpenAI
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+
+from .compaction import count_tokens
+from .llm import get_chat_model
+from .rate_limit import AdaptiveLimiter, LimiterPermit, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+STAGE_PARSE = "parse"
+STAGE_ANALYZE = "analyze"
+STAGE_QUICK_FEEDBACK = "quick_feedback"
+STAGE_RECOMMENDATIONS = "recommendations"
+STAGE_CREW = "crew"
+STAGE_SINGLE_PASS = "single_pass"
+
+# Parsing and short feedback are mechanical, so they default to the fast tier;
+# scoring, recommendations and crews keep the strong model.
+DEFAULT_LLM_ROUTES: Dict[str, Dict[str, Any]] = {
+    STAGE_PARSE: {"model": "gpt-4o-mini", "temperature": 0.1, "max_tokens": 2500},
+    STAGE_ANALYZE: {"model": "gpt-4-turbo-preview", "temperature": 0.2, "max_tokens": 2000},
+    STAGE_QUICK_FEEDBACK: {"model": "gpt-4o-mini", "temperature": 0.2, "max_tokens": 600},
+    STAGE_RECOMMENDATIONS: {"model": "gpt-4-turbo-preview", "temperature": 0.1, "max_tokens": None},
+    STAGE_CREW: {"model": "gpt-4-turbo-preview", "temperature": 0.1, "max_tokens": None},
+    STAGE_SINGLE_PASS: {
+        "model": os.getenv("SINGLE_PASS_MODEL", "gpt-4o-mini"), "temperature": 0.0, "max_tokens": 3000
+    }
+}
+
+ROUTE_FIELDS = ("model", "temperature", "max_tokens")
+
+# Stages whose calls go through invoke_stage/stream_stage/call_llm; their
+# clients skip the SDK's own retries so the policy below is the only retry
+# layer. Crew and recommendation calls are driven by CrewAI and keep the SDK
+# defaults.
+POLICY_STAGES = (STAGE_PARSE, STAGE_ANALYZE, STAGE_QUICK_FEEDBACK, STAGE_SINGLE_PASS)
+
+# Call policy. Timeouts scale with the call's output cap: an attempt gets a
+# fixed allowance for queueing and prompt processing plus time to generate
+# max_tokens at a conservative rate, and the deadline (all attempts and backoff)
+# adds headroom for retrying fast failures such as 429s.
+LLM_ATTEMPT_BASE_SECONDS = float(os.getenv("LLM_ATTEMPT_BASE_SECONDS", "10"))
+LLM_MIN_OUTPUT_TOKENS_PER_SECOND = float(os.getenv("LLM_MIN_OUTPUT_TOKENS_PER_SECOND", "25"))
+LLM_DEFAULT_OUTPUT_TOKENS = int(os.getenv("LLM_DEFAULT_OUTPUT_TOKENS", "1000"))
+LLM_RETRY_HEADROOM_SECONDS = float(os.getenv("LLM_RETRY_HEADROOM_SECONDS", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+
+
+class StageRoute(NamedTuple):
+    """Model settings for one stage"""
+    model: str
+    temperature: float
+    max_tokens: Optional[int]
+
+
+def _merge_routes(base: Dict[str, Dict[str, Any]], overrides: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Overlay per-stage overrides onto base routes, validating stage and field names"""
+    merged = {stage: dict(route) for stage, route in base.items()}
+    for stage, route in overrides.items():
+        if stage not in merged:
+            raise ValueError(f"Unknown LLM stage '{stage}'. Valid stages: {', '.join(merged)}")
+        if not isinstance(route, dict):
+            raise ValueError(f"Route for stage '{stage}' must be an object")
+        unknown = set(route) - set(ROUTE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown route fields for '{stage}': {', '.join(sorted(unknown))}")
+        merged[stage].update(route)
+    return merged
+
+
+def _load_routes() -> Dict[str, Dict[str, Any]]:
+    """Default routes overlaid with the LLM_ROUTES environment variable (JSON)"""
+    raw = os.getenv("LLM_ROUTES", "").strip()
+    if not raw:
+        return DEFAULT_LLM_ROUTES
+    try:
+        return _merge_routes(DEFAULT_LLM_ROUTES, json.loads(raw))
+    except ValueError as e:
+        logger.error(f"Ignoring invalid LLM_ROUTES: {e}")
+        return DEFAULT_LLM_ROUTES
+
+
+LLM_ROUTES = _load_routes()
+
+
+def parse_route_overrides(raw: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse and validate per-request route overrides
+
+    Args:
+        raw: JSON object such as '{"parse": {"model": "gpt-4o-mini"}}', or None
+
+    Returns:
+        Overrides keyed by stage (empty if raw is empty)
+
+    Raises:
+        ValueError: If the JSON is invalid or names unknown stages or fields
+    """
+    if not raw or not raw.strip():
+        return {}
+    overrides = json.loads(raw)
+    if not isinstance(overrides, dict):
+        raise ValueError("Route overrides must be a JSON object keyed by stage")
+    _merge_routes(LLM_ROUTES, overrides)
+    return overrides
+
+
+def resolve_route(stage: str, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> StageRoute:
+    """
+    Return the model settings for a stage
+
+    Args:
+        stage: Stage name (STAGE_* constant)
+        overrides: Optional per-request overrides keyed by stage
+
+    Returns:
+        StageRoute for the stage
+    """
+    route = dict(LLM_ROUTES[stage])
+    if overrides and stage in overrides:
+        route.update(overrides[stage])
+    max_tokens = route.get("max_tokens")
+    return StageRoute(
+        str(route["model"]),
+        float(route.get("temperature", 0.1)),
+        int(max_tokens) if max_tokens else None
+    )
+
+
+def get_stage_model(
+    stage: str,
+    openai_api_key: Optional[str] = None,
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+    max_tokens: Optional[int] = None
+) -> ChatOpenAI:
+    """
+    Return the shared chat model routed to a stage
+
+    Args:
+        stage: Stage name (STAGE_* constant)
+        openai_api_key: API key (defaults to OPENAI_API_KEY)
+        overrides: Optional per-request overrides keyed by stage
+        max_tokens: Replaces the route's output cap if given
+
+    Returns:
+        Shared ChatOpenAI instance
+    """
+    route = resolve_route(stage, overrides)
+    return get_chat_model(
+        route.model, route.temperature, openai_api_key,
+        max_tokens=max_tokens or route.max_tokens,
+        max_retries=0 if stage in POLICY_STAGES else None
+    )
+
+
+class CallPolicy(NamedTuple):
+    """Deadline, retry and hedging settings for one LLM call"""
+    deadline: float
+    attempt_timeout: float
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+    hedge: bool
+
+
+def default_call_policy(max_tokens: Optional[int] = None) -> CallPolicy:
+    """
+    Call policy from the LLM_* environment settings, scaled to the call's output cap
+
+    Args:
+        max_tokens: The call's completion token limit (None for LLM_DEFAULT_OUTPUT_TOKENS)
+
+    Returns:
+        CallPolicy whose attempt timeout covers generating max_tokens and whose
+        deadline leaves LLM_RETRY_HEADROOM_SECONDS for retries
+    """
+    output_tokens = max_tokens or LLM_DEFAULT_OUTPUT_TOKENS
+    attempt_timeout = LLM_ATTEMPT_BASE_SECONDS + output_tokens / LLM_MIN_OUTPUT_TOKENS_PER_SECOND
+    return CallPolicy(
+        attempt_timeout + LLM_RETRY_HEADROOM_SECONDS, attempt_timeout, LLM_MAX_RETRIES,
+        LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS, LLM_HEDGE_ENABLED
+    )
+
+
+class LLMCallTimeout(asyncio.TimeoutError):
+    """An LLM call did not finish within its deadline"""
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is an HTTP 429 / rate-limit error"""
+    return _status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether an LLM error is transient: timeouts, connection errors, 408/409/429 and 5xx"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in ("RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After hint from a rate-limit error, if the provider sent one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, error: Optional[Exception] = None) -> float:
+    """
+    Jittered exponential backoff before retry number attempt + 1
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        base: Delay for the first retry
+        maximum: Upper bound on the delay
+        error: The failure, whose Retry-After hint wins if present
+
+    Returns:
+        Seconds to wait
+    """
+    hint = retry_after_seconds(error) if error is not None else None
+    if hint is not None:
+        return hint
+    delay = min(maximum, base * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+
+class LLMMetrics:
+    """Process-wide per-stage call, latency and token counters"""
+
+    def __init__(self, latency_window: int = LLM_LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._latency_window = latency_window
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def _entry(self, stage: str) -> Dict[str, Any]:
+        return self._stages.setdefault(stage, {
+            "calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0, "degraded": 0, "models": {}
+        })
+
+    def record(
+        self,
+        stage: str,
+        model: str,
+        seconds: float,
+        usage: Optional[Dict[str, int]] = None,
+        error: bool = False
+    ) -> None:
+        """Add one LLM call to the stage's counters"""
+        usage = usage or {}
+        with self._lock:
+            entry = self._entry(stage)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            for field in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                entry[field] += usage.get(field, 0)
+            entry["models"][model] = entry["models"].get(model, 0) + 1
+
+    def increment(self, stage: str, counter: str, amount: int = 1) -> None:
+        """Bump one of a stage's policy counters (retries, hedges, hedge_wins, timeouts, degraded)"""
+        with self._lock:
+            self._entry(stage)[counter] += amount
+
+    def observe_latency(self, stage: str, seconds: float) -> None:
+        """Add a successful attempt's latency to the stage's rolling window"""
+        with self._lock:
+            window = self._latencies.setdefault(stage, deque(maxlen=self._latency_window))
+            window.append(seconds)
+
+    def latency_quantile(self, stage: str, quantile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Latency quantile over the stage's recent successful attempts
+
+        Args:
+            stage: Stage name
+            quantile: Quantile in (0, 1], e.g. 0.95
+            min_samples: Return None until the window holds at least this many samples
+
+        Returns:
+            Seconds, or None if there are too few samples
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(quantile * len(samples)) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters with average and p95 latency per stage"""
+        with self._lock:
+            stages = {stage: dict(entry, models=dict(entry["models"])) for stage, entry in self._stages.items()}
+        return {
+            stage: {
+                **{k: v for k, v in entry.items() if k != "total_seconds"},
+                "avg_seconds": round(entry["total_seconds"] / entry["calls"], 3) if entry["calls"] else 0.0,
+                "p95_seconds": round(self.latency_quantile(stage, 0.95) or 0.0, 3),
+                "cached_token_ratio": (
+                    round(entry["cached_tokens"] / entry["prompt_tokens"], 3) if entry["prompt_tokens"] else 0.0
+                ),
+                "max_seconds": round(entry["max_seconds"], 3)
+            }
+            for stage, entry in stages.items()
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._latencies.clear()
+
+
+_llm_metrics = LLMMetrics()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Return the process-wide LLM metrics"""
+    return _llm_metrics
+
+
+def usage_from_openai(usage: Any) -> Dict[str, int]:
+    """Token usage from an OpenAI SDK completion.usage object"""
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+        "completion_tokens": getattr(usage, "completion_tokens", 0),
+        "cached_tokens": getattr(details, "cached_tokens", 0)
+    }
+    return {field: value if isinstance(value, int) else 0 for field, value in counts.items()}
+
+
+def stage_record(model: str, seconds: float, usage: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Per-call trace entry for response metadata
+
+    Args:
+        model: Model the call went to
+        seconds: Call latency
+        usage: Token counts (prompt_tokens, completion_tokens, cached_tokens)
+
+    Returns:
+        Dict with model, seconds, token counts and the uncached share of the prompt
+    """
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    cached_tokens = usage.get("cached_tokens", 0)
+    return {
+        "model": model,
+        "seconds": round(seconds, 3),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "uncached_tokens": max(0, prompt_tokens - cached_tokens),
+        "completion_tokens": usage.get("completion_tokens", 0)
+    }
+
+
+class TokenUsageCallback(AsyncCallbackHandler):
+    """Collects token usage from every LLM call made during one chain invocation"""
+
+    def __init__(self):
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    async def on_llm_end(self, response, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    self.usage["prompt_tokens"] += metadata.get("input_tokens", 0)
+                    self.usage["completion_tokens"] += metadata.get("output_tokens", 0)
+                    self.usage["cached_tokens"] += (metadata.get("input_token_details") or {}).get("cache_read", 0)
+
+
+async def _limited(
+    attempt: Callable[[], Awaitable[Tuple[Any, Dict[str, int]]]],
+    permit: LimiterPermit
+) -> Tuple[Any, Dict[str, int]]:
+    """Run one request under a limiter permit, reporting its outcome to the limiter"""
+    try:
+        result, usage = await attempt()
+    except BaseException as e:
+        permit.release(rate_limited=isinstance(e, Exception) and is_rate_limit_error(e))
+        raise
+    permit.release(tokens=usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0), success=True)
+    return result, usage
+
+
+async def _hedged_attempt(
+    stage: str,
+    attempt: Callable[[], Awaitable[Tuple[Any, Dict[str, int]]]],
+    timeout: float,
+    hedge_after: Optional[float],
+    limiter: AdaptiveLimiter,
+    permit: LimiterPermit,
+    estimated_tokens: int
+) -> Tuple[Any, Dict[str, int]]:
+    """
+    Run one attempt, firing a second identical request if the first is still
+    pending after hedge_after seconds; the first success wins and the other is cancelled
+
+    The primary request runs under an already acquired permit. A hedge is only
+    sent if the limiter has a free slot right away, so hedging never adds load
+    while the model is saturated.
+
+    Raises:
+        asyncio.TimeoutError: If no request succeeds within timeout
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    primary = asyncio.ensure_future(_limited(attempt, permit))
+    pending = {primary}
+    permits = [permit]
+    can_hedge = hedge_after is not None and hedge_after < timeout
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            elapsed = loop.time() - started
+            if elapsed >= timeout:
+                raise asyncio.TimeoutError(f"{stage} attempt exceeded {timeout:.1f}s")
+            wait = max(0.0, hedge_after - elapsed) if can_hedge else timeout - elapsed
+            done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    _llm_metrics.observe_latency(stage, loop.time() - started)
+                    if task is not primary:
+                        _llm_metrics.increment(stage, "hedge_wins")
+                    return task.result()
+                error = task.exception()
+
+            if not done and can_hedge:
+                # Still waiting at the stage's p95: send a backup request if there is capacity
+                can_hedge = False
+                hedge_permit = limiter.try_acquire(estimated_tokens)
+                if hedge_permit is None:
+                    logger.debug(f"Not hedging {stage} call: rate limiter is saturated")
+                    continue
+                permits.append(hedge_permit)
+                _llm_metrics.increment(stage, "hedges")
+                logger.info(f"Hedging {stage} call after {hedge_after:.2f}s")
+                pending.add(asyncio.ensure_future(_limited(attempt, hedge_permit)))
+
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        # A task cancelled before it started never released its permit
+        for unreleased in permits:
+            unreleased.release()
+
+
+async def call_llm(
+    stage: str,
+    model: str,
+    attempt: Callable[[], Awaitable[Tuple[Any, Dict[str, int]]]],
+    trace: Optional[Dict[str, Dict[str, Any]]] = None,
+    policy: Optional[CallPolicy] = None,
+    estimated_tokens: int = 0,
+    max_tokens: Optional[int] = None
+) -> Any:
+    """
+    Make one LLM call under the call policy, recording metrics and tracing
+
+    Every request first waits for a slot from the model's adaptive limiter
+    (concurrency and TPM/RPM budgets); the wait counts against the deadline.
+    Each attempt is bounded by the attempt timeout and the remaining deadline.
+    Transient failures (timeouts, 429, 5xx) are retried with jittered
+    exponential backoff. Once the stage has enough latency samples, an attempt
+    still pending at the stage's p95 latency is hedged with a second request.
+
+    Args:
+        stage: Stage name
+        model: Model the stage is routed to (for metrics)
+        attempt: Zero-argument coroutine factory returning (result, token usage);
+            called once per attempt and once more per hedge
+        trace: Optional per-request dict that receives this stage's record
+        policy: Call policy (defaults to default_call_policy(max_tokens))
+        estimated_tokens: Expected tokens per request, charged to the TPM budget
+            until the actual usage is known
+        max_tokens: The call's completion token limit, which sizes the default timeouts
+
+    Returns:
+        The successful attempt's result
+
+    Raises:
+        LLMCallTimeout: If the deadline passes before any attempt succeeds
+        Exception: The last error if it is not retryable or retries are exhausted
+    """
+    policy = policy or default_call_policy(max_tokens)
+    limiter = get_rate_limiter(model)
+    started = time.perf_counter()
+    usage: Dict[str, int] = {}
+    error = True
+
+    try:
+        for attempt_number in range(policy.max_retries + 1):
+            remaining = policy.deadline - (time.perf_counter() - started)
+            hedge_after = (
+                _llm_metrics.latency_quantile(stage, LLM_HEDGE_QUANTILE, LLM_HEDGE_MIN_SAMPLES) if policy.hedge else None
+            )
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"{stage} call exceeded its {policy.deadline:.1f}s deadline")
+                permit = await asyncio.wait_for(limiter.acquire(estimated_tokens), remaining)
+                remaining = policy.deadline - (time.perf_counter() - started)
+                result, usage = await _hedged_attempt(
+                    stage, attempt, min(policy.attempt_timeout, remaining), hedge_after,
+                    limiter, permit, estimated_tokens
+                )
+                error = False
+                return result
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if timed_out:
+                    _llm_metrics.increment(stage, "timeouts")
+
+                delay = backoff_delay(attempt_number, policy.backoff_base, policy.backoff_max, e)
+                elapsed = time.perf_counter() - started
+                if (
+                    not is_retryable_error(e)
+                    or attempt_number == policy.max_retries
+                    or elapsed + delay >= policy.deadline
+                ):
+                    if timed_out:
+                        raise LLMCallTimeout(f"{stage} call timed out after {elapsed:.1f}s") from e
+                    raise
+
+                _llm_metrics.increment(stage, "retries")
+                logger.warning(
+                    f"{stage} call failed ({type(e).__name__}: {e}); retrying in {delay:.1f}s "
+                    f"(attempt {attempt_number + 1})"
+                )
+                await asyncio.sleep(delay)
+    finally:
+        seconds = time.perf_counter() - started
+        _llm_metrics.record(stage, model, seconds, usage, error=error)
+        if trace is not None:
+            trace[stage] = stage_record(model, seconds, usage)
+
+
+async def invoke_stage(
+    stage: str,
+    chain: Any,
+    inputs: Dict[str, Any],
+    model: str,
+    trace: Optional[Dict[str, Dict[str, Any]]] = None,
+    policy: Optional[CallPolicy] = None,
+    max_tokens: Optional[int] = None
+) -> Any:
+    """
+    Invoke a chain for a stage under the call policy, recording its latency and token usage
+
+    Args:
+        stage: Stage name
+        chain: LangChain runnable
+        inputs: Chain inputs
+        model: Model the stage is routed to (for metrics)
+        trace: Optional per-request dict that receives this stage's record
+        policy: Call policy (defaults to default_call_policy(max_tokens))
+        max_tokens: Completion token limit of the chain's model (sizes the timeouts)
+
+    Returns:
+        The chain output
+    """
+    async def attempt() -> Tuple[Any, Dict[str, int]]:
+        callback = TokenUsageCallback()
+        result = await chain.ainvoke(inputs, config={"callbacks": [callback]})
+        return result, callback.usage
+
+    # The TPM budget is charged for the prompt plus the completion the call may produce
+    estimated_tokens = sum(count_tokens(str(value), model) for value in inputs.values())
+    estimated_tokens += max_tokens or LLM_DEFAULT_OUTPUT_TOKENS
+    return await call_llm(stage, model, attempt, trace, policy, estimated_tokens, max_tokens=max_tokens)
+
+
+async def stream_stage(
+    stage: str,
+    chain: Any,
+    inputs: Dict[str, Any],
+    model: str,
+    trace: Optional[Dict[str, Dict[str, Any]]] = None,
+    policy: Optional[CallPolicy] = None,
+    max_tokens: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a chain's text output for a stage under the call policy
+
+    The stream holds one limiter permit from its first request to its last
+    chunk. The first chunk must arrive within the attempt timeout and the whole
+    stream within the deadline. Transient failures are retried with backoff
+    only until the first chunk is yielded; after that the caller has partial
+    output, so errors are raised. Streams are never hedged.
+
+    Args:
+        stage: Stage name
+        chain: LangChain runnable yielding message chunks
+        inputs: Chain inputs
+        model: Model the stage is routed to (for metrics)
+        trace: Optional per-request dict that receives this stage's record
+        policy: Call policy (defaults to default_call_policy(max_tokens))
+        max_tokens: Completion token limit of the chain's model (sizes the timeouts)
+
+    Yields:
+        Non-empty text chunks
+
+    Raises:
+        LLMCallTimeout: If the first chunk or the end of the stream is not reached in time
+        Exception: The last error if it is not retryable, retries are exhausted
+            or output was already yielded
+    """
+    policy = policy or default_call_policy(max_tokens)
+    limiter = get_rate_limiter(model)
+    estimated_tokens = sum(count_tokens(str(value), model) for value in inputs.values())
+    estimated_tokens += max_tokens or LLM_DEFAULT_OUTPUT_TOKENS
+    started = time.perf_counter()
+    usage: Dict[str, int] = {}
+    error = True
+
+    try:
+        for attempt_number in range(policy.max_retries + 1):
+            permit: Optional[LimiterPermit] = None
+            callback = TokenUsageCallback()
+            yielded = False
+            try:
+                remaining = policy.deadline - (time.perf_counter() - started)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"{stage} call exceeded its {policy.deadline:.1f}s deadline")
+                permit = await asyncio.wait_for(limiter.acquire(estimated_tokens), remaining)
+                attempt_started = time.perf_counter()
+                stream = chain.astream(inputs, config={"callbacks": [callback]})
+                try:
+                    while True:
+                        now = time.perf_counter()
+                        timeout = policy.deadline - (now - started)
+                        if not yielded:
+                            timeout = min(timeout, policy.attempt_timeout - (now - attempt_started))
+                        if timeout <= 0:
+                            raise asyncio.TimeoutError(f"{stage} stream exceeded its time limit")
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        content = getattr(chunk, "content", chunk)
+                        if content:
+                            yielded = True
+                            yield content
+                finally:
+                    await stream.aclose()
+
+                tokens = callback.usage.get("prompt_tokens", 0) + callback.usage.get("completion_tokens", 0)
+                permit.release(tokens=tokens, success=True)
+                error = False
+                return
+            except Exception as e:
+                if permit is not None:
+                    permit.release(rate_limited=is_rate_limit_error(e))
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if timed_out:
+                    _llm_metrics.increment(stage, "timeouts")
+
+                delay = backoff_delay(attempt_number, policy.backoff_base, policy.backoff_max, e)
+                elapsed = time.perf_counter() - started
+                if (
+                    yielded
+                    or not is_retryable_error(e)
+                    or attempt_number == policy.max_retries
+                    or elapsed + delay >= policy.deadline
+                ):
+                    if timed_out:
+                        raise LLMCallTimeout(f"{stage} stream timed out after {elapsed:.1f}s") from e
+                    raise
+
+                _llm_metrics.increment(stage, "retries")
+                logger.warning(
+                    f"{stage} stream failed ({type(e).__name__}: {e}); retrying in {delay:.1f}s "
+                    f"(attempt {attempt_number + 1})"
+                )
+                await asyncio.sleep(delay)
+            finally:
+                usage = callback.usage
+                # The client may disconnect mid-stream; release is idempotent
+                if permit is not None:
+                    permit.release()
+    finally:
+        seconds = time.perf_counter() - started
+        _llm_metrics.record(stage, model, seconds, usage, error=error)
+        if trace is not None:
+            trace[stage] = stage_record(model, seconds, usage)
@@ -0,0 +1,455 @@
+"""
+Skill Taxonomy - Canonical skills, alias normalization and single-pass matching
+Compiles the skill taxonomy (app/data/skills.json) into a hash index of names
+and aliases plus an Aho-Corasick automaton, so any text is scanned for every
+skill in one linear pass and skills are compared as sets of integer IDs.
+"""
+
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SKILL_VOCABULARY_PATH = Path(__file__).resolve().parent / "data" / "skills.json"
+SKILL_VOCABULARY_PATH = os.getenv("SKILL_VOCABULARY_PATH", str(DEFAULT_SKILL_VOCABULARY_PATH))
+
+
+class SkillMatch(NamedTuple):
+    """One skill occurrence in a text"""
+    skill: str
+    term: str
+    start: int
+    end: int
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase a vocabulary term and collapse internal whitespace"""
+    return " ".join((term or "").lower().split())
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+_WHITESPACE_TO_SPACE = str.maketrans("\t\n\r\f\v", "     ")
+
+
+def _casefold_same_length(text: str) -> str:
+    """Lowercase text (and turn line breaks into spaces) without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    return lowered.translate(_WHITESPACE_TO_SPACE)
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over skill names and aliases
+
+    Args:
+        vocabulary: Mapping of canonical skill name to its aliases
+        case_sensitive: Names or aliases that are also common words ("Excel",
+            "Swift"); in free text they only match when written exactly so
+    """
+
+    def __init__(
+        self,
+        vocabulary: Optional[Dict[str, List[str]]] = None,
+        case_sensitive: Optional[Iterable[str]] = None
+    ):
+        self._canonical: Dict[str, str] = {}
+        for name, aliases in (vocabulary or {}).items():
+            for term in [name] + list(aliases):
+                key = normalize_term(term)
+                if key:
+                    self._canonical.setdefault(key, name)
+
+        # Normalized term -> the exact spellings that count as a mention
+        self._exact: Dict[str, Set[str]] = {}
+        for term in case_sensitive or []:
+            self._exact.setdefault(normalize_term(term), set()).add(" ".join(term.split()))
+
+        # Trie transitions, failure links and the terms ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for term in self._canonical:
+            self._insert(term)
+        self._build_failure_links()
+
+    @classmethod
+    def load(cls, path: str = SKILL_VOCABULARY_PATH) -> "SkillMatcher":
+        """
+        Build a matcher from a vocabulary file, or an empty one if it is missing or invalid
+
+        Args:
+            path: Path to a JSON file of {"skills": [{"name": ..., "aliases": [...], "case_sensitive": [...]}]}
+
+        Returns:
+            SkillMatcher instance
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            vocabulary = {entry["name"]: entry.get("aliases", []) for entry in data.get("skills", [])}
+            case_sensitive = [term for entry in data.get("skills", []) for term in entry.get("case_sensitive", [])]
+        except FileNotFoundError:
+            logger.warning(f"Skill vocabulary not found: {path}")
+            return cls()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Could not load skill vocabulary {path}: {e}")
+            return cls()
+
+        matcher = cls(vocabulary, case_sensitive)
+        logger.info(f"Loaded skill vocabulary: {len(vocabulary)} skills, {len(matcher._canonical)} terms")
+        return matcher
+
+    def _insert(self, term: str) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(term)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Return the canonical skill name for a skill name or alias, or None"""
+        return self._canonical.get(normalize_term(term))
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """
+        Find skill mentions in a text
+
+        Only whole-word occurrences count ("node" does not match "nodes"), and
+        case-sensitive terms only in their exact case ("excel at" is not Excel).
+        Overlapping mentions resolve to the leftmost, then longest, term, so
+        "Vue.js" is one match rather than "vue" plus "js".
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Non-overlapping matches in text order
+        """
+        if not text or not self._canonical:
+            return []
+
+        lowered = _casefold_same_length(text)
+        candidates: List[Tuple[int, int, str]] = []
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for term in self._output[state]:
+                start, end = index - len(term) + 1, index + 1
+                if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(term[0]):
+                    continue
+                if end < len(lowered) and _is_word_char(lowered[end]) and _is_word_char(term[-1]):
+                    continue
+                if term in self._exact and " ".join(text[start:end].split()) not in self._exact[term]:
+                    continue
+                candidates.append((start, end, term))
+
+        matches = []
+        position = 0
+        for start, end, term in sorted(candidates, key=lambda c: (c[0], -c[1])):
+            if start >= position:
+                matches.append(SkillMatch(self._canonical[term], text[start:end], start, end))
+                position = end
+        return matches
+
+    def skills_in(self, texts: Iterable[str]) -> List[str]:
+        """
+        Canonical skills mentioned in one or more texts
+
+        Args:
+            texts: A text or an iterable of texts
+
+        Returns:
+            Unique canonical skill names in order of first mention
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        found: Dict[str, None] = {}
+        for text in texts:
+            for match in self.find(text):
+                found.setdefault(match.skill)
+        return list(found)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "skills": len(set(self._canonical.values())),
+            "terms": len(self._canonical),
+            "states": len(self._goto)
+        }
+
+
+class SkillTaxonomy:
+    """
+    Skill taxonomy compiled into lookup indexes
+
+    Each skill gets a dense integer ID (its position in the taxonomy), so
+    resume/JD comparisons are plain set operations on ints.
+
+    Args:
+        skills: Entries of {"id", "name", "category", "aliases", "case_sensitive"}
+        categories: Category ID -> {"name", "parent"}
+        version: Taxonomy version tag
+    """
+
+    def __init__(
+        self,
+        skills: Optional[List[Dict[str, Any]]] = None,
+        categories: Optional[Dict[str, Dict[str, Any]]] = None,
+        version: str = "empty"
+    ):
+        self.version = version
+        self.categories = categories or {}
+        self._skills: List[Dict[str, Any]] = []
+        self._by_term: Dict[str, int] = {}
+        self._by_name: Dict[str, int] = {}
+
+        for entry in skills or []:
+            skill_id = len(self._skills)
+            self._skills.append(entry)
+            self._by_name[entry["name"]] = skill_id
+            for term in [entry["name"], entry.get("id", "")] + list(entry.get("aliases", [])):
+                key = normalize_term(term)
+                if key:
+                    self._by_term.setdefault(key, skill_id)
+
+        self.matcher = SkillMatcher(
+            {entry["name"]: list(entry.get("aliases", [])) for entry in self._skills},
+            [term for entry in self._skills for term in entry.get("case_sensitive", [])]
+        )
+
+    @classmethod
+    def load(cls, path: str = SKILL_VOCABULARY_PATH) -> "SkillTaxonomy":
+        """
+        Compile a taxonomy file, or an empty taxonomy if it is missing or invalid
+
+        Args:
+            path: Path to the taxonomy JSON file
+
+        Returns:
+            SkillTaxonomy instance
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            taxonomy = cls(data.get("skills", []), data.get("categories", {}), str(data.get("version", "unknown")))
+        except FileNotFoundError:
+            logger.warning(f"Skill taxonomy not found: {path}")
+            return cls()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Could not load skill taxonomy {path}: {e}")
+            return cls()
+
+        logger.info(
+            f"Compiled skill taxonomy {taxonomy.version}: {len(taxonomy._skills)} skills, "
+            f"{len(taxonomy._by_term)} terms, {len(taxonomy.categories)} categories"
+        )
+        return taxonomy
+
+    def lookup(self, term: str) -> Optional[int]:
+        """Return the ID of a skill given its exact name, slug or alias (any case)"""
+        return self._by_term.get(normalize_term(term))
+
+    def ids_in_text(self, text: str) -> Set[int]:
+        """IDs of every skill mentioned anywhere in a text"""
+        return {self._by_name[match.skill] for match in self.matcher.find(text)}
+
+    def normalize(self, skills: Iterable[str]) -> Set[int]:
+        """
+        Map free-form skill strings onto taxonomy IDs
+
+        Each string is looked up exactly first ("JS"), then scanned for
+        mentions ("Python 3 / Django"). Unknown skills are dropped.
+
+        Args:
+            skills: Skill strings, e.g. StructuredResume.skills or experience technologies
+
+        Returns:
+            Set of skill IDs
+        """
+        ids: Set[int] = set()
+        for skill in skills:
+            skill_id = self.lookup(skill)
+            if skill_id is not None:
+                ids.add(skill_id)
+            else:
+                ids |= self.ids_in_text(skill)
+        return ids
+
+    def resume_skill_ids(self, resume_data: Dict[str, Any]) -> Set[int]:
+        """
+        Skill IDs from a structured resume (StructuredResume.model_dump() shape)
+
+        Combines the skills list, experience and project technologies, and
+        skills mentioned in experience descriptions.
+        """
+        experience = resume_data.get("experience") or []
+        projects = resume_data.get("projects") or []
+
+        listed = list(resume_data.get("skills") or [])
+        for item in experience + projects:
+            listed.extend(item.get("technologies") or [])
+
+        ids = self.normalize(listed)
+        for exp in experience:
+            ids |= self.ids_in_text(exp.get("description_summary") or "")
+        return ids
+
+    def name(self, skill_id: int) -> str:
+        return self._skills[skill_id]["name"]
+
+    def names(self, ids: Iterable[int]) -> List[str]:
+        """Canonical names for a set of IDs, in taxonomy order"""
+        return [self._skills[skill_id]["name"] for skill_id in sorted(ids)]
+
+    def category_path(self, skill_id: int) -> List[str]:
+        """Category IDs from the skill's category up to the root"""
+        path = []
+        category = self._skills[skill_id].get("category")
+        while category and category not in path:
+            path.append(category)
+            category = self.categories.get(category, {}).get("parent")
+        return path
+
+    def dedupe(self, skills: Iterable[str]) -> List[str]:
+        """
+        Collapse aliases of the same skill, keeping unknown skills as written
+
+        Args:
+            skills: Skill strings
+
+        Returns:
+            Canonical names for known skills plus unknown skills (case-insensitively
+            unique), in input order
+        """
+        seen_ids: Set[int] = set()
+        seen_unknown: Set[str] = set()
+        result = []
+        for skill in skills:
+            skill_id = self.lookup(skill)
+            if skill_id is not None:
+                if skill_id not in seen_ids:
+                    seen_ids.add(skill_id)
+                    result.append(self.name(skill_id))
+            elif skill and normalize_term(skill) not in seen_unknown:
+                seen_unknown.add(normalize_term(skill))
+                result.append(skill)
+        return result
+
+    def gap(self, candidate: Set[int], required: Set[int]) -> Dict[str, Any]:
+        """
+        Compare a candidate's skills with a job's required skills
+
+        Args:
+            candidate: Skill IDs found in the resume
+            required: Skill IDs found in the job description
+
+        Returns:
+            Dict with matched, missing and additional skill names, coverage
+            (0-100) and missing skills grouped by top-level category
+        """
+        missing = required - candidate
+        missing_by_category: Dict[str, List[str]] = {}
+        for skill_id in sorted(missing):
+            path = self.category_path(skill_id)
+            root = path[-1] if path else "other"
+            missing_by_category.setdefault(self.categories.get(root, {}).get("name", root), []).append(
+                self.name(skill_id)
+            )
+
+        return {
+            "matched": self.names(candidate & required),
+            "missing": self.names(missing),
+            "additional": self.names(candidate - required),
+            "coverage": round(100 * len(candidate & required) / len(required), 2) if required else 0.0,
+            "missing_by_category": missing_by_category
+        }
+
+    def reconcile_keywords(
+        self,
+        matched_keywords: List[str],
+        missing_keywords: List[str],
+        resume_data: Dict[str, Any],
+        job_description: str
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Decide matched/missing status of known skills locally
+
+        Skills the taxonomy knows are compared as skill IDs between the resume
+        and the JD, so aliases collapse and the result is the same on every
+        call. Keywords outside the taxonomy keep the LLM's classification.
+
+        Args:
+            matched_keywords: Matched keywords reported by the LLM
+            missing_keywords: Missing keywords reported by the LLM
+            resume_data: Structured resume (StructuredResume.model_dump() shape)
+            job_description: Job description text
+
+        Returns:
+            Tuple of (matched keywords, missing keywords)
+        """
+        required = self.ids_in_text(job_description)
+        gap = self.gap(self.resume_skill_ids(resume_data), required)
+
+        def undecided(keywords: List[str]) -> List[str]:
+            # Keep keywords the taxonomy cannot classify against this JD
+            return [k for k in keywords if self.lookup(k) not in required]
+
+        matched = self.dedupe(gap["matched"] + undecided(matched_keywords))
+        matched_ids = self.normalize(matched)
+        missing = [
+            k for k in self.dedupe(gap["missing"] + undecided(missing_keywords))
+            if self.lookup(k) not in matched_ids
+        ]
+        return matched, missing
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "categories": len(self.categories), **self.matcher.stats()}
+
+
+_skill_taxonomy: Optional[SkillTaxonomy] = None
+_skill_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Return the process-wide skill taxonomy, compiling it on first use"""
+    global _skill_taxonomy
+
+    with _skill_taxonomy_lock:
+        if _skill_taxonomy is None:
+            _skill_taxonomy = SkillTaxonomy.load(SKILL_VOCABULARY_PATH)
+        return _skill_taxonomy
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Return the process-wide skill matcher (the taxonomy's compiled automaton)"""
+    return get_skill_taxonomy().matcher
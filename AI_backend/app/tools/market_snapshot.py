@@ -0,0 +1,185 @@
+"""
+Market Snapshot - Offline, versioned market intelligence index
+Loads a local dataset of job title skills, company tech stacks and market
+trend summaries into memory so research lookups need no network access.
+The dataset is rebuilt offline from web searches with build_market_snapshot.py.
+"""
+
+from difflib import get_close_matches
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).resolve().parent.parent / "data" / "market_snapshot.json"
+MARKET_SNAPSHOT_PATH = os.getenv("MARKET_SNAPSHOT_PATH", str(DEFAULT_SNAPSHOT_PATH))
+SNAPSHOT_SCHEMA_VERSION = 1
+
+# Words that qualify a role without changing the skills it needs
+SENIORITY_WORDS = {
+    "senior", "sr", "junior", "jr", "principal", "staff", "lead", "associate",
+    "entry", "level", "mid", "i", "ii", "iii", "iv", "intern"
+}
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a job title and strip punctuation and repeated whitespace"""
+    title = re.sub(r"[^a-z0-9+#./ ]+", " ", (title or "").lower())
+    return re.sub(r"\s+", " ", title).strip()
+
+
+def strip_seniority(title: str) -> str:
+    """Drop seniority qualifiers from a normalized job title"""
+    return " ".join(word for word in title.split() if word.strip(".") not in SENIORITY_WORDS)
+
+
+def trend_key(job_title: str, location: Optional[str] = None) -> str:
+    """Key for a title/location trend entry ("" location means nationwide)"""
+    return f"{normalize_title(job_title)}|{normalize_title(location or '')}"
+
+
+class MarketSnapshot:
+    """In-memory index over a market snapshot dataset"""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data or {}
+        self.version = str(data.get("version", "empty"))
+        self.generated_at = data.get("generated_at")
+
+        self._titles: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        for title, entry in data.get("job_titles", {}).items():
+            canonical = normalize_title(title)
+            self._titles[canonical] = entry
+            self._aliases[canonical] = canonical
+            self._aliases.setdefault(strip_seniority(canonical), canonical)
+            for alias in entry.get("aliases", []):
+                self._aliases[normalize_title(alias)] = canonical
+
+        self._companies = {normalize_title(name): entry for name, entry in data.get("companies", {}).items()}
+        self._trends = {key.lower(): entry for key, entry in data.get("trends", {}).items()}
+
+    @classmethod
+    def load(cls, path: str = MARKET_SNAPSHOT_PATH) -> "MarketSnapshot":
+        """
+        Load a snapshot file, returning an empty index if it is missing or invalid
+
+        Args:
+            path: Path to the snapshot JSON file
+
+        Returns:
+            MarketSnapshot instance
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Market snapshot not found: {path}")
+            return cls()
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load market snapshot {path}: {e}")
+            return cls()
+
+        if data.get("schema_version", SNAPSHOT_SCHEMA_VERSION) != SNAPSHOT_SCHEMA_VERSION:
+            logger.error(f"Unsupported market snapshot schema {data.get('schema_version')} in {path}")
+            return cls()
+
+        snapshot = cls(data)
+        logger.info(
+            f"Loaded market snapshot {snapshot.version}: {len(snapshot._titles)} titles, "
+            f"{len(snapshot._companies)} companies, {len(snapshot._trends)} trend entries"
+        )
+        return snapshot
+
+    @property
+    def source(self) -> str:
+        return f"market-snapshot:{self.version}"
+
+    def resolve_title(self, job_title: str) -> Optional[str]:
+        """
+        Map a free-form job title onto a title in the snapshot
+
+        Tries the exact title, known aliases, the title without seniority
+        words, and finally a close fuzzy match.
+
+        Args:
+            job_title: Job title as entered by the user
+
+        Returns:
+            Canonical snapshot title, or None if nothing is close enough
+        """
+        title = normalize_title(job_title)
+        if not title:
+            return None
+
+        for candidate in (title, strip_seniority(title)):
+            if candidate in self._aliases:
+                return self._aliases[candidate]
+
+        matches = get_close_matches(strip_seniority(title), self._aliases.keys(), n=1, cutoff=0.8)
+        return self._aliases[matches[0]] if matches else None
+
+    def lookup_skills(self, job_title: str) -> Optional[List[str]]:
+        """Return the required skills for a job title, or None if unknown"""
+        canonical = self.resolve_title(job_title)
+        return list(self._titles[canonical].get("skills", [])) if canonical else None
+
+    def lookup_company(self, company: str) -> Optional[Dict[str, Any]]:
+        """Return company info in WebSearchTool.search_company_info shape, or None"""
+        entry = self._companies.get(normalize_title(company))
+        if entry is None:
+            return None
+        return {
+            "company_name": company,
+            "overview": entry.get("overview", "Company overview information not found."),
+            "culture": entry.get("culture", "Culture information not available."),
+            "technology": list(entry.get("technology", [])),
+            "sources": [self.source]
+        }
+
+    def lookup_trends(self, job_title: str, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return market trends in WebSearchTool.search_job_market_trends shape, or None
+
+        Falls back from the title/location entry to the title's nationwide entry.
+        """
+        canonical = self.resolve_title(job_title) or normalize_title(job_title)
+        entry = self._trends.get(trend_key(canonical, location)) or self._trends.get(trend_key(canonical))
+        if entry is None:
+            return None
+        return {
+            "job_title": job_title,
+            "location": location,
+            "salary_ranges": entry.get("salary_ranges", "Salary information not available."),
+            "in_demand_skills": list(entry.get("in_demand_skills", [])),
+            "market_trends": entry.get("market_trends", "Market trend information not available."),
+            "sources": [self.source]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "job_titles": len(self._titles),
+            "companies": len(self._companies),
+            "trends": len(self._trends)
+        }
+
+
+_snapshot: Optional[MarketSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_market_snapshot() -> MarketSnapshot:
+    """Return the process-wide market snapshot, loading it on first use"""
+    global _snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = MarketSnapshot.load(MARKET_SNAPSHOT_PATH)
+        return _snapshot
@@ -0,0 +1,185 @@
+"""
+Search Cache - Two-tier TTL cache for web research results
+Keeps recent results in memory and persists them to SQLite so repeat
+companies and job titles survive restarts. Entries past their TTL are still
+served (marked stale) for a grace period while the caller refreshes them.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SEARCH_KIND_COMPANY = "company"
+SEARCH_KIND_TRENDS = "trends"
+SEARCH_KIND_SKILLS = "skills"
+
+SEARCH_CACHE_TTLS = {
+    SEARCH_KIND_COMPANY: int(os.getenv("WEB_SEARCH_COMPANY_TTL_SECONDS", str(3 * 24 * 60 * 60))),
+    SEARCH_KIND_TRENDS: int(os.getenv("WEB_SEARCH_TRENDS_TTL_SECONDS", str(6 * 60 * 60))),
+    SEARCH_KIND_SKILLS: int(os.getenv("WEB_SEARCH_SKILLS_TTL_SECONDS", str(24 * 60 * 60)))
+}
+SEARCH_CACHE_MAX_STALE_SECONDS = int(os.getenv("WEB_SEARCH_MAX_STALE_SECONDS", str(7 * 24 * 60 * 60)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_PATH = os.getenv("WEB_SEARCH_CACHE_PATH", "web_search_cache.sqlite3")
+
+
+def normalize_search_key(kind: str, *parts: Optional[str]) -> str:
+    """
+    Build a cache key that ignores case and whitespace differences
+
+    Args:
+        kind: Query type (company, trends, skills)
+        parts: Query inputs such as company name, job title or location
+
+    Returns:
+        Normalized key, e.g. "trends|data engineer|berlin"
+    """
+    normalized = [re.sub(r"\s+", " ", part or "").strip().lower() for part in parts]
+    return "|".join([kind] + normalized)
+
+
+class SearchCache:
+    """In-memory LRU backed by an optional SQLite table, with stale-while-revalidate"""
+
+    def __init__(
+        self,
+        path: Optional[str] = SEARCH_CACHE_PATH,
+        ttls: Optional[Dict[str, int]] = None,
+        max_stale: int = SEARCH_CACHE_MAX_STALE_SECONDS,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.ttls = ttls or SEARCH_CACHE_TTLS
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, fresh_until REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache persistence disabled ({path}): {e}")
+                self._db = None
+
+    def _remember(self, key: str, fresh_until: float, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (fresh_until, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fresh_until, value FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _store(self, key: str, fresh_until: float, value: Any) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, fresh_until) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), fresh_until)
+            )
+            self._db.execute(
+                "DELETE FROM search_cache WHERE fresh_until < ?", (time.time() - self.max_stale,)
+            )
+            self._db.commit()
+
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Look up a cached search result
+
+        Args:
+            key: Key from normalize_search_key
+
+        Returns:
+            Tuple of (value, is_fresh), or None on a miss or if the entry is
+            older than the stale grace period
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self._db is not None:
+            try:
+                entry = await asyncio.to_thread(self._load, key)
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Search cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                self._remember(key, *entry)
+
+        now = time.time()
+        if entry is None or entry[0] + self.max_stale < now:
+            self.misses += 1
+            return None
+
+        fresh_until, value = entry
+        if fresh_until >= now:
+            self.hits += 1
+            return value, True
+
+        self.stale_hits += 1
+        return value, False
+
+    async def set(self, kind: str, key: str, value: Any) -> None:
+        """Store a search result using the TTL configured for its query type"""
+        fresh_until = time.time() + self.ttls.get(kind, SEARCH_CACHE_TTLS[SEARCH_KIND_TRENDS])
+        self._remember(key, fresh_until, value)
+
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._store, key, fresh_until, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for monitoring"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Return the process-wide search cache
+
+    WEB_SEARCH_CACHE_PATH sets the SQLite file; set it to an empty string to
+    keep the cache in memory only.
+    """
+    global _search_cache
+
+    if _search_cache is None:
+        _search_cache = SearchCache()
+
+    return _search_cache
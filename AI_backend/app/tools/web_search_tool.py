@@ -3,21 +3,221 @@ Web Search Tool - External research capabilities for agents
 Provides web search functionality to gather additional context and information.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
 from typing import List, Dict, Any, Optional
 import asyncio
 import logging
+import os
 from urllib.parse import urlparse
 import re
 
+from ..skills import get_skill_matcher
+from .market_snapshot import MarketSnapshot, get_market_snapshot
+from .search_cache import (
+    SEARCH_KIND_COMPANY,
+    SEARCH_KIND_SKILLS,
+    SEARCH_KIND_TRENDS,
+    SearchCache,
+    get_search_cache,
+    normalize_search_key
+)
+
 logger = logging.getLogger(__name__)
 
+WEB_SEARCH_QUERY_TIMEOUT_SECONDS = float(os.getenv("WEB_SEARCH_QUERY_TIMEOUT_SECONDS", "8"))
+WEB_SEARCH_DEADLINE_SECONDS = float(os.getenv("WEB_SEARCH_DEADLINE_SECONDS", "15"))
+WEB_SEARCH_THREADS = int(os.getenv("WEB_SEARCH_THREADS", "8"))
+MARKET_SNAPSHOT_LIVE_FALLBACK = os.getenv("MARKET_SNAPSHOT_LIVE_FALLBACK", "true").lower() == "true"
+
+# DDGS is blocking; searches run here so they never stall the event loop.
+# A dedicated pool keeps hung searches from starving asyncio's default executor.
+_search_executor = ThreadPoolExecutor(max_workers=WEB_SEARCH_THREADS, thread_name_prefix="web-search")
+
+
 class WebSearchTool:
     """Tool for performing web searches to gather context"""
 
-    def __init__(self, max_results: int = 5):
+    def __init__(
+        self,
+        max_results: int = 5,
+        query_timeout: float = WEB_SEARCH_QUERY_TIMEOUT_SECONDS,
+        deadline: float = WEB_SEARCH_DEADLINE_SECONDS,
+        cache: Optional[SearchCache] = None,
+        snapshot: Optional[MarketSnapshot] = None,
+        live_fallback: bool = MARKET_SNAPSHOT_LIVE_FALLBACK
+    ):
         self.max_results = max_results
-        self.ddgs = DDGS()
+        self.query_timeout = query_timeout
+        self.deadline = deadline
+        self.cache = cache if cache is not None else get_search_cache()
+        self.snapshot = snapshot if snapshot is not None else get_market_snapshot()
+        self.live_fallback = live_fallback
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def _text_search(self, query: str, max_results: int) -> List[Dict]:
+        """Blocking DuckDuckGo text search (runs on the search thread pool)"""
+        # DDGS holds a per-instance HTTP session, so each thread gets its own
+        return list(DDGS().text(query, max_results=max_results))
+
+    async def _search(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Run one search off the event loop, bounded by the per-query timeout
+
+        Returns:
+            Search results, or an empty list if the query failed or timed out
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(_search_executor, self._text_search, query, max_results),
+                self.query_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Search timed out after {self.query_timeout}s for query '{query}'")
+        except Exception as e:
+            logger.warning(f"Search failed for query '{query}': {e}")
+        return []
+
+    async def _search_all(self, queries: List[str], max_results: int) -> List[Dict]:
+        """Run several queries concurrently and concatenate their results in query order"""
+        result_lists = await asyncio.gather(*[self._search(query, max_results) for query in queries])
+        return [result for results in result_lists for result in results]
+
+    async def _cached_search(
+        self,
+        kind: str,
+        key_parts: tuple,
+        queries: List[str],
+        max_results: int
+    ) -> List[Dict]:
+        """
+        Return search results from the cache, searching only on a miss
+
+        Stale entries are returned immediately and refreshed in the
+        background. Empty result sets (all queries failed) are never cached.
+
+        Args:
+            kind: Query type, which selects the cache TTL
+            key_parts: Inputs identifying the research (company, title, ...)
+            queries: Search queries to run on a miss
+            max_results: Results per query
+
+        Returns:
+            Concatenated search results
+        """
+        key = normalize_search_key(kind, *key_parts)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            results, fresh = cached
+            if not fresh and key not in self._refreshing:
+                task = asyncio.create_task(self._refresh(kind, key, queries, max_results))
+                self._refreshing[key] = task
+                task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            return results
+
+        results = await self._search_all(queries, max_results)
+        if results:
+            await self.cache.set(kind, key, results)
+        return results
+
+    async def _refresh(self, kind: str, key: str, queries: List[str], max_results: int) -> None:
+        """Re-run a stale search and update the cache"""
+        results = await self._search_all(queries, max_results)
+        if results:
+            await self.cache.set(kind, key, results)
+            logger.info(f"Refreshed stale search cache entry {key}")
+
+    async def gather_market_intelligence(
+        self,
+        job_title: str,
+        company: Optional[str] = None,
+        location: Optional[str] = None,
+        industry: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Answer market research from the offline snapshot, searching only for gaps
+
+        Anything the snapshot cannot answer is searched concurrently under one
+        deadline (unless live_fallback is off). Searches still running when
+        the deadline passes are cancelled and replaced with the same fallback
+        data their methods return on error.
+
+        Args:
+            job_title: Job title to research
+            company: Optional company to research
+            location: Optional location for localized market data
+            industry: Optional industry context for skill requirements
+
+        Returns:
+            Dict with company_info (if company given), market_trends and required_skills
+        """
+        market_intelligence = {}
+        if company:
+            company_info = self.snapshot.lookup_company(company)
+            if company_info is not None:
+                market_intelligence['company_info'] = company_info
+        market_trends = self.snapshot.lookup_trends(job_title, location)
+        if market_trends is not None:
+            market_intelligence['market_trends'] = market_trends
+        skills = self.snapshot.lookup_skills(job_title)
+        if skills is not None:
+            market_intelligence['required_skills'] = list(dict.fromkeys(skills + self._infer_base_skills(job_title)))
+
+        searches = {}
+        fallbacks = {}
+        if company and 'company_info' not in market_intelligence:
+            searches['company_info'] = lambda: self.search_company_info(company)
+            fallbacks['company_info'] = lambda: self._company_info_unavailable(company)
+        if 'market_trends' not in market_intelligence:
+            searches['market_trends'] = lambda: self.search_job_market_trends(job_title, location)
+            fallbacks['market_trends'] = lambda: self._market_trends_unavailable(job_title, location)
+        if 'required_skills' not in market_intelligence:
+            searches['required_skills'] = lambda: self.search_skill_requirements(job_title, industry)
+            fallbacks['required_skills'] = lambda: self._infer_base_skills(job_title)
+
+        if not searches:
+            return market_intelligence
+        if not self.live_fallback:
+            for name, fallback in fallbacks.items():
+                market_intelligence[name] = fallback()
+            return market_intelligence
+
+        tasks = {name: asyncio.create_task(search()) for name, search in searches.items()}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Let cancelled searches unwind before returning so none outlive the call
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for name, task in tasks.items():
+            if task in done and task.exception() is None:
+                market_intelligence[name] = task.result()
+            else:
+                logger.warning(f"Market research '{name}' missed the {self.deadline}s deadline; using fallback")
+                market_intelligence[name] = fallbacks[name]()
+
+        return market_intelligence
+
+    def _company_info_unavailable(self, company_name: str) -> Dict[str, Any]:
+        return {
+            "company_name": company_name,
+            "overview": "Company information unavailable",
+            "culture": "Culture information unavailable",
+            "technology": "Technology information unavailable",
+            "sources": []
+        }
+
+    def _market_trends_unavailable(self, job_title: str, location: Optional[str]) -> Dict[str, Any]:
+        return {
+            "job_title": job_title,
+            "location": location,
+            "salary_ranges": "Information unavailable",
+            "in_demand_skills": [],
+            "market_trends": "Market trend information unavailable",
+            "sources": []
+        }
 
     async def search_company_info(self, company_name: str) -> Dict[str, Any]:
         """
@@ -38,14 +238,9 @@ class WebSearchTool:
                 f"{company_name} technology stack site:stackshare.io OR site:tech stack"
             ]
 
-            all_results = []
-            for query in queries:
-                try:
-                    results = list(self.ddgs.text(query, max_results=self.max_results // len(queries)))
-                    all_results.extend(results)
-                except Exception as e:
-                    logger.warning(f"Search failed for query '{query}': {e}")
-                    continue
+            all_results = await self._cached_search(
+                SEARCH_KIND_COMPANY, (company_name,), queries, self.max_results // len(queries)
+            )
 
             # Process and summarize results
             company_info = {
@@ -60,13 +255,7 @@ class WebSearchTool:
 
         except Exception as e:
             logger.error(f"Error searching company info: {e}")
-            return {
-                "company_name": company_name,
-                "overview": "Company information unavailable",
-                "culture": "Culture information unavailable",
-                "technology": "Technology information unavailable",
-                "sources": []
-            }
+            return self._company_info_unavailable(company_name)
 
     async def search_job_market_trends(self, job_title: str, location: str = None) -> Dict[str, Any]:
         """
@@ -89,14 +278,9 @@ class WebSearchTool:
                 f"{job_title} job market trends{location_query} 2024"
             ]
 
-            all_results = []
-            for query in queries:
-                try:
-                    results = list(self.ddgs.text(query, max_results=self.max_results // len(queries)))
-                    all_results.extend(results)
-                except Exception as e:
-                    logger.warning(f"Search failed for query '{query}': {e}")
-                    continue
+            all_results = await self._cached_search(
+                SEARCH_KIND_TRENDS, (job_title, location), queries, self.max_results // len(queries)
+            )
 
             # Process results
             market_data = {
@@ -112,14 +296,7 @@ class WebSearchTool:
 
         except Exception as e:
             logger.error(f"Error searching job market trends: {e}")
-            return {
-                "job_title": job_title,
-                "location": location,
-                "salary_ranges": "Information unavailable",
-                "in_demand_skills": [],
-                "market_trends": "Market trend information unavailable",
-                "sources": []
-            }
+            return self._market_trends_unavailable(job_title, location)
 
     async def search_skill_requirements(self, job_title: str, industry: str = None) -> List[str]:
         """
@@ -138,7 +315,9 @@ class WebSearchTool:
             industry_query = f" {industry}" if industry else ""
             query = f"{job_title}{industry_query} required skills site:linkedin.com OR site:indeed.com OR site:job descriptions"
 
-            results = list(self.ddgs.text(query, max_results=self.max_results))
+            results = await self._cached_search(
+                SEARCH_KIND_SKILLS, (job_title, industry), [query], self.max_results
+            )
 
             skills = self._extract_skills_from_results(results)
 
@@ -175,20 +354,8 @@ class WebSearchTool:
 
     def _extract_tech_stack(self, results: List[Dict]) -> List[str]:
         """Extract technology stack information"""
-        tech_stack = []
-        tech_keywords = [
-            'python', 'java', 'javascript', 'react', 'node.js', 'aws', 'azure', 'gcp',
-            'docker', 'kubernetes', 'sql', 'mongodb', 'postgresql', 'redis', 'graphql',
-            'typescript', 'vue', 'angular', 'html', 'css', 'sass', 'webpack', 'jenkins'
-        ]
-
-        for result in results:
-            body = result.get('body', '').lower()
-            for tech in tech_keywords:
-                if tech in body and tech not in tech_stack:
-                    tech_stack.append(tech.title())
-
-        return tech_stack[:10]  # Limit to top 10
+        skills = get_skill_matcher().skills_in(result.get('body', '') for result in results)
+        return skills[:10]  # Limit to top 10
 
     def _extract_salary_info(self, results: List[Dict]) -> str:
         """Extract salary information from results"""
@@ -204,19 +371,7 @@ class WebSearchTool:
 
     def _extract_skills_demand(self, results: List[Dict]) -> List[str]:
         """Extract in-demand skills"""
-        skills = []
-        skill_keywords = [
-            'python', 'java', 'javascript', 'react', 'node', 'aws', 'docker', 'kubernetes',
-            'sql', 'mongodb', 'machine learning', 'ai', 'cloud', 'devops', 'agile', 'scrum'
-        ]
-
-        for result in results:
-            body = result.get('body', '').lower()
-            for skill in skill_keywords:
-                if skill in body and skill not in skills:
-                    skills.append(skill.title())
-
-        return skills[:8]
+        return get_skill_matcher().skills_in(result.get('body', '') for result in results)[:8]
 
     def _extract_trends(self, results: List[Dict]) -> str:
         """Extract market trend information"""
@@ -230,21 +385,7 @@ class WebSearchTool:
 
     def _extract_skills_from_results(self, results: List[Dict]) -> List[str]:
         """Extract skills from search results"""
-        skills = []
-        common_skills = [
-            'Python', 'Java', 'JavaScript', 'React', 'Node.js', 'AWS', 'Azure', 'Docker',
-            'Kubernetes', 'SQL', 'MongoDB', 'PostgreSQL', 'Git', 'Linux', 'REST APIs',
-            'GraphQL', 'TypeScript', 'Vue.js', 'Angular', 'HTML', 'CSS', 'Sass',
-            'Machine Learning', 'AI', 'Data Science', 'Cloud Computing', 'DevOps'
-        ]
-
-        for result in results:
-            body = result.get('body', '')
-            for skill in common_skills:
-                if skill.lower() in body.lower() and skill not in skills:
-                    skills.append(skill)
-
-        return skills
+        return get_skill_matcher().skills_in(result.get('body', '') for result in results)
 
     def _infer_base_skills(self, job_title: str) -> List[str]:
         """Infer basic skills based on job title"""
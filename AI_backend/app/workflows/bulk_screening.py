@@ -0,0 +1,383 @@
+"""
+Bulk Screening Workflow - Screens many resumes against a single job description
+Runs text extraction on a shared process pool and the LLM stages under bounded
+asyncio concurrency, streaming one result per resume. Retries and rate
+limiting are left to the shared LLM call policy and adaptive limiter.
+Optionally ranks all resumes locally with BM25 first and sends only the top
+candidates to the LLM.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+import zipfile
+
+from ..agents.resume_parser_agent import ResumeParserAgent
+from ..agents.resume_analyzer_agent import DEPTH_SCORES, ResumeAnalyzerAgent
+from ..analyzer import bm25_scores
+from ..parse import extract_text_from_file
+
+logger = logging.getLogger(__name__)
+
+BULK_SUPPORTED_EXTENSIONS = {'.pdf', '.docx'}
+MIN_RESUME_TEXT_LENGTH = 50
+# Zip extraction limits; the upload cap only bounds the compressed size
+BULK_MAX_RESUME_BYTES = int(os.getenv("BULK_MAX_RESUME_BYTES", str(10 * 1024 * 1024)))  # 10MB, as single uploads
+BULK_MAX_UNCOMPRESSED_BYTES = int(os.getenv("BULK_MAX_UNCOMPRESSED_BYTES", str(1024 * 1024 * 1024)))  # 1GB
+BULK_MAX_RESUMES = int(os.getenv("BULK_MAX_RESUMES", "2000"))
+_COPY_CHUNK_SIZE = 1024 * 1024
+# Text extraction processes shared by every bulk run (0 = CPU count)
+BULK_EXTRACTION_WORKERS = int(os.getenv("BULK_EXTRACTION_WORKERS", "0"))
+
+# One pool per process, created on first use: starting worker processes per
+# request is slow, and a `with` block around an async generator would block the
+# event loop in shutdown(wait=True) whenever a run ends or is abandoned.
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return the shared text extraction pool, creating it on first use
+
+    Args:
+        max_workers: Pool size if the pool is created by this call
+            (default BULK_EXTRACTION_WORKERS, else the CPU count)
+
+    Returns:
+        ProcessPoolExecutor shared by all bulk runs in this process
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(max_workers=max_workers or BULK_EXTRACTION_WORKERS or None)
+        return _extraction_pool
+
+
+def shutdown_extraction_pool(wait: bool = True) -> None:
+    """
+    Shut down the shared extraction pool, cancelling extractions not yet started
+
+    Blocks while wait is True; call it off the event loop (asyncio.to_thread).
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        pool, _extraction_pool = _extraction_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def collect_resume_files(source: str, extract_dir: Optional[str] = None) -> List[Path]:
+    """
+    Collect resume files from a directory or a zip archive
+
+    Args:
+        source: Path to a directory or a .zip file
+        extract_dir: Directory to unpack zip members into (required for zips)
+
+    Returns:
+        Sorted list of resume file paths
+    """
+    source_path = Path(source)
+
+    if source_path.is_dir():
+        return sorted(
+            p for p in source_path.rglob("*")
+            if p.is_file() and p.suffix.lower() in BULK_SUPPORTED_EXTENSIONS
+        )
+
+    if zipfile.is_zipfile(source_path):
+        if not extract_dir:
+            raise ValueError("extract_dir is required when source is a zip archive")
+        return extract_resume_archive(str(source_path), extract_dir)
+
+    raise ValueError(f"Source must be a directory or a zip archive: {source}")
+
+
+def extract_resume_archive(archive_path: str, extract_dir: str) -> List[Path]:
+    """
+    Unpack supported resume files from a zip archive
+
+    Member paths are flattened to their base name so that archive entries can
+    never be written outside extract_dir. Resume count, per-file size and total
+    uncompressed size are capped, and sizes are enforced on the bytes actually
+    written, since zip headers can understate them.
+
+    Args:
+        archive_path: Path to the zip file
+        extract_dir: Destination directory
+
+    Returns:
+        List of extracted resume file paths
+
+    Raises:
+        ValueError: If the archive exceeds one of the extraction limits
+    """
+    extracted = []
+    total_bytes = 0
+    os.makedirs(extract_dir, exist_ok=True)
+
+    with zipfile.ZipFile(archive_path) as archive:
+        for index, member in enumerate(archive.infolist()):
+            if member.is_dir():
+                continue
+
+            name = Path(member.filename).name
+            if not name or name.startswith('.') or Path(name).suffix.lower() not in BULK_SUPPORTED_EXTENSIONS:
+                continue
+
+            if len(extracted) >= BULK_MAX_RESUMES:
+                raise ValueError(f"Archive contains more than {BULK_MAX_RESUMES} resumes")
+            if member.file_size > BULK_MAX_RESUME_BYTES:
+                raise ValueError(f"{name} exceeds the {BULK_MAX_RESUME_BYTES} byte per-resume limit")
+            if total_bytes + member.file_size > BULK_MAX_UNCOMPRESSED_BYTES:
+                raise ValueError(f"Archive exceeds the {BULK_MAX_UNCOMPRESSED_BYTES} byte uncompressed limit")
+
+            target = Path(extract_dir) / f"{index:05d}_{name}"
+            limit = min(BULK_MAX_RESUME_BYTES, BULK_MAX_UNCOMPRESSED_BYTES - total_bytes)
+            with archive.open(member) as src, open(target, "wb") as dst:
+                written = _copy_limited(src, dst, limit)
+            if written > limit:
+                target.unlink()
+                raise ValueError(f"{name} expands beyond the archive's size limits")
+
+            total_bytes += written
+            extracted.append(target)
+
+    return extracted
+
+
+def _copy_limited(src: Any, dst: Any, limit: int) -> int:
+    """Copy src to dst in chunks, stopping once more than limit bytes were copied; returns bytes copied"""
+    written = 0
+    while written <= limit:
+        chunk = src.read(min(_COPY_CHUNK_SIZE, limit + 1 - written))
+        if not chunk:
+            break
+        dst.write(chunk)
+        written += len(chunk)
+    return written
+
+
+class BulkScreeningRunner:
+    """Screens a set of resume files against one job description"""
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        concurrency: int = 8,
+        extraction_workers: Optional[int] = None,
+        parser_agent: Optional[ResumeParserAgent] = None,
+        analyzer_agent: Optional[ResumeAnalyzerAgent] = None,
+        prefilter_top_k: Optional[int] = None,
+        analysis_depth: str = DEPTH_SCORES
+    ):
+        self.parser_agent = parser_agent or ResumeParserAgent(openai_api_key)
+        self.analyzer_agent = analyzer_agent or ResumeAnalyzerAgent(openai_api_key)
+        self.concurrency = concurrency
+        # Sizes the shared extraction pool if this runner is the first to use it
+        self.extraction_workers = extraction_workers
+        # Only the top k resumes by local BM25 score reach the LLM (None screens all)
+        self.prefilter_top_k = prefilter_top_k
+        # Ranking only needs scores, so bulk runs skip the written feedback by default
+        self.analysis_depth = analysis_depth
+
+    async def _extract_one(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        pool: ProcessPoolExecutor,
+        file_path: Path
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Extract one resume's text; returns (None, error result) if it is unreadable"""
+        timings = {}
+        result = {"file": file_path.name, "timings": timings}
+
+        try:
+            started = time.perf_counter()
+            resume_text = await loop.run_in_executor(pool, extract_text_from_file, str(file_path))
+            timings["extract"] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            logger.error(f"Text extraction failed for {file_path.name}: {e}")
+            result.update({"status": "error", "error": str(e)})
+            return None, result
+
+        if not resume_text or len(resume_text.strip()) < MIN_RESUME_TEXT_LENGTH:
+            result.update({"status": "error", "error": "Could not extract readable text from resume."})
+            return None, result
+
+        return resume_text, result
+
+    async def _prefilter(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        pool: ProcessPoolExecutor,
+        files: List[Path],
+        job_description: str
+    ) -> Tuple[Dict[Path, Tuple[str, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Extract every resume and keep the prefilter_top_k best by BM25 score
+
+        Returns:
+            Tuple of (extractions to send to the LLM keyed by path, finished
+            records for resumes that were filtered out or unreadable)
+        """
+        extractions = await asyncio.gather(*[self._extract_one(loop, pool, path) for path in files])
+
+        finished = []
+        readable = []
+        for path, (resume_text, result) in zip(files, extractions):
+            if resume_text is None:
+                finished.append(result)
+            else:
+                readable.append((path, resume_text, result))
+
+        started = time.perf_counter()
+        scores = bm25_scores(job_description, [resume_text for _, resume_text, _ in readable])
+        ranked = sorted(zip(scores, readable), key=lambda item: -item[0])
+        logger.info(
+            f"Local prefilter ranked {len(readable)} resumes in {time.perf_counter() - started:.3f}s; "
+            f"sending top {min(self.prefilter_top_k, len(readable))} to the LLM"
+        )
+
+        selected = {}
+        for rank, (score, (path, resume_text, result)) in enumerate(ranked, start=1):
+            result.update({"local_score": score, "local_rank": rank})
+            if rank <= self.prefilter_top_k:
+                selected[path] = (resume_text, result)
+            else:
+                result["status"] = "filtered"
+                finished.append(result)
+
+        return selected, finished
+
+    async def _screen_one(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        pool: ProcessPoolExecutor,
+        semaphore: asyncio.Semaphore,
+        file_path: Path,
+        job_description: str,
+        extracted: Optional[Tuple[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Extract (unless already extracted), parse and analyze a single resume"""
+        if extracted is not None:
+            resume_text, result = extracted
+        else:
+            resume_text, result = await self._extract_one(loop, pool, file_path)
+            if resume_text is None:
+                return result
+        timings = result["timings"]
+        llm_usage: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                # call_llm already retries transient errors (behind the model's
+                # adaptive limiter), so a failure here is final for this resume
+                structured_resume = await self.parser_agent.parse_resume(
+                    resume_text, raise_errors=True, trace=llm_usage
+                )
+                timings["parse"] = round(time.perf_counter() - started, 3)
+
+                started = time.perf_counter()
+                analysis = await self.analyzer_agent.analyze_resume_job_fit(
+                    structured_resume.model_dump(), job_description,
+                    raise_errors=True, trace=llm_usage, depth=self.analysis_depth
+                )
+                timings["analyze"] = round(time.perf_counter() - started, 3)
+
+            result.update({
+                "status": "ok",
+                "candidate_name": structured_resume.contact_info.name,
+                "overall_score": analysis.overall_score,
+                "analysis": analysis.model_dump(exclude={"structured_resume"}),
+                "llm_usage": llm_usage
+            })
+            return result
+
+        except Exception as e:
+            logger.error(f"Bulk screening failed for {file_path.name}: {e}")
+            result.update({"status": "error", "error": str(e)})
+            return result
+
+    async def run(self, files: List[Path], job_description: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Screen every file and yield results as they complete
+
+        Yields one record per resume followed by a final summary record with
+        aggregate per-stage timings and token usage (cached vs uncached prompt
+        tokens). With prefilter_top_k set, resumes ranked below the top k are
+        yielded first with status "filtered" and their local BM25 score.
+
+        Args:
+            files: Resume files to screen
+            job_description: Job description text
+
+        Yields:
+            Result dictionaries, suitable for JSONL output
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        stage_totals = {"extract": 0.0, "parse": 0.0, "analyze": 0.0}
+        counts = {"ok": 0, "error": 0, "filtered": 0}
+        token_totals = {"prompt_tokens": 0, "cached_tokens": 0, "uncached_tokens": 0, "completion_tokens": 0}
+
+        logger.info(f"Bulk screening {len(files)} resumes (concurrency={self.concurrency})")
+
+        def finish(result: Dict[str, Any], completed: int) -> Dict[str, Any]:
+            for stage, seconds in result["timings"].items():
+                stage_totals[stage] += seconds
+            counts[result["status"]] += 1
+            for call in result.get("llm_usage", {}).values():
+                for field in token_totals:
+                    token_totals[field] += call.get(field, 0)
+
+            result["type"] = "result"
+            result["progress"] = {"completed": completed, "total": len(files)}
+            if completed % 25 == 0 or completed == len(files):
+                logger.info(f"Bulk screening progress: {completed}/{len(files)}")
+            return result
+
+        pool = get_extraction_pool(self.extraction_workers)
+        completed = 0
+        if self.prefilter_top_k and len(files) > self.prefilter_top_k:
+            selected, finished = await self._prefilter(loop, pool, files, job_description)
+            for result in finished:
+                completed += 1
+                yield finish(result, completed)
+            tasks = [
+                asyncio.create_task(
+                    self._screen_one(loop, pool, semaphore, path, job_description, extracted)
+                )
+                for path, extracted in selected.items()
+            ]
+        else:
+            tasks = [
+                asyncio.create_task(self._screen_one(loop, pool, semaphore, path, job_description))
+                for path in files
+            ]
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                completed += 1
+                yield finish(await task, completed)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield {
+            "type": "summary",
+            "total": len(files),
+            "succeeded": counts["ok"],
+            "failed": counts["error"],
+            "filtered": counts["filtered"],
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "stage_seconds_total": {stage: round(total, 3) for stage, total in stage_totals.items()},
+            "tokens": token_totals
+        }
@@ -1,39 +1,223 @@
 """
 Resume Analysis Workflow - Orchestrates multiple AI agents for comprehensive resume analysis
-Uses CrewAI to coordinate parser, analyzer, and research agents.
+Uses CrewAI to coordinate parser, analyzer, and research agents. The direct
+(non-CrewAI) workflows run as stage graphs so independent stages overlap.
 """
 
-from crewai import Crew, Agent, Task, Process
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import json
 import logging
 import asyncio
+import os
+import threading
 
 from ..agents.resume_parser_agent import ResumeParserAgent
-from ..agents.resume_analyzer_agent import ResumeAnalyzerAgent
-from ..tools.web_search_tool import WebSearchTool
+from ..agents.resume_analyzer_agent import DEPTH_STANDARD, ResumeAnalyzerAgent, analysis_max_tokens
+from ..analyzer import analyze_resume_with_ai, map_single_pass_result
+from ..cache import InMemoryResultCache, build_resume_fingerprint, normalize_job_description
+from ..tools.web_search_tool import WEB_SEARCH_DEADLINE_SECONDS, WebSearchTool
+from ..routing import (
+    STAGE_CREW,
+    STAGE_PARSE,
+    STAGE_RECOMMENDATIONS,
+    STAGE_SINGLE_PASS,
+    default_call_policy,
+    get_stage_model,
+    resolve_route
+)
+from ..skills import get_skill_taxonomy
+from .stage_graph import Stage, StageGraph
 
 logger = logging.getLogger(__name__)
 
+# Optional imports with proper error handling
+try:
+    from crewai import Crew, Agent, Task, Process
+    CREWAI_AVAILABLE = True
+except ImportError:
+    Crew = Agent = Task = Process = None
+    CREWAI_AVAILABLE = False
+    logging.warning("crewai not installed. CrewAI orchestration disabled.")
+
+WORKFLOW_WARM_UP = os.getenv("WORKFLOW_WARM_UP", "false").lower() == "true"
+# LLM stages time out just after their call_llm deadline; call_llm owns retries
+WORKFLOW_LLM_STAGE_TIMEOUT_MARGIN_SECONDS = float(os.getenv("WORKFLOW_LLM_STAGE_TIMEOUT_MARGIN_SECONDS", "5"))
+WORKFLOW_STAGE_CACHE_MAX_ENTRIES = int(os.getenv("WORKFLOW_STAGE_CACHE_MAX_ENTRIES", "256"))
+ANALYSIS_STAGE_VERSION = "workflow-analyze-2"
+
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "2"))
+CREW_TIMEOUT_SECONDS = float(os.getenv("CREW_TIMEOUT_SECONDS", "300"))
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"
+
+# Crew.kickoff is blocking. Crews run on this bounded pool rather than on the
+# event loop (or the unbounded default executor that kickoff_async uses), so
+# at most CREW_MAX_WORKERS crews execute per process.
+_crew_executor = ThreadPoolExecutor(max_workers=CREW_MAX_WORKERS, thread_name_prefix="crew")
+
+
+def _llm_stage_timeout(max_tokens: Optional[int]) -> float:
+    """Timeout for a stage making one call_llm call: the call's deadline plus a margin"""
+    return default_call_policy(max_tokens).deadline + WORKFLOW_LLM_STAGE_TIMEOUT_MARGIN_SECONDS
+
+
+class CrewCancelledError(Exception):
+    """Raised inside a crew's worker thread to stop a timed-out or cancelled run"""
+
+
+def _cancellation_step_callback(cancel_event: threading.Event):
+    """Build a step callback that aborts the crew at its next step once cancel_event is set"""
+    def step_callback(step_output):
+        if cancel_event.is_set():
+            raise CrewCancelledError("Crew run cancelled")
+    return step_callback
+
+
 class ResumeAnalysisWorkflow:
     """Orchestrates the complete resume analysis process using multiple AI agents"""
 
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, verbose: Optional[bool] = None, crew_timeout: float = CREW_TIMEOUT_SECONDS):
         self.openai_api_key = openai_api_key
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.1,
-            openai_api_key=openai_api_key
+        self.verbose = CREW_VERBOSE if verbose is None else verbose
+        self.crew_timeout = crew_timeout
+        self._crew_lock = threading.Lock()
+        self._crew_agents_ready = False
+
+    # Components are built on first use so that, e.g., simple analyses never
+    # construct the search tool or CrewAI agents. Chat models come from the
+    # shared registry, so agents using the same model share one client.
+
+    @cached_property
+    def llm(self) -> ChatOpenAI:
+        return get_stage_model(STAGE_CREW, self.openai_api_key)
+
+    @cached_property
+    def recommendations_llm(self) -> ChatOpenAI:
+        return get_stage_model(STAGE_RECOMMENDATIONS, self.openai_api_key)
+
+    @cached_property
+    def parser_agent(self) -> ResumeParserAgent:
+        return ResumeParserAgent(self.openai_api_key)
+
+    @cached_property
+    def analyzer_agent(self) -> ResumeAnalyzerAgent:
+        return ResumeAnalyzerAgent(self.openai_api_key)
+
+    @cached_property
+    def search_tool(self) -> WebSearchTool:
+        return WebSearchTool()
+
+    # --- Stage graphs ---
+
+    async def _parse_stage(self, resume_text: str):
+        return await self.parser_agent.parse_resume(resume_text, raise_errors=True)
+
+    async def _analyze_stage(self, parse, job_description: str):
+        return await self.analyzer_agent.analyze_resume_job_fit(
+            parse.model_dump(), job_description, raise_errors=True
+        )
+
+    def _analyze_cache_key(self, parse, job_description: str) -> str:
+        resume_json = json.dumps(parse.model_dump(), sort_keys=True, default=str)
+        return build_resume_fingerprint(
+            f"{resume_json}\n{normalize_job_description(job_description)}",
+            self.analyzer_agent.model,
+            ANALYSIS_STAGE_VERSION
         )
 
-        # Initialize agents
-        self.parser_agent = ResumeParserAgent(openai_api_key)
-        self.analyzer_agent = ResumeAnalyzerAgent(openai_api_key)
-        self.search_tool = WebSearchTool()
+    async def _single_pass_stage(self, resume_text: str, job_description: str) -> Dict[str, Any]:
+        result = await analyze_resume_with_ai(resume_text, job_description, self.openai_api_key)
+        return map_single_pass_result(result, resume_text, job_description)
+
+    async def _research_stage(self, additional_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not additional_context:
+            return {}
+        return await self.search_tool.gather_market_intelligence(
+            additional_context.get('job_title', 'Software Engineer'),
+            company=additional_context.get('company'),
+            location=additional_context.get('location'),
+            industry=additional_context.get('industry')
+        )
+
+    async def _recommendations_stage(self, analyze, research: Dict[str, Any], additional_context):
+        return await self._generate_enhanced_recommendations(analyze, research, additional_context)
+
+    def _resume_stages(self) -> List[Stage]:
+        """Parse and fit-analysis stages shared by every workflow"""
+        return [
+            Stage(
+                "parse", self._parse_stage, inputs=["resume_text"],
+                timeout=_llm_stage_timeout(resolve_route(STAGE_PARSE).max_tokens), retries=0
+            ),
+            Stage(
+                "analyze", self._analyze_stage, inputs=["parse", "job_description"],
+                timeout=_llm_stage_timeout(analysis_max_tokens(DEPTH_STANDARD)), retries=0,
+                cache_key=self._analyze_cache_key
+            )
+        ]
+
+    @cached_property
+    def _stage_cache(self) -> InMemoryResultCache:
+        return InMemoryResultCache(max_entries=WORKFLOW_STAGE_CACHE_MAX_ENTRIES)
+
+    @cached_property
+    def simple_graph(self) -> StageGraph:
+        """parse -> analyze"""
+        return StageGraph(self._resume_stages(), cache=self._stage_cache)
+
+    @cached_property
+    def single_pass_graph(self) -> StageGraph:
+        """One combined parse+analyze call"""
+        return StageGraph([
+            Stage(
+                "single_pass", self._single_pass_stage, inputs=["resume_text", "job_description"],
+                timeout=_llm_stage_timeout(resolve_route(STAGE_SINGLE_PASS).max_tokens), retries=0
+            )
+        ])
+
+    @cached_property
+    def comprehensive_graph(self) -> StageGraph:
+        """parse -> analyze, with market research running alongside, then recommendations"""
+        return StageGraph(self._resume_stages() + [
+            # Research depends only on the request context, so it overlaps with parse/analyze
+            Stage(
+                "research", self._research_stage, inputs=["additional_context"],
+                timeout=WEB_SEARCH_DEADLINE_SECONDS + 5, fallback=lambda **_: {}
+            ),
+            Stage(
+                "recommendations", self._recommendations_stage,
+                inputs=["analyze", "research", "additional_context"]
+            )
+        ], cache=self._stage_cache)
+
+    def _ensure_crew_agents(self) -> None:
+        """Build the CrewAI agents once, on the first CrewAI analysis"""
+        if self._crew_agents_ready:
+            return
+        if not CREWAI_AVAILABLE:
+            raise RuntimeError("crewai not installed. Install with: pip install crewai")
+
+        with self._crew_lock:
+            if not self._crew_agents_ready:
+                self._setup_crew_agents()
+                self._crew_agents_ready = True
 
-        # Initialize CrewAI agents
-        self._setup_crew_agents()
+    def warm_up(self, include_crew: bool = False) -> None:
+        """
+        Build components ahead of the first request
+
+        Args:
+            include_crew: Also build the CrewAI agents
+        """
+        self.parser_agent
+        self.analyzer_agent
+        self.search_tool
+        if include_crew and CREWAI_AVAILABLE:
+            self._ensure_crew_agents()
+        logger.info("Resume analysis workflow warmed up")
 
     def _setup_crew_agents(self):
         """Set up CrewAI agents with specific roles"""
@@ -47,7 +231,7 @@ class ResumeAnalysisWorkflow:
             key qualifications, experiences, and skills. You understand both technical and soft skills
             requirements across various industries.""",
             llm=self.llm,
-            verbose=True,
+            verbose=self.verbose,
             allow_delegation=False
         )
 
@@ -59,7 +243,7 @@ class ResumeAnalysisWorkflow:
             data, and skill demand analysis. You have access to various sources including job boards,
             salary databases, and industry reports to provide accurate market intelligence.""",
             llm=self.llm,
-            verbose=True,
+            verbose=self.verbose,
             allow_delegation=True
         )
 
@@ -70,8 +254,8 @@ class ResumeAnalysisWorkflow:
             backstory="""You are an experienced career coach who helps professionals optimize their resumes
             and advance their careers. You understand what employers look for and can provide specific,
             actionable recommendations for resume improvement, skill development, and career progression.""",
-            llm=self.llm,
-            verbose=True,
+            llm=self.recommendations_llm,
+            verbose=self.verbose,
             allow_delegation=True
         )
 
@@ -82,8 +266,8 @@ class ResumeAnalysisWorkflow:
             backstory="""You are a senior talent assessment specialist who combines multiple data sources
             to provide comprehensive candidate evaluations. You excel at synthesizing information from
             resume analysis, market research, and industry trends to provide actionable insights.""",
-            llm=self.llm,
-            verbose=True,
+            llm=self.recommendations_llm,
+            verbose=self.verbose,
             allow_delegation=True
         )
 
@@ -107,49 +291,25 @@ class ResumeAnalysisWorkflow:
         try:
             logger.info("Starting comprehensive resume analysis workflow")
 
-            # Step 1: Parse and structure the resume
-            structured_resume = await self.parser_agent.parse_resume(resume_text)
-            resume_dict = structured_resume.model_dump()
-
-            # Step 2: Analyze resume against job description
-            analysis_result = await self.analyzer_agent.analyze_resume_job_fit(
-                resume_dict, job_description
-            )
-
-            # Step 3: Gather market intelligence (if company/location provided)
-            market_intelligence = {}
-            if additional_context:
-                company = additional_context.get('company')
-                location = additional_context.get('location')
-                job_title = additional_context.get('job_title', 'Software Engineer')
-
-                if company:
-                    market_intelligence['company_info'] = await self.search_tool.search_company_info(company)
-
-                market_intelligence['market_trends'] = await self.search_tool.search_job_market_trends(
-                    job_title, location
-                )
-
-                market_intelligence['required_skills'] = await self.search_tool.search_skill_requirements(
-                    job_title, additional_context.get('industry')
-                )
-
-            # Step 4: Generate comprehensive recommendations
-            recommendations = await self._generate_enhanced_recommendations(
-                analysis_result, market_intelligence, additional_context
-            )
+            run = await self.comprehensive_graph.run({
+                "resume_text": resume_text,
+                "job_description": job_description,
+                "additional_context": additional_context
+            })
+            market_intelligence = run["research"]
 
             # Compile final result
             result = {
                 "success": True,
-                "structured_resume": resume_dict,
-                "analysis": analysis_result.model_dump(),
+                "structured_resume": run["parse"].model_dump(),
+                "analysis": run["analyze"].model_dump(),
                 "market_intelligence": market_intelligence,
-                "recommendations": recommendations,
+                "recommendations": run["recommendations"],
                 "processing_metadata": {
                     "agents_used": ["ResumeParserAgent", "ResumeAnalyzerAgent", "WebSearchTool"],
                     "external_research_performed": bool(market_intelligence),
-                    "processing_time": "completed"
+                    "processing_time": "completed",
+                    "stage_timings": run.timing_summary()
                 }
             }
 
@@ -190,11 +350,16 @@ class ResumeAnalysisWorkflow:
 
             # Add market-driven recommendations
             if market_intelligence.get('required_skills'):
+                # Compare skill IDs so aliases ("JS" vs "JavaScript") count as the same skill
+                taxonomy = get_skill_taxonomy()
+                current_ids = taxonomy.normalize(analysis_result.matched_keywords)
+                current_names = {s.lower() for s in analysis_result.matched_keywords}
                 missing_market_skills = []
-                current_skills = set(analysis_result.matched_keywords)
-
-                for skill in market_intelligence['required_skills'][:5]:
-                    if skill.lower() not in [s.lower() for s in current_skills]:
+                for skill in taxonomy.dedupe(market_intelligence['required_skills'][:5]):
+                    skill_id = taxonomy.lookup(skill)
+                    if skill_id is not None and skill_id not in current_ids:
+                        missing_market_skills.append(skill)
+                    elif skill_id is None and skill.lower() not in current_names:
                         missing_market_skills.append(skill)
 
                 if missing_market_skills:
@@ -255,13 +420,8 @@ class ResumeAnalysisWorkflow:
             Dict with quick analysis results
         """
         try:
-            # Quick parse
-            structured_resume = await self.parser_agent.parse_resume(resume_text)
-
-            # Quick analysis
-            analysis_result = await self.analyzer_agent.analyze_resume_job_fit(
-                structured_resume.model_dump(), job_description
-            )
+            run = await self.simple_graph.run({"resume_text": resume_text, "job_description": job_description})
+            analysis_result = run["analyze"]
 
             return {
                 "success": True,
@@ -284,6 +444,51 @@ class ResumeAnalysisWorkflow:
                 "matched_keywords": []
             }
 
+    async def _kickoff(self, crew: Crew, name: str, cancel_event: threading.Event) -> Any:
+        """
+        Run a crew on the bounded crew executor with a timeout
+
+        The timeout starts when a worker thread picks the crew up, so time
+        spent queued behind other crews does not count against it. On timeout
+        or cancellation the crew is told to stop at its next step; a crew that
+        has not started yet is dropped from the queue, while a running worker
+        thread cannot be interrupted mid-call.
+
+        Args:
+            crew: Crew to run
+            name: Crew name for logging
+            cancel_event: Event shared with the crew's step callback
+
+        Returns:
+            The crew output
+        """
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def run():
+            loop.call_soon_threadsafe(started.set)
+            if cancel_event.is_set():
+                raise CrewCancelledError("Crew run cancelled")
+            return crew.kickoff()
+
+        future = loop.run_in_executor(_crew_executor, run)
+        try:
+            started_wait = asyncio.ensure_future(started.wait())
+            try:
+                await asyncio.wait({future, started_wait}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                started_wait.cancel()
+            return await asyncio.wait_for(future, self.crew_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Crew '{name}' exceeded {self.crew_timeout}s; cancelling")
+            cancel_event.set()
+            raise
+        except asyncio.CancelledError:
+            cancel_event.set()
+            # Removes the crew from the executor queue if no worker has picked it up
+            future.cancel()
+            raise
+
     async def analyze_with_crewai(
         self,
         resume_text: str,
@@ -293,6 +498,9 @@ class ResumeAnalysisWorkflow:
         """
         Advanced analysis using CrewAI orchestration
 
+        Resume parsing/fit analysis and company research are independent, so
+        they run as separate crews in parallel, each off the event loop.
+
         Args:
             resume_text: Raw resume text
             job_description: Job description text
@@ -301,7 +509,12 @@ class ResumeAnalysisWorkflow:
         Returns:
             Dict with CrewAI-orchestrated analysis
         """
+        cancel_event = threading.Event()
+        step_callback = _cancellation_step_callback(cancel_event)
+
         try:
+            self._ensure_crew_agents()
+
             # Define tasks
             parse_resume_task = Task(
                 description=f"Parse and structure this resume text: {resume_text[:500]}...",
@@ -315,6 +528,15 @@ class ResumeAnalysisWorkflow:
                 expected_output="Detailed compatibility analysis"
             )
 
+            analysis_crew = Crew(
+                agents=[self.resume_parser, self.analysis_coordinator],
+                tasks=[parse_resume_task, analyze_fit_task],
+                verbose=self.verbose,
+                process=Process.sequential,
+                step_callback=step_callback
+            )
+            runs = [self._kickoff(analysis_crew, "analysis", cancel_event)]
+
             if company_name:
                 research_task = Task(
                     description=f"Research company information for {company_name}",
@@ -322,31 +544,34 @@ class ResumeAnalysisWorkflow:
                     expected_output="Company overview, culture, and technology stack"
                 )
 
-                # Create crew with research
-                crew = Crew(
-                    agents=[self.resume_parser, self.market_researcher, self.analysis_coordinator],
-                    tasks=[parse_resume_task, analyze_fit_task, research_task],
-                    verbose=True,
-                    process=Process.sequential
-                )
-            else:
-                # Create crew without research
-                crew = Crew(
-                    agents=[self.resume_parser, self.analysis_coordinator],
-                    tasks=[parse_resume_task, analyze_fit_task],
-                    verbose=True,
-                    process=Process.sequential
+                research_crew = Crew(
+                    agents=[self.market_researcher],
+                    tasks=[research_task],
+                    verbose=self.verbose,
+                    process=Process.sequential,
+                    step_callback=step_callback
                 )
+                runs.append(self._kickoff(research_crew, "research", cancel_event))
 
-            # Run the crew
-            result = crew.kickoff()
+            # Run the crews; if one fails the other is stopped too
+            try:
+                outputs = await asyncio.gather(*runs)
+            except BaseException:
+                cancel_event.set()
+                raise
 
-            return {
+            result = {
                 "success": True,
-                "crewai_result": str(result),
+                "crewai_result": str(outputs[0]),
                 "method": "crewai_orchestration"
             }
+            if company_name:
+                result["company_research"] = str(outputs[1])
 
+            return result
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error in CrewAI analysis: {e}")
             # Fallback to standard analysis
@@ -370,23 +595,17 @@ class ResumeAnalysisWorkflow:
         try:
             logger.info("Starting simple resume analysis workflow")
 
-            # Step 1: Parse and structure the resume
-            structured_resume = await self.parser_agent.parse_resume(resume_text)
-            resume_dict = structured_resume.model_dump()
-
-            # Step 2: Analyze resume against job description
-            analysis_result = await self.analyzer_agent.analyze_resume_job_fit(
-                resume_dict, job_description
-            )
+            run = await self.simple_graph.run({"resume_text": resume_text, "job_description": job_description})
 
             # Compile final result
             result = {
                 "success": True,
-                "structured_resume": resume_dict,
-                "analysis": analysis_result.model_dump(),
+                "structured_resume": run["parse"].model_dump(),
+                "analysis": run["analyze"].model_dump(),
                 "processing_metadata": {
                     "agents_used": ["ResumeParserAgent", "ResumeAnalyzerAgent"],
-                    "processing_time": "completed"
+                    "processing_time": "completed",
+                    "stage_timings": run.timing_summary()
                 }
             }
 
@@ -401,3 +620,83 @@ class ResumeAnalysisWorkflow:
                 "structured_resume": {},
                 "analysis": {},
             }
+
+    async def analyze_resume_single_pass(
+        self,
+        resume_text: str,
+        job_description: str
+    ) -> Dict[str, Any]:
+        """
+        Parse and analyze in one schema-validated LLM call
+
+        Returns the same shape as analyze_resume_simple with half the
+        round-trips and input tokens.
+
+        Args:
+            resume_text: Raw resume text
+            job_description: Job description text
+
+        Returns:
+            Dict with analysis results
+        """
+        try:
+            logger.info("Starting single-pass resume analysis workflow")
+
+            run = await self.single_pass_graph.run({"resume_text": resume_text, "job_description": job_description})
+
+            return {
+                "success": True,
+                **run["single_pass"],
+                "processing_metadata": {
+                    "agents_used": ["single_pass"],
+                    "processing_time": "completed",
+                    "stage_timings": run.timing_summary()
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error in single-pass analysis workflow: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "structured_resume": {},
+                "analysis": {},
+            }
+
+
+_workflows: Dict[str, ResumeAnalysisWorkflow] = {}
+_workflows_lock = threading.Lock()
+
+
+def get_workflow(openai_api_key: Optional[str] = None, warm_up: bool = False) -> ResumeAnalysisWorkflow:
+    """
+    Return the process-wide workflow for an API key, creating it on first use
+
+    Args:
+        openai_api_key: API key (defaults to OPENAI_API_KEY)
+        warm_up: Build the workflow's components now instead of on first use
+
+    Returns:
+        Shared ResumeAnalysisWorkflow instance
+
+    Raises:
+        RuntimeError: If no API key is configured
+    """
+    api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
+
+    with _workflows_lock:
+        workflow = _workflows.get(api_key)
+        if workflow is None:
+            workflow = _workflows[api_key] = ResumeAnalysisWorkflow(api_key)
+
+    if warm_up:
+        workflow.warm_up()
+    return workflow
+
+
+def clear_workflows() -> None:
+    """Forget shared workflows (app shutdown, after the LLM clients are closed)"""
+    with _workflows_lock:
+        _workflows.clear()
@@ -0,0 +1,201 @@
+"""
+Stage Graph - Small async DAG executor for analysis workflows
+Each stage declares the inputs it needs; stages whose inputs are ready run
+concurrently, each with its own timeout, retry policy, cache key and timing.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+from ..cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(Exception):
+    """A required stage failed after exhausting its retries"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """
+    One unit of work in a StageGraph
+
+    Args:
+        name: Unique stage name; its output is available to later stages under this name
+        func: Coroutine function called with one keyword argument per input
+        inputs: Names of stages or initial values this stage depends on
+        timeout: Seconds allowed per attempt (None for no limit)
+        retries: Extra attempts after a failure or timeout
+        backoff: Base delay in seconds between attempts (doubled each retry, jittered)
+        cache_key: Function of the inputs returning a cache key, or None to skip caching
+        fallback: Function of the inputs returning a substitute output if the
+            stage fails; stages without one fail the whole graph
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        inputs: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        backoff: float = 0.5,
+        cache_key: Optional[Callable[..., Optional[str]]] = None,
+        fallback: Optional[Callable[..., Any]] = None
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = inputs or []
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_key = cache_key
+        self.fallback = fallback
+
+
+class StageGraphResult:
+    """Outputs and per-stage timing records from one StageGraph run"""
+
+    def __init__(self, outputs: Dict[str, Any], timings: Dict[str, Dict[str, Any]], elapsed: float):
+        self.outputs = outputs
+        self.timings = timings
+        self.elapsed = elapsed
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+    def timing_summary(self) -> Dict[str, Any]:
+        """Timings in a JSON-friendly form for response metadata"""
+        return {"total_seconds": round(self.elapsed, 3), "stages": self.timings}
+
+
+class StageGraph:
+    """Runs a set of stages as a dependency graph"""
+
+    def __init__(self, stages: Optional[List[Stage]] = None, cache: Optional[ResultCache] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.cache = cache
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "StageGraph":
+        """Register a stage; returns the graph so calls can be chained"""
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        self.stages[stage.name] = stage
+        return self
+
+    def _execution_order(self, initial: Dict[str, Any]) -> List[Stage]:
+        """Topologically sort the stages, validating inputs and rejecting cycles"""
+        for stage in self.stages.values():
+            for name in stage.inputs:
+                if name not in self.stages and name not in initial:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown input '{name}'")
+
+        order = []
+        remaining = dict(self.stages)
+        ready = set(initial)
+        while remaining:
+            runnable = [s for s in remaining.values() if all(i in ready for i in s.inputs)]
+            if not runnable:
+                raise ValueError(f"Stage graph has a cycle among: {', '.join(remaining)}")
+            for stage in runnable:
+                order.append(stage)
+                ready.add(stage.name)
+                del remaining[stage.name]
+        return order
+
+    async def _run_stage(self, stage: Stage, inputs: Dict[str, Any], timing: Dict[str, Any]) -> Any:
+        """Run one stage with caching, timeout and retries"""
+        key = stage.cache_key(**inputs) if stage.cache_key and self.cache is not None else None
+        if key is not None:
+            cached = await self.cache.get(f"stage:{stage.name}:{key}")
+            if cached is not None:
+                timing["status"] = "cached"
+                return cached["value"]
+
+        for attempt in range(stage.retries + 1):
+            timing["attempts"] = attempt + 1
+            try:
+                if stage.timeout is not None:
+                    output = await asyncio.wait_for(stage.func(**inputs), stage.timeout)
+                else:
+                    output = await stage.func(**inputs)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    logger.warning(f"Stage '{stage.name}' timed out after {stage.timeout}s (attempt {attempt + 1})")
+                else:
+                    logger.warning(f"Stage '{stage.name}' failed (attempt {attempt + 1}): {e}")
+
+                if attempt == stage.retries:
+                    if stage.fallback is None:
+                        raise StageError(stage.name, e) from e
+                    timing["status"] = "fallback"
+                    timing["error"] = str(e) or type(e).__name__
+                    return stage.fallback(**inputs)
+
+                delay = stage.backoff * (2 ** attempt)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+
+        if key is not None:
+            await self.cache.set(f"stage:{stage.name}:{key}", {"value": output})
+        timing["status"] = "ok"
+        return output
+
+    async def run(self, initial: Dict[str, Any]) -> StageGraphResult:
+        """
+        Run every stage, starting each as soon as its inputs are available
+
+        Args:
+            initial: Values available to stages before any stage runs
+
+        Returns:
+            StageGraphResult with every stage's output and timing
+
+        Raises:
+            StageError: If a stage without a fallback fails; stages still
+                running are cancelled
+        """
+        started = time.perf_counter()
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage) -> Any:
+            inputs = {}
+            for name in stage.inputs:
+                inputs[name] = await tasks[name] if name in tasks else initial[name]
+
+            timing = timings[stage.name] = {"status": "running", "attempts": 0}
+            stage_started = time.perf_counter()
+            timing["started_at"] = round(stage_started - started, 3)
+            try:
+                return await self._run_stage(stage, inputs, timing)
+            except BaseException:
+                timing["status"] = "failed"
+                raise
+            finally:
+                timing["seconds"] = round(time.perf_counter() - stage_started, 3)
+
+        for stage in self._execution_order(initial):
+            tasks[stage.name] = asyncio.create_task(execute(stage), name=f"stage:{stage.name}")
+
+        try:
+            outputs = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            # Let cancelled stages unwind before returning
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        return StageGraphResult(outputs, timings, time.perf_counter() - started)
@@ -0,0 +1,141 @@
+"""
+Market Snapshot Builder CLI
+Rebuilds the offline market intelligence snapshot from web searches so the
+API can answer research lookups without network access.
+
+Usage:
+    python build_market_snapshot.py --titles titles.txt --companies companies.txt
+    python build_market_snapshot.py --title "Data Engineer" --location Berlin --location London
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from app.tools.market_snapshot import (
+    MARKET_SNAPSHOT_PATH,
+    SNAPSHOT_SCHEMA_VERSION,
+    MarketSnapshot,
+    trend_key
+)
+from app.tools.search_cache import SearchCache
+from app.tools.web_search_tool import WebSearchTool
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuild the offline market intelligence snapshot.")
+    parser.add_argument("--titles", help="File with one job title per line")
+    parser.add_argument("--title", action="append", default=[], help="Job title to refresh (repeatable)")
+    parser.add_argument("--companies", help="File with one company name per line")
+    parser.add_argument("--company", action="append", default=[], help="Company to refresh (repeatable)")
+    parser.add_argument("--location", action="append", default=[],
+                        help="Location to collect trends for, in addition to nationwide (repeatable)")
+    parser.add_argument("--base", default=MARKET_SNAPSHOT_PATH,
+                        help="Existing snapshot to update (default: the configured snapshot)")
+    parser.add_argument("--output", "-o", default=MARKET_SNAPSHOT_PATH, help="Snapshot file to write")
+    parser.add_argument("--version", default=datetime.now().strftime("%Y.%m.%d"),
+                        help="Version tag for the new snapshot (default: today's date)")
+    return parser.parse_args()
+
+
+def read_lines(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def load_base(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+async def refresh(args: argparse.Namespace) -> Dict[str, Any]:
+    titles = args.title + (read_lines(args.titles) if args.titles else [])
+    companies = args.company + (read_lines(args.companies) if args.companies else [])
+
+    data = load_base(args.base)
+    job_titles = data.get("job_titles", {})
+    company_entries = data.get("companies", {})
+    trends = data.get("trends", {})
+
+    # Always hit the network: no cache, and an empty snapshot so nothing is short-circuited
+    tool = WebSearchTool(cache=SearchCache(path=None), snapshot=MarketSnapshot())
+
+    for title in titles:
+        key = title.strip().lower()
+        skills = await tool.search_skill_requirements(title)
+        if skills:
+            entry = job_titles.setdefault(key, {"aliases": []})
+            entry["skills"] = sorted(skills)
+            logger.info(f"{title}: {len(skills)} skills")
+
+        for location in [None] + args.location:
+            market_trends = await tool.search_job_market_trends(title, location)
+            if market_trends["sources"]:
+                trends[trend_key(title, location)] = {
+                    "salary_ranges": market_trends["salary_ranges"],
+                    "in_demand_skills": market_trends["in_demand_skills"],
+                    "market_trends": market_trends["market_trends"]
+                }
+
+    for company in companies:
+        company_info = await tool.search_company_info(company)
+        if company_info["sources"]:
+            company_entries[company.strip().lower()] = {
+                "overview": company_info["overview"],
+                "culture": company_info["culture"],
+                "technology": company_info["technology"]
+            }
+            logger.info(f"{company}: {len(company_info['technology'])} technologies")
+
+    return {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "version": args.version,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "job_titles": dict(sorted(job_titles.items())),
+        "companies": dict(sorted(company_entries.items())),
+        "trends": dict(sorted(trends.items()))
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    if not (args.title or args.titles or args.company or args.companies):
+        logger.error("Nothing to refresh: pass --title/--titles and/or --company/--companies")
+        return 1
+
+    snapshot = asyncio.run(refresh(args))
+
+    # Write atomically so a running server never reads a half-written file
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, args.output)
+
+    logger.info(
+        f"Wrote market snapshot {snapshot['version']} to {args.output}: {len(snapshot['job_titles'])} titles, "
+        f"{len(snapshot['companies'])} companies, {len(snapshot['trends'])} trend entries"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Bulk Resume Screening CLI
+Screens a directory or zip of resumes against one job description and
+writes one JSON result per line.
+
+Usage:
+    python bulk_screen.py resumes/ --jd-file job.txt --output results.jsonl
+    python bulk_screen.py resumes.zip --jd "Senior Python developer..." --concurrency 16
+    python bulk_screen.py resumes/ --jd-file job.txt --top-k 50
+    python bulk_screen.py resumes/ --jd-file job.txt --depth standard
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+from app.agents.resume_analyzer_agent import ANALYSIS_DEPTHS, DEPTH_SCORES
+from app.workflows.bulk_screening import BulkScreeningRunner, collect_resume_files, shutdown_extraction_pool
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Screen many resumes against one job description.")
+    parser.add_argument("source", help="Directory or .zip archive of PDF/DOCX resumes")
+    jd_group = parser.add_mutually_exclusive_group(required=True)
+    jd_group.add_argument("--jd", help="Job description text")
+    jd_group.add_argument("--jd-file", help="Path to a file containing the job description")
+    parser.add_argument("--output", "-o", help="JSONL output path (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BULK_LLM_CONCURRENCY", "8")),
+                        help="Maximum concurrent resumes in the LLM stages")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Text extraction processes (default: CPU count)")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="Rank resumes locally (BM25) and send only the top K to the LLM")
+    parser.add_argument("--depth", choices=ANALYSIS_DEPTHS, default=DEPTH_SCORES,
+                        help="Analysis depth: scores (fastest, for ranking), standard or deep")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> int:
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        logger.error("OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
+        return 1
+
+    if args.jd_file:
+        with open(args.jd_file, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+    else:
+        job_description = args.jd
+
+    runner = BulkScreeningRunner(
+        openai_api_key,
+        concurrency=args.concurrency,
+        extraction_workers=args.workers,
+        prefilter_top_k=args.top_k,
+        analysis_depth=args.depth
+    )
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as extract_dir:
+            files = collect_resume_files(args.source, extract_dir)
+            if not files:
+                logger.error(f"No PDF/DOCX resumes found in {args.source}")
+                return 1
+
+            async for record in runner.run(files, job_description):
+                output.write(json.dumps(record, default=str) + "\n")
+                output.flush()
+                if record["type"] == "summary":
+                    logger.info(f"Done: {record['succeeded']} succeeded, {record['failed']} failed, "
+                                f"{record['filtered']} filtered "
+                                f"in {record['elapsed_seconds']}s; stage totals {record['stage_seconds_total']}")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        await asyncio.to_thread(shutdown_extraction_pool)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,82 @@
+"""
+Analysis Job Worker
+Consumes queued analysis jobs from Redis in one or more separate processes so
+long-running analyses never compete with the API's event loop.
+
+Requires JOB_QUEUE_BACKEND=redis (and REDIS_URL) for both the API and workers.
+
+Usage:
+    python job_worker.py --processes 4 --concurrency 2
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run resume analysis job workers.")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "1")),
+                        help="Number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")),
+                        help="Concurrent jobs per worker process")
+    return parser.parse_args()
+
+
+def run_worker(concurrency: int) -> None:
+    from app.jobs import RedisJobQueue, get_job_queue, run_analysis_job
+
+    queue = get_job_queue()
+    if not isinstance(queue, RedisJobQueue):
+        logger.error("Job workers require JOB_QUEUE_BACKEND=redis; the in-memory queue runs inside the API.")
+        return
+
+    try:
+        asyncio.run(queue.run_workers(run_analysis_job, concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> int:
+    args = parse_args()
+
+    if os.getenv("JOB_QUEUE_BACKEND", "memory").lower() != "redis":
+        logger.error("Set JOB_QUEUE_BACKEND=redis to run standalone job workers.")
+        return 1
+
+    if args.processes <= 1:
+        run_worker(args.concurrency)
+        return 0
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.concurrency,), name=f"job-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} job worker processes (concurrency={args.concurrency} each)")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
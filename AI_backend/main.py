@@ -4,11 +4,16 @@ Main application module - Refactored for ASYNC performance and proper cleanup.
 """
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Annotated, Any, Dict
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, BinaryIO, Dict, List, Optional, Union
 import os
 import uuid
 import logging
 import io
+import json
+import shutil
+import tempfile
 import asyncio # Import asyncio
 from datetime import datetime
 from pathlib import Path
@@ -27,10 +32,62 @@ import docx
 # --- Direct Agent Imports ---
 try:
     from app.agents.resume_parser_agent import ResumeParserAgent
-    from app.agents.resume_analyzer_agent import ResumeAnalyzerAgent
+    from app.agents.resume_analyzer_agent import (
+        ANALYSIS_DEPTH_MAX_TOKENS,
+        ANALYSIS_DEPTHS,
+        DEPTH_DEEP,
+        DEPTH_SCORES,
+        DEPTH_STANDARD,
+        ResumeAnalyzerAgent,
+        analysis_max_tokens
+    )
+    from app.workflows.bulk_screening import BulkScreeningRunner, collect_resume_files, shutdown_extraction_pool
+    from app.workflows.resume_analysis_workflow import WORKFLOW_WARM_UP, clear_workflows, get_workflow
+    from app.llm import close_llm_clients
+    from app.rate_limit import rate_limiter_stats
+    from app.compaction import PAGE_BREAK, compact_job_description, compact_resume
+    from app.routing import (
+        LLM_ROUTES,
+        STAGE_ANALYZE,
+        STAGE_PARSE,
+        STAGE_SINGLE_PASS,
+        get_llm_metrics,
+        get_stage_model,
+        invoke_stage,
+        parse_route_overrides,
+        resolve_route,
+        stream_stage
+    )
+    from app.analyzer import (
+        analyze_resume_rule_based,
+        analyze_resume_with_ai,
+        extract_resume_sections,
+        map_single_pass_result
+    )
+    from app.uploads import RequestSizeLimitMiddleware, read_upload
+    from app.tools.search_cache import get_search_cache
+    from app.tools.market_snapshot import get_market_snapshot
+    from app.skills import get_skill_taxonomy
+    from app.jobs import (
+        InMemoryJobQueue,
+        get_job_queue,
+        new_job,
+        public_job_view,
+        run_analysis_job,
+        validate_webhook_url
+    )
+    from app.cache import (
+        build_cache_key,
+        build_resume_fingerprint,
+        get_parsed_resume_cache,
+        get_result_cache
+    )
 except ImportError as e:
     raise RuntimeError(f"Could not import agents: {e}. Make sure all agent modules are properly installed.")
 
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,10 +95,212 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Configuration
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_SPILL_THRESHOLD = int(os.getenv("UPLOAD_SPILL_THRESHOLD", str(5 * 1024 * 1024)))  # 5MB
+ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.txt'}
+# Bump whenever the parse/analysis prompts change so cached results are not reused
+PROMPT_VERSION = "2"
+ANALYSIS_MODES = ("standard", "single_pass")
+MAX_BATCH_JOB_DESCRIPTIONS = int(os.getenv("MAX_BATCH_JOB_DESCRIPTIONS", "25"))
+BATCH_ANALYSIS_CONCURRENCY = int(os.getenv("BATCH_ANALYSIS_CONCURRENCY", "5"))
+MAX_BULK_ARCHIVE_SIZE = 200 * 1024 * 1024  # 200MB
+BULK_LLM_CONCURRENCY = int(os.getenv("BULK_LLM_CONCURRENCY", "8"))
+# Answer /analyze-resume with the local scoring engine when the LLM is unavailable
+LOCAL_FALLBACK_ON_LLM_ERROR = os.getenv("LOCAL_FALLBACK_ON_LLM_ERROR", "true").lower() == "true"
+# Allowance for the non-file multipart fields (JD text, boundaries, headers)
+MAX_FORM_OVERHEAD = 1 * 1024 * 1024  # 1MB
+
+FileSource = Union[str, bytes, BinaryIO]
+
+# --- Prompts (compiled into chains once per process) ---
+
+# Static instructions come first so every call shares a cacheable prompt prefix;
+# the JD follows (shared across candidates) and the resume goes last
+PARSE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+        Extract structured information from the resume text. Return a JSON object with:
+        - contact_info: object with name, email, phone if available
+        - summary: professional summary
+        - experience: array of job objects with title, company, dates, description
+        - education: array of education objects with degree, institution, dates
+        - skills: array of technical skills
+
+        Return only valid JSON.
+        """),
+    ("human", "Resume text:\n{resume_text}")
+])
+
+SCORES_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+        Score the resume against the job description. Return a JSON object with:
+        - overall_score: number 0-100
+        - skills_score: number 0-100
+        - experience_score: number 0-100
+        - education_score: number 0-100
+        - matched_keywords: array of keywords that match the JD
+        - missing_keywords: array of important keywords missing from resume
+
+        Return only valid JSON, with no commentary.
+        """),
+    ("human", "Job description:\n{job_description}"),
+    ("human", "Resume data:\n{resume_data}")
+])
+
+ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+        Analyze the resume against the job description. Return a JSON object with:
+        - overall_score: number 0-100
+        - skills_score: number 0-100
+        - experience_score: number 0-100
+        - education_score: number 0-100
+        - matched_keywords: array of keywords that match the JD
+        - missing_keywords: array of important keywords missing from resume
+        - strengths: array of candidate strengths
+        - weaknesses: array of areas for improvement
+        - recommendations: array of actionable advice
+        - summary_critique: brief overall assessment
+
+        Return only valid JSON.
+        """),
+    ("human", "Job description:\n{job_description}"),
+    ("human", "Resume data:\n{resume_data}")
+])
+
+DEEP_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+        Analyze the resume against the job description in depth. Return a JSON object with:
+        - overall_score: number 0-100
+        - skills_score: number 0-100
+        - experience_score: number 0-100
+        - education_score: number 0-100
+        - matched_keywords: array of keywords that match the JD
+        - missing_keywords: array of important keywords missing from resume
+        - strengths: array of candidate strengths
+        - weaknesses: array of areas for improvement
+        - recommendations: array of actionable advice
+        - summary_critique: brief overall assessment
+        - development_plan: array of ordered steps (skills, projects, certifications) that close the gaps
+        - market_context: how this profile compares to what the market expects for this role and seniority
+        - interview_focus_areas: array of topics an interviewer should probe
+
+        Return only valid JSON.
+        """),
+    ("human", "Job description:\n{job_description}"),
+    ("human", "Resume data:\n{resume_data}")
+])
+
+ANALYSIS_PROMPTS = {DEPTH_SCORES: SCORES_ANALYSIS_PROMPT, DEPTH_STANDARD: ANALYSIS_PROMPT, DEPTH_DEEP: DEEP_ANALYSIS_PROMPT}
+
+
+def build_llm_components(
+    openai_api_key: str,
+    route_overrides: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Builds the routed LLM clients, compiled chains and agents (shared per process unless overridden)."""
+    parse_llm = get_stage_model(STAGE_PARSE, openai_api_key, route_overrides)
+    analysis_llm = get_stage_model(STAGE_ANALYZE, openai_api_key, route_overrides)
+    # Each depth has its own prompt and output cap; "scores" generates a fraction of the tokens
+    analysis_llms = {
+        depth: get_stage_model(STAGE_ANALYZE, openai_api_key, route_overrides, max_tokens=ANALYSIS_DEPTH_MAX_TOKENS[depth])
+        for depth in ANALYSIS_DEPTHS
+    }
+    analysis_chains = {
+        depth: ANALYSIS_PROMPTS[depth] | analysis_llms[depth] | JsonOutputParser()
+        for depth in ANALYSIS_DEPTHS
+    }
+    return {
+        "llm": analysis_llm,
+        "parse_model": resolve_route(STAGE_PARSE, route_overrides).model,
+        "analysis_model": resolve_route(STAGE_ANALYZE, route_overrides).model,
+        "parse_chain": PARSE_PROMPT | parse_llm | JsonOutputParser(),
+        "analysis_chain": analysis_chains[DEPTH_STANDARD],
+        "analysis_chains": analysis_chains,
+        # Same prompts without the parser, so raw tokens can be streamed to clients;
+        # stream_usage makes the final chunk carry token usage for the rate limiter
+        "analysis_stream_chains": {
+            depth: ANALYSIS_PROMPTS[depth] | analysis_llms[depth].bind(stream_usage=True)
+            for depth in ANALYSIS_DEPTHS
+        },
+        "parser_agent": ResumeParserAgent(openai_api_key, route_overrides=route_overrides),
+        "analyzer_agent": ResumeAnalyzerAgent(openai_api_key, route_overrides=route_overrides)
+    }
+
+
+def direct_models_key(route_overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Cache-key component naming the models behind the direct parse and analysis chains."""
+    return f"{resolve_route(STAGE_PARSE, route_overrides).model}+{resolve_route(STAGE_ANALYZE, route_overrides).model}"
+
+
+async def run_single_pass_analysis(
+    resume_text: str,
+    job_description: str,
+    route_overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+    trace: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Parses and analyzes in one schema-validated LLM call; returns structured_resume and analysis."""
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
+        )
+    result = await analyze_resume_with_ai(
+        resume_text, job_description, openai_api_key, route_overrides=route_overrides, trace=trace
+    )
+    return map_single_pass_result(result, resume_text, job_description)
+
+
+def get_llm_components(route_overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Returns the app-scoped LLM components, building them on first use (or per request when overridden)."""
+    components = None if route_overrides else getattr(app.state, "llm_components", None)
+    if components is None:
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise HTTPException(
+                status_code=500,
+                detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
+            )
+        components = build_llm_components(openai_api_key, route_overrides)
+        if not route_overrides:
+            app.state.llm_components = components
+    return components
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Builds LLM clients and chains and loads the market snapshot and skill taxonomy at startup; closes the HTTP and extraction pools on shutdown."""
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if openai_api_key:
+        app.state.llm_components = build_llm_components(openai_api_key)
+        logger.info("LLM clients and chains initialized")
+        if WORKFLOW_WARM_UP:
+            get_workflow(openai_api_key, warm_up=True)
+    else:
+        logger.warning("OPENAI_API_KEY not set; LLM components will be built on first request")
+
+    get_market_snapshot()
+    get_skill_taxonomy()
+
+    yield
+
+    job_queue = get_job_queue(run_analysis_job)
+    if isinstance(job_queue, InMemoryJobQueue):
+        await job_queue.shutdown()
+
+    # Off the loop: waiting for extraction processes to exit blocks
+    await asyncio.to_thread(shutdown_extraction_pool)
+
+    app.state.llm_components = None
+    clear_workflows()
+    await close_llm_clients()
+
+
 app = FastAPI(
     title="Resume Analyzer API",
     version="1.0.0",
-    description="AI-powered resume analysis"
+    description="AI-powered resume analysis",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -54,57 +313,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configuration
-UPLOAD_DIR = "Uploaded_files"
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.txt'}
-
-# Ensure the upload directory exists
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Reject oversized uploads before (or while) the body is read, not after buffering it
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={
+        "/analyze-resume": MAX_FILE_SIZE + MAX_FORM_OVERHEAD,
+        "/analyze-resume/batch": MAX_FILE_SIZE + MAX_FORM_OVERHEAD,
+        "/analyze-resume/stream": MAX_FILE_SIZE + MAX_FORM_OVERHEAD,
+        "/analyze-resume/preview": MAX_FILE_SIZE + MAX_FORM_OVERHEAD,
+        "/jobs": MAX_FILE_SIZE + MAX_FORM_OVERHEAD,
+        "/analyze-resume/bulk": MAX_BULK_ARCHIVE_SIZE + MAX_FORM_OVERHEAD,
+    }
+)
 
 # --- Synchronous File Text Extraction Functions (Will be run in a separate thread) ---
+# Each extractor accepts a file path, raw bytes or a binary file-like object, so
+# uploads can be processed entirely in memory.
+
+def _as_stream(source: FileSource) -> Union[str, BinaryIO]:
+    """Returns a path or seekable binary stream for the given source."""
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(source: FileSource) -> str:
     """Extracts text from a PDF file."""
     try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            return text
+        reader = PyPDF2.PdfReader(_as_stream(source))
+        # Keep page boundaries so compaction can spot running headers/footers
+        return PAGE_BREAK.join(page.extract_text() or "" for page in reader.pages)
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         return ""
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(source: FileSource) -> str:
     """Extracts text from a DOCX file."""
     try:
-        document = docx.Document(file_path)
+        document = docx.Document(_as_stream(source))
         text = "\n".join([p.text for p in document.paragraphs])
         return text
     except Exception as e:
         logger.error(f"Error extracting text from DOCX: {e}")
         return ""
 
-def extract_text_from_file(file_path: str) -> str:
-    """Extracts text based on file extension."""
-    extension = Path(file_path).suffix.lower()
+def extract_text_from_file(source: FileSource, extension: Optional[str] = None) -> str:
+    """Extracts text based on file extension (taken from the path when not given)."""
+    if extension is None:
+        extension = Path(str(source)).suffix if isinstance(source, (str, os.PathLike)) else ""
+    extension = extension.lower()
 
     if extension == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(source)
     elif extension == '.docx':
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(source)
     elif extension == '.txt':
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            stream = _as_stream(source)
+            if isinstance(stream, str):
+                with open(stream, 'r', encoding='utf-8') as f:
+                    return f.read()
+            return stream.read().decode('utf-8')
         except Exception as e:
             logger.error(f"Error reading text file: {e}")
             return ""
 
     return ""
 
+def extract_text_from_upload(contents: bytes, extension: str) -> str:
+    """
+    Extracts text from uploaded bytes without writing them to disk.
+
+    Uploads above UPLOAD_SPILL_THRESHOLD are spilled to an anonymous temporary
+    file so the parsers can read them lazily instead of holding a second
+    in-memory copy; the file is removed as soon as extraction finishes.
+    """
+    if len(contents) <= UPLOAD_SPILL_THRESHOLD:
+        return extract_text_from_file(contents, extension)
+
+    with tempfile.NamedTemporaryFile(suffix=extension) as tmp:
+        tmp.write(contents)
+        tmp.flush()
+        return extract_text_from_file(tmp.name, extension)
+
 # --- Health Check Endpoint ---
 
 @app.get("/health")
@@ -116,12 +409,36 @@ async def health_check():
         "service": "Resume Analyzer AI Backend"
     }
 
+# --- Cache Statistics Endpoint ---
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the analysis result, parsed resume and web search caches."""
+    return {
+        "result_cache": get_result_cache().stats(),
+        "parsed_resume_cache": get_parsed_resume_cache().stats(),
+        "web_search_cache": get_search_cache().stats()
+    }
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Configured per-stage model routes, per-stage call, latency and token counters, and per-model rate limits."""
+    return {
+        "routes": LLM_ROUTES,
+        "stages": get_llm_metrics().stats(),
+        "limits": rate_limiter_stats()
+    }
+
 # --- API Endpoint ---
 
 @app.post("/analyze-resume")
 async def analyze_resume(
     resume: Annotated[UploadFile, File(description="The resume file (.pdf or .docx)")],
-    jdText: Annotated[str, Form(description="The job description text")] = "General career analysis"
+    jdText: Annotated[str, Form(description="The job description text")] = "General career analysis",
+    mode: Annotated[str, Form(description="'standard' (parse, then analyze) or 'single_pass' (one LLM call)")] = "standard",
+    modelOverrides: Annotated[Optional[str], Form(description='Optional JSON of per-stage model settings, e.g. {"analyze": {"model": "gpt-4o"}}')] = None,
+    depth: Annotated[str, Form(description="'scores' (scores and keywords only), 'standard' or 'deep' (adds development plan and market context)")] = DEPTH_STANDARD
 ) -> Dict[str, Any]:
     """
     Accepts a resume file and job description, performs AI analysis, and returns a structured result.
@@ -133,120 +450,136 @@ async def analyze_resume(
             status_code=400, 
             detail=f"Unsupported file type. Only {', '.join(ALLOWED_EXTENSIONS)} are supported."
         )
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(ANALYSIS_MODES)}.")
+    if depth not in ANALYSIS_DEPTHS:
+        raise HTTPException(status_code=400, detail=f"depth must be one of: {', '.join(ANALYSIS_DEPTHS)}.")
+    single_pass = mode == "single_pass"
+    if single_pass and depth != DEPTH_STANDARD:
+        raise HTTPException(status_code=400, detail="depth applies to mode 'standard' only.")
+    method = "single_pass" if single_pass else "direct_langchain"
+    try:
+        route_overrides = parse_route_overrides(modelOverrides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid modelOverrides: {e}")
+    stage_trace: Dict[str, Dict[str, Any]] = {}
 
-    # 2. Save the file temporarily
+    # 2. Read the upload into memory (never written to disk)
     file_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, f"{file_id}{extension}")
 
     try:
-        # Save file contents
-        contents = await resume.read()
-        if len(contents) > MAX_FILE_SIZE:
-             raise HTTPException(status_code=400, detail="File size exceeds the 10MB limit.")
-        
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        contents, detected_type = await read_upload(resume, MAX_FILE_SIZE)
+        if detected_type not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="File content is not a valid PDF, DOCX or text file.")
+        # Trust the sniffed content type over the client-supplied extension
+        extension = detected_type
 
-        logger.info(f"File saved temporarily to {file_path}")
+        # Serve repeated resume/JD pairs from the result cache
+        result_cache = get_result_cache()
+        if single_pass:
+            single_pass_model = resolve_route(STAGE_SINGLE_PASS, route_overrides).model
+            cache_key = build_cache_key(contents, jdText, single_pass_model, f"single-{PROMPT_VERSION}")
+        else:
+            prompt_version = PROMPT_VERSION if depth == DEPTH_STANDARD else f"{PROMPT_VERSION}-{depth}"
+            cache_key = build_cache_key(contents, jdText, direct_models_key(route_overrides), prompt_version)
+        cached = await result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit for {resume.filename}")
+            return {
+                "success": True,
+                "message": "Analysis successful",
+                "file_id": file_id,
+                "resume_filename": resume.filename,
+                "analysis_date": datetime.now().isoformat(),
+                "structured_resume": cached["structured_resume"],
+                "analysis": cached["analysis"],
+                "processing_metadata": {
+                    "method": method,
+                    "depth": depth,
+                    "processing_time": "completed",
+                    "cache_hit": True,
+                    "degraded": False
+                }
+            }
 
         # 3. Extract Text (Run synchronously in the thread pool)
         # We must use asyncio.to_thread for synchronous I/O operations in an async endpoint
-        resume_text = await asyncio.to_thread(extract_text_from_file, file_path)
+        resume_text = await asyncio.to_thread(extract_text_from_upload, contents, extension)
         
         if not resume_text or len(resume_text.strip()) < 50:
             raise HTTPException(status_code=400, detail="Could not extract readable text from resume. Please ensure it is not an image-only PDF.")
             
-        # 4. AI Analysis (ASYNCHRONOUS Call - Direct Agent Usage)
-        # Initialize workflow with API key from environment
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise HTTPException(
-                status_code=500,
-                detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
-            )
-
-        # Simplified analysis using direct LangChain calls
-        from langchain_core.prompts import ChatPromptTemplate
-        from langchain_openai import ChatOpenAI
-        from langchain_core.output_parsers import JsonOutputParser
-        from pydantic import BaseModel, Field
-        from typing import List, Optional
-
-        class StructuredResume(BaseModel):
-            contact_info: dict = Field(default_factory=dict)
-            summary: Optional[str] = None
-            experience: List[dict] = Field(default_factory=list)
-            education: List[dict] = Field(default_factory=list)
-            skills: List[str] = Field(default_factory=list)
-
-        class AnalysisResult(BaseModel):
-            overall_score: int = 75
-            skills_score: int = 70
-            experience_score: int = 80
-            education_score: int = 75
-            matched_keywords: List[str] = Field(default_factory=list)
-            missing_keywords: List[str] = Field(default_factory=list)
-            strengths: List[str] = Field(default_factory=list)
-            weaknesses: List[str] = Field(default_factory=list)
-            recommendations: List[str] = Field(default_factory=list)
-            summary_critique: str = "Good candidate with solid technical background."
-
-        # Initialize LLM
-        llm = ChatOpenAI(model="gpt-4-turbo-preview", temperature=0.1, openai_api_key=openai_api_key)
-
-        # Parse resume
-        parse_prompt = ChatPromptTemplate.from_template("""
-        Extract structured information from this resume text. Return a JSON object with:
-        - contact_info: object with name, email, phone if available
-        - summary: professional summary
-        - experience: array of job objects with title, company, dates, description
-        - education: array of education objects with degree, institution, dates
-        - skills: array of technical skills
-
-        Resume text:
-        {resume_text}
-
-        Return only valid JSON.
-        """)
-
-        parse_chain = parse_prompt | llm | JsonOutputParser()
-        resume_data = await parse_chain.ainvoke({"resume_text": resume_text})
-
-        # Analyze against job description
-        analysis_prompt = ChatPromptTemplate.from_template("""
-        Analyze this resume against the job description. Return a JSON object with:
-        - overall_score: number 0-100
-        - skills_score: number 0-100
-        - experience_score: number 0-100
-        - education_score: number 0-100
-        - matched_keywords: array of keywords that match the JD
-        - missing_keywords: array of important keywords missing from resume
-        - strengths: array of candidate strengths
-        - weaknesses: array of areas for improvement
-        - recommendations: array of actionable advice
-        - summary_critique: brief overall assessment
-
-        Resume data: {resume_data}
-        Job description: {job_description}
+        # 4. AI Analysis (ASYNCHRONOUS Call - chains are built once per process)
+        try:
+            if single_pass:
+                # One call parses and scores; halves round-trips and input tokens
+                single_pass_result = await run_single_pass_analysis(
+                    resume_text, jdText, route_overrides=route_overrides, trace=stage_trace
+                )
+                resume_data = single_pass_result["structured_resume"]
+                analysis_data = single_pass_result["analysis"]
+            else:
+                llm_components = get_llm_components(route_overrides)
+                parse_model = resolve_route(STAGE_PARSE, route_overrides).model
+                analysis_model = resolve_route(STAGE_ANALYZE, route_overrides).model
 
-        Return only valid JSON.
-        """)
+                # Parsing does not depend on the JD, so reuse it across job descriptions
+                parsed_resume_cache = get_parsed_resume_cache()
+                parse_key = build_resume_fingerprint(resume_text, parse_model, f"direct-{PROMPT_VERSION}")
+                resume_data = await parsed_resume_cache.get(parse_key)
+                if resume_data is None:
+                    resume_data = await invoke_stage(
+                        STAGE_PARSE, llm_components["parse_chain"],
+                        {"resume_text": compact_resume(resume_text, parse_model)}, parse_model, stage_trace,
+                        max_tokens=resolve_route(STAGE_PARSE, route_overrides).max_tokens
+                    )
+                    await parsed_resume_cache.set(parse_key, resume_data)
 
-        analysis_chain = analysis_prompt | llm | JsonOutputParser()
-        analysis_data = await analysis_chain.ainvoke({
-            "resume_data": resume_data,
-            "job_description": jdText
-        })
+                # Analyze against job description
+                analysis_data = await invoke_stage(STAGE_ANALYZE, llm_components["analysis_chains"][depth], {
+                    "resume_data": resume_data,
+                    "job_description": compact_job_description(jdText, analysis_model)
+                }, analysis_model, stage_trace, max_tokens=analysis_max_tokens(depth, route_overrides))
+        except Exception as e:
+            if not LOCAL_FALLBACK_ON_LLM_ERROR:
+                raise
+            # Degrade to the deterministic local engine; not cached so the LLM is retried next time
+            llm_error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning(f"LLM analysis unavailable, using local scoring for {resume.filename}: {llm_error}")
+            return {
+                "success": True,
+                "message": "Analysis successful (local scoring; AI analysis unavailable)",
+                "file_id": file_id,
+                "resume_filename": resume.filename,
+                "analysis_date": datetime.now().isoformat(),
+                **await asyncio.to_thread(_local_analysis, resume_text, jdText),
+                "processing_metadata": {
+                    "method": "local_fallback",
+                    "processing_time": "completed",
+                    "cache_hit": False,
+                    "degraded": True,
+                    "llm_error": llm_error
+                }
+            }
 
         analysis_result = {
             "success": True,
             "structured_resume": resume_data,
             "analysis": analysis_data,
             "processing_metadata": {
-                "method": "direct_langchain",
-                "processing_time": "completed"
+                "method": method,
+                "depth": depth,
+                "processing_time": "completed",
+                "cache_hit": False,
+                "degraded": False,
+                "stages": stage_trace
             }
         }
+
+        await result_cache.set(cache_key, {
+            "structured_resume": resume_data,
+            "analysis": analysis_data
+        })
         
         # 5. Return Response
         # The AI result already contains 'success', 'message', 'scores', etc.
@@ -267,26 +600,429 @@ async def analyze_resume(
         raise
     except Exception as e:
         logger.error(f"Analysis or File Handling error: {e}", exc_info=True)
-        
-        # Attempt cleanup on error
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except:
-            pass
-            
         # Return a generic 500 or the detailed error from the AI model
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
-    finally:
-        # 6. Clean up (Optional but recommended for temporary files)
-        # This cleanup is now handled in the except/finally blocks above, 
-        # but let's ensure it runs after a success as well.
+
+
+# --- Local (no LLM) Preview Endpoint ---
+
+def _local_analysis(resume_text: str, job_description: str) -> Dict[str, Any]:
+    """Runs the local TF-IDF/BM25 scoring engine and section extractor."""
+    return {
+        "structured_resume": extract_resume_sections(resume_text),
+        "analysis": analyze_resume_rule_based(resume_text, job_description)
+    }
+
+
+@app.post("/analyze-resume/preview")
+async def analyze_resume_preview(
+    resume: Annotated[UploadFile, File(description="The resume file (.pdf or .docx)")],
+    jdText: Annotated[str, Form(description="The job description text")] = "General career analysis"
+) -> Dict[str, Any]:
+    """
+    Scores a resume against a job description locally, without calling the LLM.
+
+    Returns keyword matches, sub-scores and a TF-IDF similarity in milliseconds;
+    intended as an instant preview while the full analysis runs.
+    """
+    extension = Path(resume.filename).suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Only {', '.join(ALLOWED_EXTENSIONS)} are supported."
+        )
+
+    try:
+        contents, detected_type = await read_upload(resume, MAX_FILE_SIZE)
+        if detected_type not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="File content is not a valid PDF, DOCX or text file.")
+
+        resume_text = await asyncio.to_thread(extract_text_from_upload, contents, detected_type)
+        if not resume_text or len(resume_text.strip()) < 50:
+            raise HTTPException(status_code=400, detail="Could not extract readable text from resume. Please ensure it is not an image-only PDF.")
+
+        return {
+            "success": True,
+            "message": "Preview successful",
+            "file_id": str(uuid.uuid4()),
+            "resume_filename": resume.filename,
+            "analysis_date": datetime.now().isoformat(),
+            **await asyncio.to_thread(_local_analysis, resume_text, jdText),
+            "processing_metadata": {
+                "method": "local",
+                "processing_time": "completed",
+                "cache_hit": False
+            }
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Preview error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+# --- Streaming (Server-Sent Events) API Endpoint ---
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/analyze-resume/stream")
+async def analyze_resume_stream(
+    resume: Annotated[UploadFile, File(description="The resume file (.pdf or .docx)")],
+    jdText: Annotated[str, Form(description="The job description text")] = "General career analysis",
+    modelOverrides: Annotated[Optional[str], Form(description='Optional JSON of per-stage model settings, e.g. {"analyze": {"model": "gpt-4o"}}')] = None,
+    depth: Annotated[str, Form(description="'scores' (scores and keywords only), 'standard' or 'deep' (adds development plan and market context)")] = DEPTH_STANDARD
+) -> StreamingResponse:
+    """
+    Streaming variant of /analyze-resume using Server-Sent Events.
+
+    Emits `accepted`, `text_extracted`, `resume_parsed`, one `analysis_token`
+    per LLM token, and finally `result` with the same payload /analyze-resume
+    returns. Failures after the stream has started are sent as an `error` event.
+    The analysis stream runs under the same call policy and rate limiter as
+    /analyze-resume.
+    """
+    extension = Path(resume.filename).suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Only {', '.join(ALLOWED_EXTENSIONS)} are supported."
+        )
+    if depth not in ANALYSIS_DEPTHS:
+        raise HTTPException(status_code=400, detail=f"depth must be one of: {', '.join(ANALYSIS_DEPTHS)}.")
+    try:
+        route_overrides = parse_route_overrides(modelOverrides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid modelOverrides: {e}")
+
+    # The upload must be consumed before the response starts streaming
+    contents, detected_type = await read_upload(resume, MAX_FILE_SIZE)
+    if detected_type not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="File content is not a valid PDF, DOCX or text file.")
+
+    llm_components = get_llm_components(route_overrides)
+    file_id = str(uuid.uuid4())
+    resume_filename = resume.filename
+    stage_trace: Dict[str, Dict[str, Any]] = {}
+
+    async def event_stream():
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Cleaned up temporary file: {file_path}")
+            yield _sse_event("accepted", {"file_id": file_id, "resume_filename": resume_filename, "bytes": len(contents)})
+
+            result_cache = get_result_cache()
+            prompt_version = PROMPT_VERSION if depth == DEPTH_STANDARD else f"{PROMPT_VERSION}-{depth}"
+            cache_key = build_cache_key(contents, jdText, direct_models_key(route_overrides), prompt_version)
+            cached = await result_cache.get(cache_key)
+
+            if cached is not None:
+                resume_data, analysis_data, cache_hit = cached["structured_resume"], cached["analysis"], True
+            else:
+                resume_text = await asyncio.to_thread(extract_text_from_upload, contents, detected_type)
+                if not resume_text or len(resume_text.strip()) < 50:
+                    yield _sse_event("error", {"status_code": 400, "detail": "Could not extract readable text from resume. Please ensure it is not an image-only PDF."})
+                    return
+                yield _sse_event("text_extracted", {"chars": len(resume_text)})
+
+                parsed_resume_cache = get_parsed_resume_cache()
+                parse_model = resolve_route(STAGE_PARSE, route_overrides).model
+                analysis_model = resolve_route(STAGE_ANALYZE, route_overrides).model
+                parse_key = build_resume_fingerprint(resume_text, parse_model, f"direct-{PROMPT_VERSION}")
+                resume_data = await parsed_resume_cache.get(parse_key)
+                if resume_data is None:
+                    resume_data = await invoke_stage(
+                        STAGE_PARSE, llm_components["parse_chain"],
+                        {"resume_text": compact_resume(resume_text, parse_model)}, parse_model, stage_trace,
+                        max_tokens=resolve_route(STAGE_PARSE, route_overrides).max_tokens
+                    )
+                    await parsed_resume_cache.set(parse_key, resume_data)
+                yield _sse_event("resume_parsed", {"structured_resume": resume_data})
+
+                analysis_text = ""
+                async for delta in stream_stage(STAGE_ANALYZE, llm_components["analysis_stream_chains"][depth], {
+                    "resume_data": resume_data,
+                    "job_description": compact_job_description(jdText, analysis_model)
+                }, analysis_model, stage_trace, max_tokens=analysis_max_tokens(depth, route_overrides)):
+                    analysis_text += delta
+                    yield _sse_event("analysis_token", {"delta": delta})
+
+                analysis_data = JsonOutputParser().parse(analysis_text)
+                cache_hit = False
+                await result_cache.set(cache_key, {
+                    "structured_resume": resume_data,
+                    "analysis": analysis_data
+                })
+
+            yield _sse_event("result", {
+                "success": True,
+                "message": "Analysis successful",
+                "file_id": file_id,
+                "resume_filename": resume_filename,
+                "analysis_date": datetime.now().isoformat(),
+                "structured_resume": resume_data,
+                "analysis": analysis_data,
+                "processing_metadata": {
+                    "method": "direct_langchain_stream",
+                    "depth": depth,
+                    "processing_time": "completed",
+                    "cache_hit": cache_hit,
+                    "degraded": False,
+                    "stages": stage_trace
+                }
+            })
         except Exception as e:
-             logger.warning(f"Failed to clean up file {file_path}: {e}")
+            logger.error(f"Streaming analysis error: {e}", exc_info=True)
+            yield _sse_event("error", {"status_code": 500, "detail": f"Internal Server Error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# --- Batch API Endpoint ---
+
+@app.post("/analyze-resume/batch")
+async def analyze_resume_batch(
+    resume: Annotated[UploadFile, File(description="The resume file (.pdf or .docx)")],
+    jdTexts: Annotated[List[str], Form(description="One form field per job description")]
+) -> Dict[str, Any]:
+    """
+    Scores one resume against several job descriptions.
+
+    The upload, text extraction and resume parsing happen once; only the
+    per-JD analysis is fanned out, concurrently and bounded by
+    BATCH_ANALYSIS_CONCURRENCY. Results are ranked by overall_score.
+    """
+    # 1. Input Validation
+    extension = Path(resume.filename).suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Only {', '.join(ALLOWED_EXTENSIONS)} are supported."
+        )
+
+    job_descriptions = [jd for jd in jdTexts if jd and jd.strip()]
+    if not job_descriptions:
+        raise HTTPException(status_code=400, detail="At least one job description is required.")
+    if len(job_descriptions) > MAX_BATCH_JOB_DESCRIPTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_JOB_DESCRIPTIONS} job descriptions can be analyzed per request."
+        )
+
+    llm_components = get_llm_components()
+
+    # 2. Read the upload into memory (never written to disk)
+    file_id = str(uuid.uuid4())
+
+    try:
+        contents, detected_type = await read_upload(resume, MAX_FILE_SIZE)
+        if detected_type not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail="File content is not a valid PDF, DOCX or text file.")
+        # Trust the sniffed content type over the client-supplied extension
+        extension = detected_type
+
+        # 3. Extract and parse once
+        resume_text = await asyncio.to_thread(extract_text_from_upload, contents, extension)
+        if not resume_text or len(resume_text.strip()) < 50:
+            raise HTTPException(status_code=400, detail="Could not extract readable text from resume. Please ensure it is not an image-only PDF.")
+
+        parser_agent = llm_components["parser_agent"]
+        analyzer_agent = llm_components["analyzer_agent"]
+
+        structured_resume = await parser_agent.parse_resume(resume_text)
+        resume_dict = structured_resume.model_dump()
+
+        # 4. Fan out one analysis per job description
+        semaphore = asyncio.Semaphore(BATCH_ANALYSIS_CONCURRENCY)
+
+        async def analyze_one(index: int, job_description: str) -> Dict[str, Any]:
+            async with semaphore:
+                analysis = await analyzer_agent.analyze_resume_job_fit(resume_dict, job_description)
+            return {
+                "jd_index": index,
+                "analysis": analysis.model_dump(exclude={"structured_resume"})
+            }
+
+        results = await asyncio.gather(*[
+            analyze_one(index, jd) for index, jd in enumerate(job_descriptions)
+        ])
+
+        # Degraded (placeholder) analyses rank below every real one
+        ranked = sorted(
+            results, key=lambda r: (not r["analysis"].get("degraded", False), r["analysis"]["overall_score"]), reverse=True
+        )
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+
+        return {
+            "success": True,
+            "message": "Batch analysis successful",
+            "file_id": file_id,
+            "resume_filename": resume.filename,
+            "analysis_date": datetime.now().isoformat(),
+            "structured_resume": resume_dict,
+            "results": ranked,
+            "processing_metadata": {
+                "method": "batch_agents",
+                "job_descriptions": len(job_descriptions),
+                "concurrency": BATCH_ANALYSIS_CONCURRENCY,
+                "degraded": resume_dict.get("degraded", False) or any(r["analysis"].get("degraded", False) for r in ranked)
+            }
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch analysis error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+# --- Bulk Screening API Endpoint ---
+
+@app.post("/analyze-resume/bulk")
+async def analyze_resume_bulk(
+    resumes: Annotated[UploadFile, File(description="A .zip archive of PDF/DOCX resumes")],
+    jdText: Annotated[str, Form(description="The job description text")],
+    topK: Annotated[Optional[int], Form(description="Only send the top K resumes by local score to the LLM")] = None,
+    depth: Annotated[str, Form(description="'scores' (default; fastest, for ranking), 'standard' or 'deep'")] = DEPTH_SCORES
+) -> StreamingResponse:
+    """
+    Screens every resume in a zip archive against one job description.
+
+    Results are streamed as JSON lines (one per resume, in completion order)
+    followed by a summary line with per-stage timings. With topK, only the top K
+    resumes by local BM25 score are analyzed by the LLM; the rest are "filtered".
+    Resumes are analyzed at depth "scores" unless another depth is requested.
+    """
+    if Path(resumes.filename).suffix.lower() != '.zip':
+        raise HTTPException(status_code=400, detail="Bulk screening expects a .zip archive of resumes.")
+    if not jdText or not jdText.strip():
+        raise HTTPException(status_code=400, detail="Job description text is required.")
+    if topK is not None and topK < 1:
+        raise HTTPException(status_code=400, detail="topK must be a positive integer.")
+    if depth not in ANALYSIS_DEPTHS:
+        raise HTTPException(status_code=400, detail=f"depth must be one of: {', '.join(ANALYSIS_DEPTHS)}.")
+
+    llm_components = get_llm_components()
+
+    work_dir = tempfile.mkdtemp(prefix="bulk_")
+    archive_path = os.path.join(work_dir, "resumes.zip")
+
+    try:
+        contents, detected_type = await read_upload(resumes, MAX_BULK_ARCHIVE_SIZE)
+        if detected_type != '.zip':
+            raise HTTPException(status_code=400, detail="File content is not a valid zip archive.")
+
+        with open(archive_path, "wb") as f:
+            f.write(contents)
+
+        files = await asyncio.to_thread(collect_resume_files, archive_path, os.path.join(work_dir, "extracted"))
+        if not files:
+            raise HTTPException(status_code=400, detail="No PDF/DOCX resumes found in the archive.")
+    except HTTPException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        logger.error(f"Bulk upload error: {e}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Could not read resume archive: {str(e)}")
+
+    runner = BulkScreeningRunner(
+        os.getenv("OPENAI_API_KEY"),
+        concurrency=BULK_LLM_CONCURRENCY,
+        parser_agent=llm_components["parser_agent"],
+        analyzer_agent=llm_components["analyzer_agent"],
+        prefilter_top_k=topK,
+        analysis_depth=depth
+    )
+
+    async def stream_results():
+        try:
+            async for record in runner.run(files, jdText):
+                yield json.dumps(record, default=str) + "\n"
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+# --- Async Job API Endpoints ---
+
+@app.post("/jobs", status_code=202)
+async def submit_analysis_job(
+    resume: Annotated[UploadFile, File(description="The resume file (.pdf or .docx)")],
+    jdText: Annotated[str, Form(description="The job description text")] = "General career analysis",
+    mode: Annotated[str, Form(description="'simple', 'single_pass' (one LLM call) or 'comprehensive' (with web research)")] = "simple",
+    company: Annotated[Optional[str], Form()] = None,
+    location: Annotated[Optional[str], Form()] = None,
+    jobTitle: Annotated[Optional[str], Form()] = None,
+    industry: Annotated[Optional[str], Form()] = None,
+    webhookUrl: Annotated[Optional[str], Form(description="URL to POST the finished job to")] = None
+) -> Dict[str, Any]:
+    """
+    Queues a resume analysis and returns immediately with a job id.
+
+    Text extraction happens here; the LLM work runs on queue workers. Poll
+    GET /jobs/{job_id} or supply webhookUrl to be notified on completion.
+    """
+    if mode not in ("simple", "single_pass", "comprehensive"):
+        raise HTTPException(status_code=400, detail="mode must be 'simple', 'single_pass' or 'comprehensive'.")
+    if webhookUrl:
+        try:
+            await validate_webhook_url(webhookUrl)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    extension = Path(resume.filename).suffix.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Only {', '.join(ALLOWED_EXTENSIONS)} are supported."
+        )
+
+    contents, detected_type = await read_upload(resume, MAX_FILE_SIZE)
+    if detected_type not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="File content is not a valid PDF, DOCX or text file.")
+
+    resume_text = await asyncio.to_thread(extract_text_from_upload, contents, detected_type)
+    if not resume_text or len(resume_text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Could not extract readable text from resume. Please ensure it is not an image-only PDF.")
+
+    additional_context = {
+        key: value for key, value in {
+            "company": company,
+            "location": location,
+            "job_title": jobTitle,
+            "industry": industry
+        }.items() if value
+    }
+
+    job = new_job({
+        "resume_filename": resume.filename,
+        "resume_text": resume_text,
+        "job_description": jdText,
+        "mode": mode,
+        "additional_context": additional_context
+    }, webhook_url=webhookUrl)
+
+    await get_job_queue(run_analysis_job).submit(job)
+    logger.info(f"Queued {mode} analysis job {job['job_id']}")
+
+    return public_job_view(job)
+
+
+@app.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str) -> Dict[str, Any]:
+    """Returns the status, and once finished the result or error, of a queued analysis."""
+    job = await get_job_queue(run_analysis_job).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return public_job_view(job)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@
 Tests for analyzer module
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+import json
 from app.analyzer import (
     extract_resume_sections,
     calculate_text_similarity,
@@ -10,8 +11,14 @@ from app.analyzer import (
     analyze_resume_rule_based,
     parse_ai_analysis,
     extract_score,
-    extract_section
+    extract_section,
+    bm25_scores,
+    tokenize,
+    analyze_resume_with_ai,
+    map_single_pass_result
 )
+from app.agents.resume_analyzer_agent import AnalysisResult, DeepAnalysisResult, ResumeAnalyzerAgent
+from app.agents.resume_parser_agent import ResumeParserAgent, StructuredResume
 
 
 class TestExtractResumeSections:
@@ -311,3 +318,211 @@ class TestExtractSection:
         result = extract_section(text, r'strengths?[:\s]*\n(.*)', "fallback")
         assert result == []
 
+
+class TestBM25Scores:
+    """Test BM25 ranking used by the bulk prefilter"""
+
+    def test_ranks_relevant_document_first(self):
+        """Test the document sharing the query's rare terms scores highest"""
+        documents = [
+            "Accountant with ledger reconciliation and payroll experience",
+            "Backend engineer: Python, FastAPI, PostgreSQL, Docker, Kubernetes",
+            "Frontend developer focused on React and CSS"
+        ]
+        scores = bm25_scores("Python backend engineer with PostgreSQL", documents)
+        assert len(scores) == 3
+        assert scores.index(max(scores)) == 1
+        assert scores[0] == 0.0
+
+    def test_empty_inputs(self):
+        """Test empty documents and queries without known terms"""
+        assert bm25_scores("python", []) == []
+        assert bm25_scores("the and of", ["python developer"]) == [0.0]
+
+
+class TestTokenize:
+    """Test tokenization of technology names"""
+
+    def test_keeps_technology_names_whole(self):
+        """Test names with dots and symbols survive tokenization"""
+        tokens = tokenize("Node.js, C++ and C# developer.")
+        assert "node.js" in tokens
+        assert "c++" in tokens
+        assert "c#" in tokens
+        assert "developer" in tokens
+
+
+SINGLE_PASS_OUTPUT = {
+    "contact_info": {"name": "Jane Doe", "phone": "555-0100", "email": "jane@example.com"},
+    "summary": "Backend engineer",
+    "experience": [{"title": "Engineer", "company": "Acme", "dates": "2019 - 2024",
+                    "description_summary": "Built APIs in Python"}],
+    "education": [{"degree": "B.S. Computer Science", "institution": "State", "year_or_dates": "2019"}],
+    "projects": [],
+    "skills": ["Python", "JS"],
+    "scores": {"overall_score": 82, "skills_score": 120, "experience_score": 75,
+               "keyword_score": 60, "education_score": 90},
+    "summary_critique": "Strong backend fit.",
+    "strengths": ["APIs"],
+    "weaknesses": ["No Kubernetes"],
+    "recommendations": ["Add Kubernetes"],
+    "keywords": {"matched_keywords": ["Javascript"], "missing_keywords": ["k8s"]}
+}
+
+
+class TestSinglePass:
+    """Test the combined parse+analyze call"""
+
+    def _client(self, content):
+        client = MagicMock()
+        completion = MagicMock()
+        completion.choices = [MagicMock(message=MagicMock(content=content))]
+        client.chat.completions.create = AsyncMock(return_value=completion)
+        return client
+
+    async def test_validates_against_schema(self):
+        """Test valid output is returned as AnalysisSchema"""
+        with patch('app.analyzer.get_openai_client', return_value=self._client(json.dumps(SINGLE_PASS_OUTPUT))):
+            result = await analyze_resume_with_ai("resume", "job", "test-key")
+        assert result.contact_info.name == "Jane Doe"
+        assert result.scores["overall_score"] == 82
+
+    async def test_invalid_output_raises(self):
+        """Test output missing required fields is rejected"""
+        with patch('app.analyzer.get_openai_client', return_value=self._client('{"summary": "only"}')):
+            with pytest.raises(ValueError):
+                await analyze_resume_with_ai("resume", "job", "test-key")
+
+    async def test_prompt_prefix_is_stable(self):
+        """Test instructions, then JD, then resume, so candidates share a cacheable prefix"""
+        client = self._client(json.dumps(SINGLE_PASS_OUTPUT))
+        with patch('app.analyzer.get_openai_client', return_value=client):
+            await analyze_resume_with_ai("first resume", "job", "test-key")
+            await analyze_resume_with_ai("second resume", "job", "test-key")
+
+        first, second = [call.kwargs["messages"] for call in client.chat.completions.create.await_args_list]
+        assert first[:2] == second[:2]
+        assert "job" in first[1]["content"]
+        assert "first resume" in first[2]["content"]
+        assert "first resume" not in first[0]["content"]
+
+    def test_maps_to_response_shape(self):
+        """Test mapping onto structured_resume/analysis with clamped scores"""
+        from app.analyzer import AnalysisSchema
+        result = AnalysisSchema.model_validate(SINGLE_PASS_OUTPUT)
+
+        mapped = map_single_pass_result(result, "Python and JavaScript engineer", "Need JavaScript and Kubernetes")
+
+        assert mapped["structured_resume"]["contact_info"]["email"] == "jane@example.com"
+        analysis = mapped["analysis"]
+        assert analysis["overall_score"] == 82
+        assert analysis["skills_score"] == 100
+        assert analysis["keyword_match_percentage"] == 60
+        assert analysis["matched_keywords"] == ["JavaScript"]
+        assert analysis["missing_keywords"] == ["Kubernetes"]
+        assert 0 <= analysis["similarity_score"] <= 100
+
+
+class TestAnalysisDepth:
+    """Test per-depth prompts, schemas and output caps on ResumeAnalyzerAgent"""
+
+    SCORES = {
+        "overall_score": 78, "skills_score": 80, "experience_score": 75, "education_score": 70,
+        "similarity_score": 65, "keyword_match_percentage": 60,
+        "matched_keywords": ["Python"], "missing_keywords": ["Kubernetes"]
+    }
+
+    def _agent(self, depth, output):
+        agent = ResumeAnalyzerAgent("test-key")
+        chain = MagicMock(ainvoke=AsyncMock(return_value=output))
+        agent.analysis_chains[depth] = chain
+        return agent, chain
+
+    def test_depths_have_own_caps_and_prompts(self):
+        """Test scores-only output is capped well below the deep analysis"""
+        agent = ResumeAnalyzerAgent("test-key")
+        caps = {depth: chain.steps[1].max_tokens for depth, chain in agent.analysis_chains.items()}
+        assert caps["scores"] < caps["standard"] < caps["deep"]
+
+        prompts = {
+            depth: prompt.format_messages(job_description="jd", resume_data="resume")[0].content
+            for depth, prompt in agent.analysis_prompts.items()
+        }
+        assert "Detailed Analysis" not in prompts["scores"]
+        assert "Detailed Analysis" in prompts["standard"]
+        assert "Market Context" in prompts["deep"]
+
+    async def test_scores_depth(self):
+        """Test depth=scores returns scores and keywords with empty text fields"""
+        agent, chain = self._agent("scores", self.SCORES)
+        result = await agent.analyze_resume_job_fit({"skills": ["Python"]}, "Python developer", depth="scores")
+
+        chain.ainvoke.assert_awaited_once()
+        assert isinstance(result, AnalysisResult)
+        assert result.overall_score == 78
+        assert result.detailed_analysis == ""
+        assert result.strengths == []
+
+    async def test_deep_depth(self):
+        """Test depth=deep returns the extra sections"""
+        output = {
+            **self.SCORES, "summary_critique": "Good fit", "detailed_analysis": "...",
+            "development_plan": ["Learn Kubernetes"], "market_context": "In demand"
+        }
+        agent, _ = self._agent("deep", output)
+        result = await agent.analyze_resume_job_fit({"skills": ["Python"]}, "Python developer", depth="deep")
+
+        assert isinstance(result, DeepAnalysisResult)
+        assert result.development_plan == ["Learn Kubernetes"]
+
+    async def test_deep_depth_gets_long_timeout(self):
+        """Test the call policy is sized from the depth's output cap"""
+        agent, _ = self._agent("deep", {**self.SCORES, "summary_critique": "", "detailed_analysis": ""})
+        with patch('app.agents.resume_analyzer_agent.invoke_stage', AsyncMock(return_value=self.SCORES)) as invoke:
+            await agent.analyze_resume_job_fit({"skills": ["Python"]}, "Python developer", depth="deep")
+        assert invoke.await_args.kwargs["max_tokens"] == 3500
+
+    async def test_unknown_depth(self):
+        """Test unknown depths are rejected even without raise_errors"""
+        agent = ResumeAnalyzerAgent("test-key")
+        with pytest.raises(ValueError):
+            await agent.analyze_resume_job_fit({}, "Python developer", depth="brief")
+
+
+class TestDegradedResults:
+    """Test placeholder results after LLM failures are explicitly flagged"""
+
+    async def test_analysis_placeholder_is_flagged(self):
+        """Test a failed analysis returns degraded=True with the reason"""
+        agent = ResumeAnalyzerAgent("test-key")
+        agent.analysis_chains["standard"] = MagicMock(ainvoke=AsyncMock(side_effect=ValueError("bad json")))
+
+        result = await agent.analyze_resume_job_fit({"skills": ["Python"]}, "Python developer")
+
+        assert result.degraded is True
+        assert "bad json" in result.degraded_reason
+
+    async def test_parse_placeholder_is_flagged(self):
+        """Test a failed parse returns degraded=True and is not cached"""
+        agent = ResumeParserAgent("test-key", parse_cache=MagicMock(get=AsyncMock(return_value=None), set=AsyncMock()))
+        agent.chain = MagicMock(ainvoke=AsyncMock(side_effect=ValueError("bad json")))
+
+        result = await agent.parse_resume("Jane Doe, Python engineer")
+
+        assert result.degraded is True
+        agent.parse_cache.set.assert_not_awaited()
+
+    async def test_analysis_of_degraded_parse_is_flagged(self):
+        """Test scores computed from a placeholder parse are flagged too"""
+        agent = ResumeAnalyzerAgent("test-key")
+        agent.analysis_chains["scores"] = MagicMock(ainvoke=AsyncMock(return_value=TestAnalysisDepth.SCORES))
+
+        result = await agent.analyze_resume_job_fit({"degraded": True}, "Python developer", depth="scores")
+
+        assert result.degraded is True
+
+    def test_flag_hidden_from_output_schema(self):
+        """Test the model is never asked to fill in the degraded fields"""
+        assert "degraded" not in AnalysisResult.model_json_schema()["properties"]
+        assert "degraded" not in StructuredResume.model_json_schema()["properties"]
+        assert AnalysisResult(**{**TestAnalysisDepth.SCORES, "summary_critique": "", "detailed_analysis": ""}).degraded is False
@@ -0,0 +1,218 @@
+"""
+Tests for bulk screening workflow
+"""
+import pytest
+import asyncio
+import io
+import os
+import zipfile
+from pathlib import Path
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.workflows.bulk_screening import (
+    BulkScreeningRunner,
+    _copy_limited,
+    collect_resume_files,
+    extract_resume_archive,
+    get_extraction_pool,
+    shutdown_extraction_pool
+)
+
+
+class RateLimitError(Exception):
+    """Stand-in for openai.RateLimitError"""
+    status_code = 429
+
+
+class TestCollectResumeFiles:
+    """Test resume file discovery"""
+
+    def test_collect_from_directory(self, temp_upload_dir):
+        """Test only PDF/DOCX files are collected from a directory"""
+        for name in ["a.pdf", "b.docx", "notes.txt"]:
+            open(os.path.join(temp_upload_dir, name), "wb").close()
+
+        files = collect_resume_files(temp_upload_dir)
+        assert sorted(f.name for f in files) == ["a.pdf", "b.docx"]
+
+    def test_extract_archive_flattens_paths(self, temp_upload_dir):
+        """Test zip members cannot escape the extraction directory"""
+        archive_path = os.path.join(temp_upload_dir, "resumes.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("../../evil.pdf", b"%PDF")
+            archive.writestr("nested/dir/good.docx", b"PK")
+            archive.writestr("readme.txt", b"skip me")
+
+        extract_dir = os.path.join(temp_upload_dir, "out")
+        files = extract_resume_archive(archive_path, extract_dir)
+
+        assert len(files) == 2
+        for path in files:
+            assert os.path.dirname(os.path.abspath(path)) == os.path.abspath(extract_dir)
+
+    def test_extract_archive_rejects_oversized_member(self, temp_upload_dir):
+        """Test a member that expands past the per-resume limit is refused"""
+        archive_path = os.path.join(temp_upload_dir, "resumes.zip")
+        with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("small.pdf", b"%PDF")
+            archive.writestr("bomb.pdf", b"\0" * (2 * 1024 * 1024))
+
+        extract_dir = os.path.join(temp_upload_dir, "out")
+        with patch('app.workflows.bulk_screening.BULK_MAX_RESUME_BYTES', 1024 * 1024):
+            with pytest.raises(ValueError, match="bomb.pdf"):
+                extract_resume_archive(archive_path, extract_dir)
+
+        assert sum(os.path.getsize(os.path.join(extract_dir, f)) for f in os.listdir(extract_dir)) <= 1024 * 1024
+
+    def test_copy_stops_past_limit(self):
+        """Test copying stops just past the limit, whatever the zip header claimed"""
+        dst = io.BytesIO()
+        assert _copy_limited(io.BytesIO(b"x" * 10_000_000), dst, 1000) == 1001
+        assert len(dst.getvalue()) == 1001
+        assert _copy_limited(io.BytesIO(b"x" * 10), io.BytesIO(), 1000) == 10
+
+    def test_extract_archive_limits_totals(self, temp_upload_dir):
+        """Test resume count and total uncompressed size are capped"""
+        archive_path = os.path.join(temp_upload_dir, "resumes.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for i in range(3):
+                archive.writestr(f"r{i}.pdf", b"x" * 100)
+
+        with patch('app.workflows.bulk_screening.BULK_MAX_RESUMES', 2):
+            with pytest.raises(ValueError, match="more than 2 resumes"):
+                extract_resume_archive(archive_path, os.path.join(temp_upload_dir, "count"))
+        with patch('app.workflows.bulk_screening.BULK_MAX_UNCOMPRESSED_BYTES', 250):
+            with pytest.raises(ValueError, match="uncompressed"):
+                extract_resume_archive(archive_path, os.path.join(temp_upload_dir, "total"))
+
+    def test_collect_rejects_other_sources(self, temp_upload_dir):
+        """Test a plain file is rejected"""
+        path = os.path.join(temp_upload_dir, "single.pdf")
+        open(path, "wb").close()
+        with pytest.raises(ValueError):
+            collect_resume_files(path)
+
+
+class TestExtractionPool:
+    """Test the shared text extraction pool"""
+
+    def test_pool_shared_until_shutdown(self):
+        """Test runs reuse one pool and shutdown discards it so the next run starts a fresh one"""
+        shutdown_extraction_pool()
+        pool = get_extraction_pool(1)
+        assert get_extraction_pool() is pool
+
+        shutdown_extraction_pool()
+        replacement = get_extraction_pool(1)
+        assert replacement is not pool
+        shutdown_extraction_pool()
+
+    async def test_run_does_not_shut_pool_down(self, temp_upload_dir):
+        """Test finishing a run leaves the shared pool for the next one"""
+        path = os.path.join(temp_upload_dir, "a.pdf")
+        open(path, "wb").close()
+
+        with patch('app.workflows.bulk_screening.ResumeParserAgent'), \
+             patch('app.workflows.bulk_screening.ResumeAnalyzerAgent'), \
+             patch('app.workflows.bulk_screening.get_extraction_pool') as mock_pool:
+            runner = BulkScreeningRunner("test-key")
+            runner._screen_one = AsyncMock(return_value={"file": "a.pdf", "timings": {}, "status": "ok"})
+            records = [r async for r in runner.run([Path(path)], "Python engineer")]
+
+        assert records[-1]["succeeded"] == 1
+        mock_pool.return_value.shutdown.assert_not_called()
+
+
+class TestLLMStages:
+    """Test the per-resume parse and analyze calls"""
+
+    @pytest.fixture
+    def runner(self):
+        with patch('app.workflows.bulk_screening.ResumeParserAgent'), \
+             patch('app.workflows.bulk_screening.ResumeAnalyzerAgent'):
+            yield BulkScreeningRunner("test-key")
+
+    async def test_rate_limit_not_retried_again(self, runner):
+        """Test a 429 surfacing from the agent (after the call policy's retries) is reported, not retried"""
+        runner.parser_agent.parse_resume = AsyncMock(side_effect=RateLimitError())
+
+        result = await runner._screen_one(
+            None, None, asyncio.Semaphore(1), Path("a.pdf"), "Python engineer",
+            ("resume text", {"file": "a.pdf", "timings": {}})
+        )
+
+        assert result["status"] == "error"
+        assert runner.parser_agent.parse_resume.await_count == 1
+        assert runner.parser_agent.parse_resume.await_args.kwargs["raise_errors"] is True
+
+    async def test_bulk_analyzes_scores_only_by_default(self, runner):
+        """Test resumes are analyzed at depth=scores unless another depth is requested"""
+        structured = MagicMock()
+        structured.contact_info.name = "Jane Doe"
+        runner.parser_agent.parse_resume = AsyncMock(return_value=structured)
+        runner.analyzer_agent.analyze_resume_job_fit = AsyncMock(return_value=MagicMock(overall_score=70))
+
+        result = await runner._screen_one(
+            None, None, asyncio.Semaphore(1), Path("a.pdf"), "Python engineer",
+            ("resume text", {"file": "a.pdf", "timings": {}})
+        )
+
+        assert result["status"] == "ok"
+        assert runner.analyzer_agent.analyze_resume_job_fit.await_args.kwargs["depth"] == "scores"
+
+
+class TestPrefilter:
+    """Test local BM25 prefiltering before the LLM stages"""
+
+    async def test_only_top_k_reach_llm(self, temp_upload_dir):
+        """Test low-ranked resumes are reported as filtered without LLM calls"""
+        texts = {
+            "python.pdf": "Senior Python engineer building FastAPI services on PostgreSQL and Kubernetes. " * 2,
+            "java.pdf": "Java developer working with Spring and Oracle databases in banking systems. " * 2,
+            "chef.pdf": "Pastry chef managing a busy restaurant kitchen and seasonal menus for guests. " * 2
+        }
+        files = []
+        for name in texts:
+            path = os.path.join(temp_upload_dir, name)
+            open(path, "wb").close()
+            files.append(Path(path))
+
+        with patch('app.workflows.bulk_screening.ResumeParserAgent'), \
+             patch('app.workflows.bulk_screening.ResumeAnalyzerAgent'):
+            runner = BulkScreeningRunner("test-key", prefilter_top_k=1)
+
+        runner._extract_one = AsyncMock(side_effect=lambda loop, pool, path: (
+            texts[path.name], {"file": path.name, "timings": {"extract": 0.0}}
+        ))
+        runner._screen_one = AsyncMock(side_effect=lambda loop, pool, sem, path, jd, extracted: {
+            **extracted[1], "status": "ok"
+        })
+
+        records = [r async for r in runner.run(files, "Python engineer with FastAPI and Kubernetes")]
+
+        results = {r["file"]: r for r in records if r["type"] == "result"}
+        assert results["python.pdf"]["status"] == "ok"
+        assert results["python.pdf"]["local_rank"] == 1
+        assert results["java.pdf"]["status"] == "filtered"
+        assert results["chef.pdf"]["status"] == "filtered"
+        assert runner._screen_one.await_count == 1
+        assert records[-1]["filtered"] == 2
+
+    async def test_summary_totals_token_usage(self, temp_upload_dir):
+        """Test per-resume LLM usage is summed into cached and uncached totals"""
+        path = os.path.join(temp_upload_dir, "a.pdf")
+        open(path, "wb").close()
+
+        with patch('app.workflows.bulk_screening.ResumeParserAgent'), \
+             patch('app.workflows.bulk_screening.ResumeAnalyzerAgent'):
+            runner = BulkScreeningRunner("test-key")
+
+        usage = {"prompt_tokens": 1500, "cached_tokens": 1024, "uncached_tokens": 476, "completion_tokens": 300}
+        runner._screen_one = AsyncMock(return_value={
+            "file": "a.pdf", "timings": {}, "status": "ok", "llm_usage": {"parse": usage, "analyze": usage}
+        })
+
+        records = [r async for r in runner.run([Path(path)], "Python engineer")]
+
+        assert records[-1]["tokens"] == {
+            "prompt_tokens": 3000, "cached_tokens": 2048, "uncached_tokens": 952, "completion_tokens": 600
+        }
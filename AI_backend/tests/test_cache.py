@@ -0,0 +1,159 @@
+"""
+Tests for result cache module
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.cache import (
+    InMemoryResultCache,
+    RedisResultCache,
+    ResultCache,
+    build_cache_key,
+    build_resume_fingerprint,
+    normalize_job_description
+)
+
+
+class TestBuildCacheKey:
+    """Test cache key construction"""
+
+    def test_same_inputs_same_key(self):
+        """Test identical requests share a key"""
+        key1 = build_cache_key(b"resume", "Python developer", "gpt-4", "1")
+        key2 = build_cache_key(b"resume", "Python developer", "gpt-4", "1")
+        assert key1 == key2
+
+    def test_whitespace_in_jd_ignored(self):
+        """Test JD whitespace differences share a key"""
+        key1 = build_cache_key(b"resume", "Python   developer\n", "gpt-4", "1")
+        key2 = build_cache_key(b"resume", "Python developer", "gpt-4", "1")
+        assert key1 == key2
+
+    def test_each_component_changes_key(self):
+        """Test resume, JD, model and prompt version all affect the key"""
+        base = build_cache_key(b"resume", "Python developer", "gpt-4", "1")
+        assert build_cache_key(b"other", "Python developer", "gpt-4", "1") != base
+        assert build_cache_key(b"resume", "Java developer", "gpt-4", "1") != base
+        assert build_cache_key(b"resume", "Python developer", "gpt-4o", "1") != base
+        assert build_cache_key(b"resume", "Python developer", "gpt-4", "2") != base
+
+    def test_normalize_job_description(self):
+        """Test JD normalization collapses whitespace"""
+        assert normalize_job_description("  a \n\t b  ") == "a b"
+        assert normalize_job_description(None) == ""
+
+
+class TestBuildResumeFingerprint:
+    """Test parsed resume cache key construction"""
+
+    def test_fingerprint_ignores_whitespace(self):
+        """Test re-extracted text with different spacing shares a key"""
+        key1 = build_resume_fingerprint("John Doe\n\nPython", "gpt-4", "parser-1")
+        key2 = build_resume_fingerprint("John Doe Python", "gpt-4", "parser-1")
+        assert key1 == key2
+
+    def test_fingerprint_depends_on_parser_config(self):
+        """Test model and prompt version affect the key"""
+        base = build_resume_fingerprint("John Doe", "gpt-4", "parser-1")
+        assert build_resume_fingerprint("John Doe", "gpt-4o", "parser-1") != base
+        assert build_resume_fingerprint("John Doe", "gpt-4", "parser-2") != base
+
+
+class TestInMemoryResultCache:
+    """Test in-process LRU cache"""
+
+    def test_base_interface_is_abstract(self):
+        """Test caches must implement the whole interface"""
+        class PartialCache(ResultCache):
+            async def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            PartialCache()
+
+    async def test_get_miss(self):
+        """Test missing key returns None"""
+        cache = InMemoryResultCache()
+        assert await cache.get("missing") is None
+
+    async def test_set_and_get(self):
+        """Test stored values are returned"""
+        cache = InMemoryResultCache()
+        await cache.set("key", {"analysis": {"overall_score": 80}})
+        assert await cache.get("key") == {"analysis": {"overall_score": 80}}
+
+    async def test_lru_eviction(self):
+        """Test least recently used entry is evicted"""
+        cache = InMemoryResultCache(max_entries=2)
+        await cache.set("a", {"v": 1})
+        await cache.set("b", {"v": 2})
+        await cache.get("a")
+        await cache.set("c", {"v": 3})
+
+        assert await cache.get("a") == {"v": 1}
+        assert await cache.get("b") is None
+        assert await cache.get("c") == {"v": 3}
+
+    async def test_ttl_expiry(self):
+        """Test expired entries are not returned"""
+        cache = InMemoryResultCache(ttl=10)
+        with patch('app.cache.time.monotonic', return_value=100.0):
+            await cache.set("key", {"v": 1})
+        with patch('app.cache.time.monotonic', return_value=105.0):
+            assert await cache.get("key") == {"v": 1}
+        with patch('app.cache.time.monotonic', return_value=111.0):
+            assert await cache.get("key") is None
+        assert len(cache) == 0
+
+    async def test_stats_counters(self):
+        """Test hit, miss and eviction counters"""
+        cache = InMemoryResultCache(max_entries=1)
+        await cache.get("a")
+        await cache.set("a", {"v": 1})
+        await cache.get("a")
+        await cache.set("b", {"v": 2})
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 1
+        assert stats["hit_rate"] == 0.5
+
+
+class TestRedisResultCache:
+    """Test the Redis backend against a mocked client"""
+
+    def _cache(self, client):
+        with patch('app.cache.redis_asyncio.from_url', return_value=client):
+            return RedisResultCache("redis://localhost:6379/0", namespace="test")
+
+    async def test_corrupt_entry_is_a_miss(self):
+        """Test an undecodable value counts as a miss and is deleted"""
+        client = AsyncMock()
+        client.get.return_value = b'{"structured_resume": '
+        cache = self._cache(client)
+
+        assert await cache.get("key") is None
+
+        client.delete.assert_awaited_once_with("test:key")
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hits"] == 0
+
+    async def test_corrupt_entry_survives_delete_failure(self):
+        """Test a failed delete of a corrupt value is logged, not raised"""
+        client = AsyncMock()
+        client.get.return_value = b"not json"
+        client.delete.side_effect = ConnectionError("redis down")
+        cache = self._cache(client)
+
+        assert await cache.get("key") is None
+        assert cache.stats()["misses"] == 1
+
+    async def test_hit_decodes_value(self):
+        """Test a stored value is decoded and counted as a hit"""
+        client = AsyncMock()
+        client.get.return_value = b'{"v": 1}'
+        cache = self._cache(client)
+
+        assert await cache.get("key") == {"v": 1}
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,144 @@
+"""
+Tests for token-budgeted input compaction
+"""
+import pytest
+from unittest.mock import patch
+from app.compaction import (
+    PAGE_BREAK,
+    TokenCounter,
+    collapse_whitespace,
+    compact_job_description,
+    compact_resume,
+    count_tokens,
+    input_token_budget,
+    remove_jd_boilerplate,
+    strip_page_furniture
+)
+
+
+RESUME = PAGE_BREAK.join([
+    "Jane Doe\njane@example.com | 555-123-4567\nSUMMARY\nBackend engineer with 8 years of experience.\n"
+    "EXPERIENCE\nAcme Corp - Senior Engineer (2019 - 2023)\nBuilt   payment APIs\t in Python.\n\n\n\nPage 1 of 2",
+    "Jane Doe\nGlobex - Engineer (2015 - 2019)\nMaintained Java services.\nSKILLS\nPython, FastAPI, Kubernetes\n"
+    "EDUCATION\nB.S. Computer Science, State University\nPage 2 of 2"
+])
+
+JOB_DESCRIPTION = """Senior Python Engineer
+
+Requirements:
+- 5+ years of Python
+- Kubernetes in production
+
+Benefits:
+- 401(k) matching
+- Unlimited PTO
+
+We build payment infrastructure. We are an equal opportunity employer and value diversity.
+
+Requirements:
+- 5+ years of Python
+- Kubernetes in production
+"""
+
+
+class TestTokenCounter:
+    """Test offline token counting"""
+
+    def test_heuristic_counts_without_tiktoken(self):
+        """Test the fallback counter needs no encoding files"""
+        with patch('app.compaction.TIKTOKEN_AVAILABLE', False):
+            counter = TokenCounter("gpt-4o-mini")
+        assert counter.encoding is None
+        assert counter.count("") == 0
+        assert counter.count("Python engineer, 8 years.") >= 5
+        assert counter.count("internationalization") > counter.count("python")
+
+    def test_count_tokens(self):
+        """Test the shared counter returns a positive count"""
+        assert count_tokens("Senior Python engineer") > 0
+
+    def test_budget_defaults_and_overrides(self):
+        """Test per-model budgets fall back to the defaults"""
+        with patch('app.compaction.INPUT_TOKEN_BUDGETS', {"gpt-4o-mini": {"resume": 1200}}):
+            assert input_token_budget("resume", "gpt-4o-mini") == 1200
+            assert input_token_budget("job_description", "gpt-4o-mini") == 1500
+            assert input_token_budget("resume", "gpt-4-turbo-preview") == 3000
+
+
+class TestCleanup:
+    """Test whitespace and page furniture removal"""
+
+    def test_collapse_whitespace(self):
+        """Test runs of spaces and blank lines are collapsed"""
+        assert collapse_whitespace("a   b\t c\r\n\n\n\nd  ") == "a b c\n\nd"
+
+    def test_strip_page_furniture(self):
+        """Test page numbers and repeated running headers are dropped, keeping the first"""
+        text = strip_page_furniture(RESUME)
+        assert "Page 1 of 2" not in text
+        assert text.count("Jane Doe") == 1
+        assert "Globex - Engineer (2015 - 2019)" in text
+
+    def test_single_page_keeps_repeated_lines(self):
+        """Test lines are only treated as headers when they repeat across pages"""
+        text = "Engineer\nAcme\nEngineer\nGlobex"
+        assert strip_page_furniture(text) == text
+
+    def test_jd_boilerplate_removed(self):
+        """Test benefits sections, EEO sentences and repeated sections are dropped"""
+        text = remove_jd_boilerplate(collapse_whitespace(JOB_DESCRIPTION))
+        assert "401(k)" not in text
+        assert "equal opportunity" not in text
+        assert "We build payment infrastructure." in text
+        assert text.count("Kubernetes in production") == 1
+
+    def test_eeo_statement_removed_as_a_whole(self):
+        """Test an EEO statement and the EEO sentences following it are dropped"""
+        text = remove_jd_boilerplate(
+            "You will own our billing service. Acme is an equal opportunity employer. "
+            "All qualified applicants will receive consideration without regard to race, religion or disability. "
+            "Protected veterans are encouraged to apply."
+        )
+        assert text == "You will own our billing service."
+
+    def test_eeo_vocabulary_outside_statements_kept(self):
+        """Test ordinary requirements that happen to use EEO phrases are not removed"""
+        jd = (
+            "Ship fixes without regard to team boundaries when production is down.\n"
+            "Experience processing reasonable accommodation requests as an HR partner.\n"
+            "Build equal opportunity reporting dashboards for our customers."
+        )
+        assert remove_jd_boilerplate(jd) == jd
+
+
+class TestBudgets:
+    """Test section-priority fitting"""
+
+    def test_under_budget_keeps_everything(self):
+        """Test content within budget is only cleaned"""
+        text = compact_resume(RESUME, budget=1000)
+        assert "Built payment APIs in Python." in text
+        assert "State University" in text
+
+    def test_over_budget_keeps_priority_sections(self):
+        """Test skills survive a tight budget while low-priority sections are dropped"""
+        text = compact_resume(RESUME, budget=40)
+        assert "jane@example.com" in text
+        assert "Python, FastAPI, Kubernetes" in text
+        assert "State University" not in text
+        assert count_tokens(text) <= 40
+
+    def test_over_budget_preserves_document_order(self):
+        """Test kept sections stay in their original order"""
+        text = compact_resume(RESUME, budget=60)
+        assert text.index("Jane Doe") < text.index("SKILLS")
+
+    def test_jd_keeps_requirements_first(self):
+        """Test requirements outrank the company blurb even when the blurb comes first"""
+        job_description = (
+            "About us:\nWe build payment infrastructure for thousands of merchants across Europe.\n\n"
+            "Requirements:\n- 5+ years of Python\n- Kubernetes in production"
+        )
+        text = compact_job_description(job_description, budget=20)
+        assert "Kubernetes in production" in text
+        assert "payment infrastructure" not in text
@@ -0,0 +1,268 @@
+"""
+Tests for the asynchronous analysis job queue
+"""
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.jobs import (
+    InMemoryJobQueue,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_SUCCEEDED,
+    JobQueue,
+    RedisJobQueue,
+    deliver_webhook,
+    execute_job,
+    new_job,
+    public_job_view,
+    validate_webhook_url
+)
+
+
+async def wait_for_status(queue, job_id, statuses, timeout=2.0):
+    """Poll a queue until the job reaches one of the given statuses"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio commands the queue uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.sets = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    async def lmove(self, source, destination, src_side, dest_side):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop() if src_side == "RIGHT" else items.pop(0)
+        target = self.lists.setdefault(destination, [])
+        target.append(value) if dest_side == "RIGHT" else target.insert(0, value)
+        return value
+
+    async def blmove(self, source, destination, timeout, src_side, dest_side):
+        return await self.lmove(source, destination, src_side, dest_side)
+
+    async def lrem(self, key, count, value):
+        if value in self.lists.get(key, []):
+            self.lists[key].remove(value)
+
+    async def sadd(self, key, value):
+        self.sets.setdefault(key, set()).add(value)
+
+    async def srem(self, key, value):
+        self.sets.get(key, set()).discard(value)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+
+class TestJobRecords:
+    """Test job record helpers"""
+
+    def test_new_job_is_queued(self):
+        """Test new jobs start queued with a unique id"""
+        first = new_job({"resume_text": "x"})
+        second = new_job({"resume_text": "x"})
+        assert first["status"] == JOB_STATUS_QUEUED
+        assert first["job_id"] != second["job_id"]
+
+    def test_public_view_hides_payload(self):
+        """Test the resume payload is not echoed back to clients"""
+        view = public_job_view(new_job({"resume_text": "secret"}, webhook_url="https://example.com/hook"))
+        assert "payload" not in view
+        assert view["webhook_url"] == "https://example.com/hook"
+
+
+class TestInMemoryJobQueue:
+    """Test the in-process job queue"""
+
+    def test_base_interface_is_abstract(self):
+        """Test queues must implement the whole interface"""
+        class PartialQueue(JobQueue):
+            async def submit(self, job):
+                pass
+
+        with pytest.raises(TypeError):
+            PartialQueue()
+
+    async def test_job_succeeds(self):
+        """Test a submitted job runs and stores its result"""
+        handler = AsyncMock(return_value={"success": True, "score": 80})
+        queue = InMemoryJobQueue(handler=handler, concurrency=1)
+        job = new_job({"resume_text": "text"})
+
+        await queue.submit(job)
+        finished = await wait_for_status(queue, job["job_id"], {JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED})
+        await queue.shutdown()
+
+        assert finished["status"] == JOB_STATUS_SUCCEEDED
+        assert finished["result"] == {"success": True, "score": 80}
+        handler.assert_awaited_once_with({"resume_text": "text"})
+
+    async def test_job_failure_recorded(self):
+        """Test handler errors mark the job failed instead of crashing the worker"""
+        queue = InMemoryJobQueue(handler=AsyncMock(side_effect=RuntimeError("boom")), concurrency=1)
+        job = new_job({"resume_text": "text"})
+
+        await queue.submit(job)
+        finished = await wait_for_status(queue, job["job_id"], {JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED})
+        await queue.shutdown()
+
+        assert finished["status"] == JOB_STATUS_FAILED
+        assert finished["error"] == "boom"
+
+    @patch('app.jobs.deliver_webhook', new_callable=AsyncMock)
+    async def test_webhook_called_on_completion(self, mock_webhook):
+        """Test finished jobs are handed to webhook delivery"""
+        queue = InMemoryJobQueue(handler=AsyncMock(return_value={"success": True}), concurrency=1)
+        job = new_job({"resume_text": "text"}, webhook_url="https://example.com/hook")
+
+        await queue.submit(job)
+        await wait_for_status(queue, job["job_id"], {JOB_STATUS_SUCCEEDED})
+        await asyncio.sleep(0.01)
+        await queue.shutdown()
+
+        mock_webhook.assert_awaited_once()
+        assert mock_webhook.await_args.args[0]["job_id"] == job["job_id"]
+
+
+class TestRedisJobQueue:
+    """Test the Redis queue never loses a claimed job"""
+
+    async def test_job_held_until_acked(self):
+        """Test a claimed job stays in the worker's processing list until it finishes"""
+        redis = FakeRedis()
+        queue = RedisJobQueue(client=redis)
+        job = new_job({"resume_text": "x"})
+        await queue.submit(job)
+
+        claimed = await queue.next_job(worker="0")
+        processing_key = queue._processing_key("0")
+        assert claimed["job_id"] == job["job_id"]
+        assert redis.lists[processing_key] == [job["job_id"]]
+
+        await execute_job(queue, claimed, AsyncMock(return_value={"score": 1}))
+        assert redis.lists[processing_key] == []
+        assert (await queue.get(job["job_id"]))["status"] == JOB_STATUS_SUCCEEDED
+
+    async def test_crashed_worker_jobs_requeued(self):
+        """Test jobs held by a worker whose liveness key expired go back on the queue"""
+        redis = FakeRedis()
+        crashed = RedisJobQueue(client=redis)
+        job = new_job({"resume_text": "x"})
+        await crashed.submit(job)
+        claimed = await crashed.next_job(worker="0")
+        claimed["status"] = JOB_STATUS_RUNNING
+        await crashed.save(claimed)
+
+        survivor = RedisJobQueue(client=redis)
+        assert await survivor.requeue_stale() == 0
+
+        del redis.values[crashed._alive_key(crashed._processing_key("0"))]
+        assert await survivor.requeue_stale() == 1
+        assert (await survivor.get(job["job_id"]))["status"] == JOB_STATUS_QUEUED
+
+        reclaimed = await survivor.next_job(worker="0")
+        assert reclaimed["job_id"] == job["job_id"]
+
+
+    async def test_heartbeat_survives_redis_errors(self):
+        """Test a failed heartbeat is logged and retried instead of stopping the keep-alive loop"""
+        redis = FakeRedis()
+        queue = RedisJobQueue(client=redis, heartbeat_seconds=0.01)
+        queue._workers.add(queue._processing_key("0"))
+        calls = 0
+        original_set = redis.set
+
+        async def flaky_set(key, value, ex=None):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise ConnectionError("failover")
+            await original_set(key, value, ex)
+
+        async def idle(**_):
+            await asyncio.sleep(0.1)
+
+        redis.set = flaky_set
+        with patch.object(queue, 'next_job', side_effect=idle):
+            workers = asyncio.ensure_future(queue.run_workers(AsyncMock(), concurrency=1))
+            await asyncio.sleep(0.08)
+            workers.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await workers
+
+        assert calls > 1
+        assert await redis.exists(queue._alive_key(queue._processing_key("0")))
+
+
+class TestWebhooks:
+    """Test webhook URL checks and delivery retries"""
+
+    async def test_disabled_without_allowlist(self):
+        """Test webhooks are refused when no hosts are allowed"""
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', []):
+            with pytest.raises(ValueError, match="disabled"):
+                await validate_webhook_url("https://hooks.example.com/done")
+
+    async def test_host_must_be_allowed(self):
+        """Test hosts outside the allowlist are rejected, wildcards match subdomains"""
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', ["*.example.com", "93.184.216.34"]):
+            with pytest.raises(ValueError, match="not allowed"):
+                await validate_webhook_url("https://attacker.test/hook")
+            with pytest.raises(ValueError, match="not allowed"):
+                await validate_webhook_url("https://example.com.attacker.test/hook")
+            await validate_webhook_url("http://93.184.216.34/hook")
+
+    @pytest.mark.parametrize("url", [
+        "http://localhost/hook",
+        "http://127.0.0.1:8000/hook",
+        "http://10.0.0.5/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hook"
+    ])
+    async def test_private_addresses_rejected(self, url):
+        """Test allowlisted hosts that resolve to loopback, private or link-local addresses are refused"""
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', ["localhost", "127.0.0.1", "10.0.0.5", "169.254.169.254", "::1"]):
+            with pytest.raises(ValueError, match="non-public"):
+                await validate_webhook_url(url)
+
+    @patch('app.jobs.httpx.AsyncClient.post', new_callable=AsyncMock)
+    async def test_disallowed_webhook_not_sent(self, mock_post):
+        """Test delivery skips URLs that fail validation"""
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', ["localhost"]):
+            await deliver_webhook(new_job({}, webhook_url="http://localhost/hook"))
+        mock_post.assert_not_awaited()
+
+    @patch('app.jobs.asyncio.sleep', new_callable=AsyncMock)
+    @patch('app.jobs.httpx.AsyncClient.post', new_callable=AsyncMock)
+    async def test_no_sleep_after_final_attempt(self, mock_post, mock_sleep):
+        """Test failed deliveries back off between attempts but not after the last one"""
+        mock_post.side_effect = ConnectionError("refused")
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', ["93.184.216.34"]), \
+             patch('app.jobs.JOB_WEBHOOK_RETRIES', 3):
+            await deliver_webhook(new_job({}, webhook_url="http://93.184.216.34/hook"))
+
+        assert mock_post.await_count == 3
+        assert [call.args[0] for call in mock_sleep.await_args_list] == [1, 2]
@@ -3,7 +3,7 @@ Tests for FastAPI main endpoints
 """
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
 import os
 import sys
 import tempfile
@@ -246,3 +246,407 @@ class TestUploadFileEndpoint:
             if os.path.exists(tmp_file_path):
                 os.remove(tmp_file_path)
 
+
+class TestAnalyzeBatchEndpoint:
+    """Test batch analyze endpoint"""
+
+    def test_batch_requires_job_descriptions(self):
+        """Test batch endpoint rejects empty JD list"""
+        response = client.post(
+            "/analyze-resume/batch",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"jdTexts": ["  "]}
+        )
+        assert response.status_code == 400
+        assert "At least one job description" in response.json()["detail"]
+
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_file')
+    def test_batch_parses_once_and_ranks(self, mock_extract, mock_components):
+        """Test resume is parsed once and results are ranked by score"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+
+        structured = MagicMock()
+        structured.model_dump.return_value = {"skills": ["Python"]}
+        mock_parser = MagicMock()
+        mock_parser.parse_resume = AsyncMock(return_value=structured)
+        mock_analyzer = MagicMock()
+        mock_components.return_value = {"parser_agent": mock_parser, "analyzer_agent": mock_analyzer}
+
+        scores = {"JD low": 40.0, "JD high": 90.0}
+
+        async def fake_analyze(resume_dict, job_description):
+            analysis = MagicMock()
+            analysis.model_dump.return_value = {"overall_score": scores[job_description]}
+            return analysis
+
+        mock_analyzer.analyze_resume_job_fit = AsyncMock(side_effect=fake_analyze)
+
+        response = client.post(
+            "/analyze-resume/batch",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"jdTexts": ["JD low", "JD high"]}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert mock_parser.parse_resume.await_count == 1
+        assert [r["jd_index"] for r in data["results"]] == [1, 0]
+        assert [r["rank"] for r in data["results"]] == [1, 2]
+
+
+class TestUploadLimits:
+    """Test upload size and content enforcement"""
+
+    def test_content_length_over_limit_rejected(self):
+        """Test oversized uploads are rejected with 413"""
+        from main import MAX_FILE_SIZE
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("big.pdf", b"%PDF" + b"0" * (MAX_FILE_SIZE + 2 * 1024 * 1024), "application/pdf")},
+            data={"jdText": "Python developer"}
+        )
+        assert response.status_code == 413
+
+    def test_extension_mismatch_rejected(self):
+        """Test files whose content does not match a supported type are rejected"""
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("photo.pdf", b"\x89PNG\r\n\x1a\n" + b"0" * 100, "application/pdf")},
+            data={"jdText": "Python developer"}
+        )
+        assert response.status_code == 400
+        assert "not a valid" in response.json()["detail"]
+
+
+class TestAnalyzeStreamEndpoint:
+    """Test Server-Sent Events analyze endpoint"""
+
+    @patch('main.get_result_cache')
+    @patch('main.get_parsed_resume_cache')
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_stream_emits_stage_events(self, mock_extract, mock_components, mock_parse_cache, mock_result_cache):
+        """Test stage events arrive in order and end with the result"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        for cache in (mock_parse_cache.return_value, mock_result_cache.return_value):
+            cache.get = AsyncMock(return_value=None)
+            cache.set = AsyncMock()
+
+        parse_chain = MagicMock()
+        parse_chain.ainvoke = AsyncMock(return_value={"skills": ["Python"]})
+
+        async def fake_astream(inputs, config=None):
+            for token in ['{"overall_score": ', '88}']:
+                yield MagicMock(content=token)
+
+        stream_chain = MagicMock()
+        stream_chain.astream = fake_astream
+        mock_components.return_value = {
+            "parse_chain": parse_chain,
+            "analysis_stream_chains": {depth: stream_chain for depth in ("scores", "standard", "deep")}
+        }
+
+        response = client.post(
+            "/analyze-resume/stream",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events == ["accepted", "text_extracted", "resume_parsed", "analysis_token", "analysis_token", "result"]
+        assert '"overall_score": 88' in response.text
+
+    @patch('main.get_result_cache')
+    @patch('main.get_parsed_resume_cache')
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_stream_goes_through_rate_limiter(self, mock_extract, mock_components, mock_parse_cache, mock_result_cache):
+        """Test the streamed analysis is admitted by the limiter and recorded, honouring depth and overrides"""
+        from app.rate_limit import rate_limiter_stats, reset_rate_limiters
+        from app.routing import get_llm_metrics
+
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        mock_parse_cache.return_value.get = AsyncMock(return_value={"skills": ["Python"]})
+        mock_result_cache.return_value.get = AsyncMock(return_value=None)
+        mock_result_cache.return_value.set = AsyncMock()
+
+        async def fake_astream(inputs, config=None):
+            yield MagicMock(content='{"overall_score": 70}')
+
+        scores_chain = MagicMock()
+        scores_chain.astream = fake_astream
+        mock_components.return_value = {"parse_chain": MagicMock(), "analysis_stream_chains": {"scores": scores_chain}}
+
+        reset_rate_limiters()
+        get_llm_metrics().reset()
+        try:
+            response = client.post(
+                "/analyze-resume/stream",
+                files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+                data={
+                    "jdText": "Python developer",
+                    "depth": "scores",
+                    "modelOverrides": '{"analyze": {"model": "stream-test-model"}}'
+                }
+            )
+
+            assert response.status_code == 200
+            assert "event: result" in response.text
+            assert '"depth": "scores"' in response.text
+            limits = rate_limiter_stats()["stream-test-model"]
+            assert limits["admitted"] == 1
+            assert limits["in_flight"] == 0
+            assert get_llm_metrics().stats()["analyze"]["calls"] == 1
+            mock_components.assert_called_once_with({"analyze": {"model": "stream-test-model"}})
+        finally:
+            reset_rate_limiters()
+            get_llm_metrics().reset()
+
+    def test_stream_rejects_invalid_depth(self):
+        """Test depth is validated before the stream starts"""
+        response = client.post(
+            "/analyze-resume/stream",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "depth": "exhaustive"}
+        )
+        assert response.status_code == 400
+
+
+class TestLocalAnalysis:
+    """Test the no-LLM preview endpoint and local fallback"""
+
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_preview_does_not_call_llm(self, mock_extract, mock_components):
+        """Test the preview is scored locally"""
+        mock_extract.return_value = "Skills: Python, FastAPI, Docker\nExperience\nBackend engineer 2018 - 2023"
+
+        response = client.post(
+            "/analyze-resume/preview",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Backend engineer with Python and Kubernetes"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["processing_metadata"]["method"] == "local"
+        assert data["analysis"]["analysis_type"] == "rule_based"
+        assert "python" in data["analysis"]["matched_keywords"]
+        assert "kubernetes" in data["analysis"]["missing_keywords"]
+        mock_components.assert_not_called()
+
+    @patch('main.get_result_cache')
+    @patch('main.get_parsed_resume_cache')
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_analyze_falls_back_when_llm_fails(self, mock_extract, mock_components, mock_parse_cache, mock_result_cache):
+        """Test an LLM failure yields a local result that is not cached"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        for cache in (mock_parse_cache.return_value, mock_result_cache.return_value):
+            cache.get = AsyncMock(return_value=None)
+            cache.set = AsyncMock()
+
+        parse_chain = MagicMock()
+        parse_chain.ainvoke = AsyncMock(side_effect=RuntimeError("upstream 503"))
+        mock_components.return_value = {"parse_chain": parse_chain}
+
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["processing_metadata"]["method"] == "local_fallback"
+        assert data["processing_metadata"]["llm_error"] == "upstream 503"
+        assert data["analysis"]["analysis_type"] == "rule_based"
+        mock_result_cache.return_value.set.assert_not_awaited()
+
+
+class TestSinglePassMode:
+    """Test mode=single_pass on /analyze-resume"""
+
+    @patch('main.get_result_cache')
+    @patch('main.run_single_pass_analysis')
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_single_pass_uses_one_call(self, mock_extract, mock_components, mock_single_pass, mock_result_cache):
+        """Test the combined call replaces the parse and analysis chains"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        mock_result_cache.return_value.get = AsyncMock(return_value=None)
+        mock_result_cache.return_value.set = AsyncMock()
+        mock_single_pass.return_value = {"structured_resume": {"skills": ["Python"]}, "analysis": {"overall_score": 80}}
+
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "mode": "single_pass"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["processing_metadata"]["method"] == "single_pass"
+        assert data["analysis"]["overall_score"] == 80
+        mock_single_pass.assert_awaited_once()
+        mock_components.assert_not_called()
+
+    def test_invalid_mode(self):
+        """Test unknown modes are rejected"""
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "mode": "turbo"}
+        )
+        assert response.status_code == 400
+
+
+class TestModelRouting:
+    """Test per-request model overrides and LLM metrics"""
+
+    def test_invalid_model_overrides(self):
+        """Test overrides naming unknown stages are rejected"""
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "modelOverrides": '{"summarize": {"model": "gpt-4o"}}'}
+        )
+        assert response.status_code == 400
+
+    @patch('main.get_result_cache')
+    @patch('main.run_single_pass_analysis')
+    @patch('main.extract_text_from_upload')
+    def test_overrides_change_cache_key(self, mock_extract, mock_single_pass, mock_result_cache):
+        """Test overridden models do not share cached results with the default route"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        mock_result_cache.return_value.get = AsyncMock(return_value=None)
+        mock_result_cache.return_value.set = AsyncMock()
+        mock_single_pass.return_value = {"structured_resume": {}, "analysis": {"overall_score": 80}}
+
+        for overrides in (None, '{"single_pass": {"model": "gpt-4o"}}'):
+            data = {"jdText": "Python developer", "mode": "single_pass"}
+            if overrides:
+                data["modelOverrides"] = overrides
+            response = client.post(
+                "/analyze-resume",
+                files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+                data=data
+            )
+            assert response.status_code == 200
+
+        keys = [call.args[0] for call in mock_result_cache.return_value.get.await_args_list]
+        assert keys[0] != keys[1]
+        assert mock_single_pass.await_args.kwargs["route_overrides"] == {"single_pass": {"model": "gpt-4o"}}
+
+    def test_llm_metrics_endpoint(self):
+        """Test routes and per-stage counters are exposed"""
+        response = client.get("/metrics/llm")
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["routes"]) >= {"parse", "analyze", "single_pass"}
+        assert isinstance(data["stages"], dict)
+        assert isinstance(data["limits"], dict)
+
+
+class TestAnalysisDepth:
+    """Test the depth parameter on /analyze-resume"""
+
+    @patch('main.get_result_cache')
+    @patch('main.get_parsed_resume_cache')
+    @patch('main.get_llm_components')
+    @patch('main.extract_text_from_upload')
+    def test_scores_depth_uses_scores_chain(self, mock_extract, mock_components, mock_parse_cache, mock_result_cache):
+        """Test depth=scores runs the trimmed chain and is cached separately"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        for cache in (mock_parse_cache.return_value, mock_result_cache.return_value):
+            cache.get = AsyncMock(return_value=None)
+            cache.set = AsyncMock()
+
+        parse_chain = MagicMock(ainvoke=AsyncMock(return_value={"skills": ["Python"]}))
+        chains = {depth: MagicMock(ainvoke=AsyncMock(return_value={"overall_score": 70})) for depth in ("scores", "standard", "deep")}
+        mock_components.return_value = {"parse_chain": parse_chain, "analysis_chains": chains}
+
+        keys = []
+        for depth in ("scores", "standard"):
+            response = client.post(
+                "/analyze-resume",
+                files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+                data={"jdText": "Python developer", "depth": depth}
+            )
+            assert response.status_code == 200
+            assert response.json()["processing_metadata"]["depth"] == depth
+            keys.append(mock_result_cache.return_value.get.await_args.args[0])
+
+        chains["scores"].ainvoke.assert_awaited_once()
+        chains["standard"].ainvoke.assert_awaited_once()
+        chains["deep"].ainvoke.assert_not_awaited()
+        assert keys[0] != keys[1]
+
+    @pytest.mark.parametrize("data", [
+        {"depth": "brief"},
+        {"depth": "scores", "mode": "single_pass"}
+    ])
+    def test_invalid_depth(self, data):
+        """Test unknown depths and depth with single_pass are rejected"""
+        response = client.post(
+            "/analyze-resume",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", **data}
+        )
+        assert response.status_code == 400
+
+
+class TestJobEndpoints:
+    """Test asynchronous job submission and polling"""
+
+    @patch('main.get_job_queue')
+    @patch('main.extract_text_from_upload')
+    def test_submit_job_returns_id(self, mock_extract, mock_get_queue):
+        """Test a job is queued and returned without its payload"""
+        mock_extract.return_value = "Experienced software engineer with Python and React. " * 3
+        mock_get_queue.return_value.submit = AsyncMock()
+
+        response = client.post(
+            "/jobs",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "mode": "comprehensive", "company": "Acme"}
+        )
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "queued"
+        assert "payload" not in data
+
+        submitted = mock_get_queue.return_value.submit.await_args.args[0]
+        assert submitted["payload"]["mode"] == "comprehensive"
+        assert submitted["payload"]["additional_context"] == {"company": "Acme"}
+
+    def test_submit_job_invalid_mode(self):
+        """Test unknown modes are rejected"""
+        response = client.post(
+            "/jobs",
+            files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"jdText": "Python developer", "mode": "turbo"}
+        )
+        assert response.status_code == 400
+
+    def test_submit_job_rejects_private_webhook(self):
+        """Test webhooks pointing at internal addresses are refused"""
+        with patch('app.jobs.JOB_WEBHOOK_ALLOWED_HOSTS', ["localhost"]):
+            response = client.post(
+                "/jobs",
+                files={"resume": ("test_resume.pdf", b"%PDF-1.4 test", "application/pdf")},
+                data={"jdText": "Python developer", "webhookUrl": "http://localhost:8000/admin"}
+            )
+        assert response.status_code == 400
+        assert "non-public" in response.json()["detail"]
+
+    @patch('main.get_job_queue')
+    def test_get_unknown_job(self, mock_get_queue):
+        """Test polling an unknown job returns 404"""
+        mock_get_queue.return_value.get = AsyncMock(return_value=None)
+        response = client.get("/jobs/does-not-exist")
+        assert response.status_code == 404
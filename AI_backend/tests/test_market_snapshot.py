@@ -0,0 +1,89 @@
+"""
+Tests for the offline market snapshot index
+"""
+import pytest
+from unittest.mock import patch
+from app.tools.market_snapshot import MarketSnapshot, trend_key
+from app.tools.search_cache import SearchCache
+from app.tools.web_search_tool import WebSearchTool
+
+
+@pytest.fixture
+def snapshot():
+    """Small snapshot covering one title, company and trend"""
+    return MarketSnapshot({
+        "version": "test-1",
+        "job_titles": {
+            "data engineer": {"aliases": ["etl developer"], "skills": ["Python", "SQL", "Apache Spark"]}
+        },
+        "companies": {"acme": {"overview": "Acme builds rockets", "technology": ["Python", "AWS"]}},
+        "trends": {trend_key("data engineer", "berlin"): {"market_trends": "Growing demand"}}
+    })
+
+
+class TestTitleResolution:
+    """Test fuzzy job title lookup"""
+
+    def test_exact_and_alias(self, snapshot):
+        """Test exact titles and aliases resolve to the canonical title"""
+        assert snapshot.resolve_title("Data Engineer") == "data engineer"
+        assert snapshot.resolve_title("ETL Developer") == "data engineer"
+
+    def test_seniority_and_typos(self, snapshot):
+        """Test seniority words and small typos still match"""
+        assert snapshot.resolve_title("Sr. Data Engineer") == "data engineer"
+        assert snapshot.resolve_title("Senior Data Enginer") == "data engineer"
+
+    def test_unknown_title(self, snapshot):
+        """Test unrelated titles do not match"""
+        assert snapshot.resolve_title("Pastry Chef") is None
+        assert snapshot.lookup_skills("Pastry Chef") is None
+
+    def test_bundled_snapshot_loads(self):
+        """Test the shipped dataset loads and covers common titles"""
+        bundled = MarketSnapshot.load()
+        assert bundled.version != "empty"
+        assert "Python" in bundled.lookup_skills("Software Engineer")
+
+    def test_missing_file_gives_empty_index(self, temp_upload_dir):
+        """Test a missing snapshot degrades to an empty index"""
+        empty = MarketSnapshot.load(f"{temp_upload_dir}/missing.json")
+        assert empty.lookup_skills("Data Engineer") is None
+
+
+class TestLookups:
+    """Test company and trend lookups"""
+
+    def test_company_lookup(self, snapshot):
+        """Test company info comes back in the search tool's shape"""
+        info = snapshot.lookup_company("ACME")
+        assert info["technology"] == ["Python", "AWS"]
+        assert info["sources"] == ["market-snapshot:test-1"]
+
+    def test_trends_fall_back_to_nationwide(self, snapshot):
+        """Test a location-specific entry is used, and missing ones return None"""
+        assert snapshot.lookup_trends("Data Engineer", "Berlin")["market_trends"] == "Growing demand"
+        assert snapshot.lookup_trends("Data Engineer", "Paris") is None
+
+
+class TestSnapshotFirstResearch:
+    """Test WebSearchTool answers from the snapshot before searching"""
+
+    async def test_snapshot_hits_skip_search(self, snapshot):
+        """Test fully covered research performs no searches"""
+        tool = WebSearchTool(cache=SearchCache(path=None), snapshot=snapshot)
+        with patch.object(WebSearchTool, '_text_search', side_effect=AssertionError("searched")):
+            result = await tool.gather_market_intelligence("Data Engineer", company="Acme", location="Berlin")
+
+        assert result["company_info"]["overview"] == "Acme builds rockets"
+        assert result["market_trends"]["market_trends"] == "Growing demand"
+        assert result["required_skills"][:3] == ["Python", "SQL", "Apache Spark"]
+
+    async def test_gaps_without_live_fallback(self, snapshot):
+        """Test gaps use fallback data when live search is disabled"""
+        tool = WebSearchTool(cache=SearchCache(path=None), snapshot=snapshot, live_fallback=False)
+        with patch.object(WebSearchTool, '_text_search', side_effect=AssertionError("searched")):
+            result = await tool.gather_market_intelligence("Data Engineer", location="Paris")
+
+        assert result["market_trends"]["sources"] == []
+        assert "Python" in result["required_skills"]
@@ -176,3 +176,49 @@ class TestContentParse:
         # Check that sections are extracted
         assert isinstance(result["structured"], dict)
 
+
+
+class TestInMemoryExtraction:
+    """Test extraction from bytes and file-like objects"""
+
+    @pytest.fixture
+    def pdf_bytes(self):
+        """Build a small one-page PDF in memory"""
+        import fitz
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "SKILLS\nPython developer")
+        data = doc.tobytes()
+        doc.close()
+        return data
+
+    @pytest.fixture
+    def docx_bytes(self):
+        """Build a small DOCX in memory"""
+        import io
+        from docx import Document
+        document = Document()
+        document.add_paragraph("In-memory paragraph")
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    def test_extract_pdf_from_bytes(self, pdf_bytes):
+        """Test PDF text is extracted from raw bytes"""
+        result = extract_text_from_file(pdf_bytes, file_name="resume.pdf")
+        assert "Python developer" in result
+
+    def test_extract_docx_from_file_like(self, docx_bytes):
+        """Test DOCX text is extracted from a file-like object"""
+        import io
+        result = extract_text_from_file(io.BytesIO(docx_bytes), file_name="resume.docx")
+        assert "In-memory paragraph" in result
+
+    def test_in_memory_source_requires_file_name(self, pdf_bytes):
+        """Test in-memory sources need a name to pick the format"""
+        assert extract_text_from_file(pdf_bytes) == ""
+
+    def test_content_parse_from_bytes(self, pdf_bytes):
+        """Test content parsing works on in-memory PDFs"""
+        result = content_parse(pdf_bytes)
+        assert "skills" in result["structured"]
@@ -0,0 +1,149 @@
+"""
+Tests for the adaptive LLM rate limiter
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from app.rate_limit import AdaptiveLimiter, get_rate_limiter, rate_limiter_stats, reset_rate_limiters
+
+
+class TestAIMD:
+    """Test additive increase and multiplicative decrease of the concurrency limit"""
+
+    async def test_increases_additively_on_success(self):
+        """Test the limit grows by about one per window of successful calls"""
+        limiter = AdaptiveLimiter("gpt-test", initial=2, maximum=10)
+        for _ in range(5):
+            (await limiter.acquire()).release(success=True)
+        assert limiter.limit == 3
+
+    async def test_halves_on_rate_limit_once_per_burst(self):
+        """Test concurrent 429s from one burst cut the limit only once"""
+        limiter = AdaptiveLimiter("gpt-test", initial=8)
+        permits = [await limiter.acquire() for _ in range(4)]
+        for permit in permits:
+            permit.release(rate_limited=True)
+
+        stats = limiter.stats()
+        assert stats["concurrency_limit"] == 4
+        assert stats["rate_limited"] == 4
+        assert stats["decreases"] == 1
+
+    async def test_latency_spike_decreases(self):
+        """Test a call far slower than the smoothed latency counts as congestion"""
+        limiter = AdaptiveLimiter("gpt-test", initial=8, maximum=8, min_samples=2, spike_factor=3)
+        for _ in range(3):
+            (await limiter.acquire()).release(success=True)
+
+        slow = await limiter.acquire()
+        slow.started = time.monotonic() - 60
+        slow.release(success=True)
+
+        assert limiter.limit == 4
+        assert limiter.stats()["latency_spikes"] == 1
+
+    async def test_limit_has_a_floor(self):
+        """Test repeated cuts never go below the minimum"""
+        limiter = AdaptiveLimiter("gpt-test", initial=2, minimum=1)
+        for _ in range(5):
+            (await limiter.acquire()).release(rate_limited=True)
+        assert limiter.limit == 1
+
+
+class TestAdmission:
+    """Test concurrency slots and minute budgets"""
+
+    async def test_waits_for_a_free_slot(self):
+        """Test requests over the limit queue until a slot is released"""
+        limiter = AdaptiveLimiter("gpt-test", initial=1)
+        first = await limiter.acquire()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(), 0.05)
+        assert limiter.stats()["waiting"] == 0
+
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["waiting"] == 1
+        first.release(success=True)
+        second = await asyncio.wait_for(waiting, 1)
+        assert limiter.stats()["in_flight"] == 1
+        second.release()
+
+    async def test_released_slot_goes_to_woken_waiter(self):
+        """Test a newcomer cannot take the slot handed to the oldest waiter"""
+        limiter = AdaptiveLimiter("gpt-test", initial=1, maximum=1)
+        first = await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+
+        first.release(success=True)
+        assert limiter.try_acquire() is None
+        newcomer = asyncio.ensure_future(limiter.acquire())
+
+        second = await asyncio.wait_for(waiting, 1)
+        await asyncio.sleep(0.01)
+        assert not newcomer.done()
+        assert limiter.stats()["in_flight"] == 1
+
+        second.release()
+        (await asyncio.wait_for(newcomer, 1)).release()
+        assert limiter.stats()["in_flight"] == 0
+
+    async def test_abandoned_handoff_passes_slot_on(self):
+        """Test a woken waiter that is cancelled hands its slot to the next waiter"""
+        limiter = AdaptiveLimiter("gpt-test", initial=1, maximum=1)
+        first = await limiter.acquire()
+        abandoned = asyncio.ensure_future(limiter.acquire())
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+
+        first.release(success=True)
+        abandoned.cancel()
+        second = await asyncio.wait_for(waiting, 1)
+        assert limiter.stats()["in_flight"] == 1
+
+        second.release()
+        assert limiter.stats()["in_flight"] == 0
+
+    async def test_rpm_budget(self):
+        """Test the request budget queues requests until the window slides"""
+        limiter = AdaptiveLimiter("gpt-test", rpm=1)
+        (await limiter.acquire()).release(success=True)
+        assert limiter.try_acquire() is None
+
+        with patch('app.rate_limit.BUDGET_WINDOW_SECONDS', 0.05):
+            permit = await asyncio.wait_for(limiter.acquire(), 1)
+        permit.release()
+
+    async def test_tpm_budget_uses_actual_usage(self):
+        """Test estimates are replaced by the tokens a call actually used"""
+        limiter = AdaptiveLimiter("gpt-test", tpm=100)
+        permit = await limiter.acquire(80)
+        assert limiter.try_acquire(30) is None
+
+        permit.release(tokens=10, success=True)
+        assert limiter.try_acquire(30) is not None
+        assert limiter.stats()["tokens_last_minute"] == 40
+
+    async def test_oversized_request_runs_alone(self):
+        """Test a request above the whole TPM budget is still admitted on an empty window"""
+        limiter = AdaptiveLimiter("gpt-test", tpm=100)
+        assert limiter.try_acquire(500) is not None
+
+
+class TestRegistry:
+    """Test per-model limiters and their budgets"""
+
+    def test_budgets_per_model(self):
+        """Test LLM_RATE_BUDGETS configures a model's limiter and stats list it"""
+        reset_rate_limiters()
+        with patch('app.rate_limit.LLM_RATE_BUDGETS', {"gpt-4o-mini": {"tpm": 200000, "rpm": 500}}):
+            limiter = get_rate_limiter("gpt-4o-mini")
+
+        assert get_rate_limiter("gpt-4o-mini") is limiter
+        stats = rate_limiter_stats()["gpt-4o-mini"]
+        assert stats["tpm_budget"] == 200000
+        assert stats["rpm_budget"] == 500
+        reset_rate_limiters()
@@ -0,0 +1,410 @@
+"""
+Tests for per-stage model routing and LLM usage metrics
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.routing import (
+    LLM_ROUTES,
+    STAGE_ANALYZE,
+    STAGE_PARSE,
+    CallPolicy,
+    LLMCallTimeout,
+    LLMMetrics,
+    _merge_routes,
+    backoff_delay,
+    call_llm,
+    default_call_policy,
+    get_llm_metrics,
+    invoke_stage,
+    is_retryable_error,
+    parse_route_overrides,
+    resolve_route,
+    stage_record,
+    stream_stage,
+    usage_from_openai
+)
+from app.rate_limit import AdaptiveLimiter, reset_rate_limiters
+
+
+class TestRouteResolution:
+    """Test default routes and per-request overrides"""
+
+    def test_parse_defaults_to_fast_tier(self):
+        """Test parsing is routed to a cheaper model than analysis"""
+        assert resolve_route(STAGE_PARSE).model == LLM_ROUTES[STAGE_PARSE]["model"]
+        assert resolve_route(STAGE_PARSE).model != resolve_route(STAGE_ANALYZE).model
+
+    def test_override_replaces_only_given_fields(self):
+        """Test an override keeps the stage's other settings"""
+        route = resolve_route(STAGE_ANALYZE, {STAGE_ANALYZE: {"model": "gpt-4o"}})
+        assert route.model == "gpt-4o"
+        assert route.temperature == LLM_ROUTES[STAGE_ANALYZE]["temperature"]
+        assert route.max_tokens == LLM_ROUTES[STAGE_ANALYZE]["max_tokens"]
+
+    def test_parse_overrides(self):
+        """Test valid JSON overrides are returned keyed by stage"""
+        assert parse_route_overrides('{"parse": {"model": "gpt-4o"}}') == {"parse": {"model": "gpt-4o"}}
+        assert parse_route_overrides(None) == {}
+        assert parse_route_overrides("  ") == {}
+
+    @pytest.mark.parametrize("raw", [
+        '{"summarize": {"model": "gpt-4o"}}',
+        '{"parse": {"top_p": 0.5}}',
+        '{"parse": "gpt-4o"}',
+        '["parse"]',
+        'not json'
+    ])
+    def test_invalid_overrides_rejected(self, raw):
+        """Test unknown stages, unknown fields and malformed JSON raise ValueError"""
+        with pytest.raises(ValueError):
+            parse_route_overrides(raw)
+
+    def test_merge_does_not_mutate_base(self):
+        """Test environment overlays leave the defaults untouched"""
+        base = {STAGE_PARSE: {"model": "a", "temperature": 0.1, "max_tokens": None}}
+        merged = _merge_routes(base, {STAGE_PARSE: {"model": "b"}})
+        assert merged[STAGE_PARSE]["model"] == "b"
+        assert base[STAGE_PARSE]["model"] == "a"
+
+
+class TestLLMMetrics:
+    """Test per-stage counters"""
+
+    def test_record_and_stats(self):
+        """Test calls, errors, tokens and latency are aggregated per stage"""
+        metrics = LLMMetrics()
+        metrics.record("parse", "gpt-4o-mini", 0.5, {"prompt_tokens": 100, "completion_tokens": 20})
+        metrics.record("parse", "gpt-4o-mini", 1.5, {"prompt_tokens": 50, "cached_tokens": 40}, error=True)
+
+        stats = metrics.stats()["parse"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 1
+        assert stats["prompt_tokens"] == 150
+        assert stats["completion_tokens"] == 20
+        assert stats["cached_tokens"] == 40
+        assert stats["avg_seconds"] == 1.0
+        assert stats["max_seconds"] == 1.5
+        assert stats["models"] == {"gpt-4o-mini": 2}
+        assert stats["cached_token_ratio"] == round(40 / 150, 3)
+
+        metrics.reset()
+        assert metrics.stats() == {}
+
+    def test_usage_from_openai(self):
+        """Test token counts are read from an SDK usage object"""
+        usage = SimpleNamespace(
+            prompt_tokens=120, completion_tokens=30,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=64)
+        )
+        assert usage_from_openai(usage) == {"prompt_tokens": 120, "completion_tokens": 30, "cached_tokens": 64}
+        assert usage_from_openai(None) == {}
+        assert usage_from_openai(MagicMock())["prompt_tokens"] == 0
+
+    def test_stage_record_splits_cached_tokens(self):
+        """Test trace entries report cached and uncached prompt tokens"""
+        record = stage_record("gpt-4o-mini", 0.1234, {"prompt_tokens": 1200, "cached_tokens": 1024, "completion_tokens": 50})
+        assert record == {
+            "model": "gpt-4o-mini", "seconds": 0.123, "prompt_tokens": 1200,
+            "cached_tokens": 1024, "uncached_tokens": 176, "completion_tokens": 50
+        }
+
+
+class TestInvokeStage:
+    """Test chain invocation with metrics and tracing"""
+
+    async def test_records_success_and_trace(self):
+        """Test a successful call is counted and traced"""
+        get_llm_metrics().reset()
+        chain = MagicMock(ainvoke=AsyncMock(return_value={"ok": True}))
+        trace = {}
+
+        result = await invoke_stage(STAGE_PARSE, chain, {"resume_text": "x"}, "gpt-4o-mini", trace)
+
+        assert result == {"ok": True}
+        assert "callbacks" in chain.ainvoke.call_args.kwargs["config"]
+        assert trace[STAGE_PARSE]["model"] == "gpt-4o-mini"
+        assert get_llm_metrics().stats()[STAGE_PARSE]["calls"] == 1
+
+    @patch('app.routing.call_llm', new_callable=AsyncMock)
+    async def test_estimate_includes_completion(self, mock_call_llm):
+        """Test the TPM estimate covers the completion cap as well as the prompt"""
+        chain = MagicMock(ainvoke=AsyncMock(return_value={"ok": True}))
+
+        with patch('app.routing.count_tokens', return_value=300):
+            await invoke_stage(STAGE_ANALYZE, chain, {"resume": "x", "jd": "y"}, "gpt-4o", max_tokens=2000)
+
+        assert mock_call_llm.await_args.args[5] == 600 + 2000
+
+    async def test_records_errors(self):
+        """Test a failing call is counted as an error and re-raised"""
+        get_llm_metrics().reset()
+        chain = MagicMock(ainvoke=AsyncMock(side_effect=RuntimeError("bad output")))
+
+        with pytest.raises(RuntimeError):
+            await invoke_stage(STAGE_ANALYZE, chain, {}, "gpt-4-turbo-preview")
+
+        assert chain.ainvoke.await_count == 1
+        assert get_llm_metrics().stats()[STAGE_ANALYZE]["errors"] == 1
+
+
+class APIStatusError(Exception):
+    """Stand-in for an OpenAI SDK error carrying an HTTP status"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+FAST_POLICY = CallPolicy(
+    deadline=2.0, attempt_timeout=1.0, max_retries=2, backoff_base=0.01, backoff_max=0.02, hedge=False
+)
+
+
+def _attempts(*outcomes):
+    """Attempt factory returning (or raising) one outcome per call, optionally after a delay"""
+    calls = []
+
+    async def attempt():
+        delay, outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(outcome)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, {"prompt_tokens": 10}
+
+    return attempt, calls
+
+
+class TestCallPolicy:
+    """Test deadlines, retries and hedging in call_llm"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        get_llm_metrics().reset()
+        reset_rate_limiters()
+        yield
+        get_llm_metrics().reset()
+        reset_rate_limiters()
+
+    @pytest.mark.parametrize("error,retryable", [
+        (APIStatusError(429), True),
+        (APIStatusError(503), True),
+        (APIStatusError(400), False),
+        (asyncio.TimeoutError(), True),
+        (ValueError("bad json"), False)
+    ])
+    def test_retryable_errors(self, error, retryable):
+        """Test only timeouts, 429 and 5xx are treated as transient"""
+        assert is_retryable_error(error) is retryable
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test delays grow exponentially within jitter bounds and honour Retry-After"""
+        assert 0.5 <= backoff_delay(0, 1.0, 8.0) <= 1.0
+        assert 4.0 <= backoff_delay(5, 1.0, 8.0) <= 8.0
+        assert backoff_delay(0, 1.0, 8.0, APIStatusError(429, {"retry-after": "3"})) == 3.0
+
+    async def test_retries_transient_errors(self):
+        """Test a 429 is retried and the retry is counted"""
+        attempt, calls = _attempts((0, APIStatusError(429)), (0, "ok"))
+
+        assert await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY) == "ok"
+
+        assert len(calls) == 2
+        stats = get_llm_metrics().stats()[STAGE_PARSE]
+        assert stats["retries"] == 1
+        assert stats["errors"] == 0
+
+    async def test_does_not_retry_client_errors(self):
+        """Test a 400 fails on the first attempt"""
+        attempt, calls = _attempts((0, APIStatusError(400)))
+
+        with pytest.raises(APIStatusError):
+            await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY)
+
+        assert len(calls) == 1
+
+    async def test_deadline_raises_timeout(self):
+        """Test slow attempts are cut off and the call fails within its deadline"""
+        attempt, calls = _attempts((5, "late"))
+        policy = FAST_POLICY._replace(deadline=0.3, attempt_timeout=0.1)
+
+        with pytest.raises(LLMCallTimeout):
+            await call_llm(STAGE_ANALYZE, "gpt-4o", attempt, policy=policy)
+
+        stats = get_llm_metrics().stats()[STAGE_ANALYZE]
+        assert stats["timeouts"] == len(calls) >= 2
+        assert stats["max_seconds"] < 1.0
+
+    def test_timeouts_scale_with_output_cap(self):
+        """Test long completions get a longer attempt timeout and deadline"""
+        short, deep = default_call_policy(400), default_call_policy(3500)
+        assert deep.attempt_timeout > short.attempt_timeout
+        assert deep.attempt_timeout >= 3500 / 25
+        assert deep.deadline > deep.attempt_timeout
+        assert default_call_policy(None).attempt_timeout < deep.attempt_timeout
+
+    async def test_long_completion_not_cut_off(self):
+        """Test a call that outlasts a short stage's timeout completes under its own cap"""
+        with patch('app.routing.LLM_ATTEMPT_BASE_SECONDS', 0), \
+             patch('app.routing.LLM_MIN_OUTPUT_TOKENS_PER_SECOND', 1000), \
+             patch('app.routing.LLM_RETRY_HEADROOM_SECONDS', 0.05):
+            attempt, _ = _attempts((0.3, "long analysis"))
+            assert await call_llm(STAGE_ANALYZE, "gpt-4o", attempt, max_tokens=500) == "long analysis"
+
+            attempt, _ = _attempts((0.3, "long analysis"))
+            with pytest.raises(LLMCallTimeout):
+                await call_llm(STAGE_ANALYZE, "gpt-4o", attempt, max_tokens=100)
+
+    async def test_hedges_at_p95(self):
+        """Test a request still pending at the stage's p95 is hedged and the faster one wins"""
+        for _ in range(20):
+            get_llm_metrics().observe_latency(STAGE_PARSE, 0.05)
+        attempt, calls = _attempts((2, "slow"), (0, "fast"))
+
+        with patch('app.routing.LLM_HEDGE_MIN_SAMPLES', 20):
+            result = await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY._replace(hedge=True))
+
+        assert result == "fast"
+        stats = get_llm_metrics().stats()[STAGE_PARSE]
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+        assert stats["max_seconds"] < 1.0
+
+    async def test_no_hedge_when_limiter_saturated(self):
+        """Test hedges are skipped when the model's limiter has no free slot"""
+        for _ in range(20):
+            get_llm_metrics().observe_latency(STAGE_PARSE, 0.05)
+        attempt, calls = _attempts((0.2, "only"))
+        limiter = AdaptiveLimiter("gpt-4o-mini", initial=1)
+
+        with patch('app.routing.LLM_HEDGE_MIN_SAMPLES', 20), patch('app.routing.get_rate_limiter', return_value=limiter):
+            result = await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY._replace(hedge=True))
+
+        assert result == "only"
+        assert len(calls) == 1
+        assert limiter.stats()["in_flight"] == 0
+
+    async def test_rate_limits_feed_the_limiter(self):
+        """Test a 429 cuts the model's concurrency limit before the retry"""
+        attempt, calls = _attempts((0, APIStatusError(429)), (0, "ok"))
+        limiter = AdaptiveLimiter("gpt-4o-mini", initial=8)
+
+        with patch('app.routing.get_rate_limiter', return_value=limiter):
+            await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY)
+
+        stats = limiter.stats()
+        assert stats["rate_limited"] == 1
+        assert stats["concurrency_limit"] == 4
+        assert stats["in_flight"] == 0
+
+    async def test_no_hedge_without_samples(self):
+        """Test hedging waits until the stage has enough latency samples"""
+        attempt, calls = _attempts((0.1, "ok"))
+
+        await call_llm(STAGE_PARSE, "gpt-4o-mini", attempt, policy=FAST_POLICY._replace(hedge=True))
+
+        assert len(calls) == 1
+        assert get_llm_metrics().stats()[STAGE_PARSE]["hedges"] == 0
+
+    def test_latency_quantile(self):
+        """Test the p95 comes from the rolling window"""
+        metrics = LLMMetrics(latency_window=100)
+        for value in range(1, 201):
+            metrics.observe_latency(STAGE_PARSE, value / 100)
+
+        assert metrics.latency_quantile(STAGE_PARSE, 0.95) == 1.95
+        assert metrics.latency_quantile(STAGE_PARSE, 0.95, min_samples=500) is None
+
+
+class _StreamChain:
+    """Chain stand-in whose astream yields chunks, failing on the listed attempts"""
+
+    def __init__(self, chunks, failures=(), delay=0.0):
+        self.chunks = chunks
+        self.failures = list(failures)
+        self.delay = delay
+        self.calls = 0
+
+    async def astream(self, inputs, config=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(content=chunk)
+
+
+class TestStreamStage:
+    """Test streamed calls under the call policy and rate limiter"""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        get_llm_metrics().reset()
+        reset_rate_limiters()
+        yield
+        get_llm_metrics().reset()
+        reset_rate_limiters()
+
+    async def _collect(self, chain, limiter, policy=FAST_POLICY):
+        with patch('app.routing.get_rate_limiter', return_value=limiter):
+            return [delta async for delta in stream_stage(
+                STAGE_ANALYZE, chain, {"resume_data": "{}"}, "gpt-4o", policy=policy
+            )]
+
+    async def test_stream_holds_and_releases_a_permit(self):
+        """Test the stream is admitted by the limiter and the slot is freed at the end"""
+        limiter = AdaptiveLimiter("gpt-4o", initial=4)
+        trace = {}
+
+        with patch('app.routing.get_rate_limiter', return_value=limiter):
+            deltas = [delta async for delta in stream_stage(
+                STAGE_ANALYZE, _StreamChain(["{", "", "}"]), {"resume_data": "{}"}, "gpt-4o",
+                trace=trace, policy=FAST_POLICY
+            )]
+
+        assert deltas == ["{", "}"]
+        assert limiter.stats()["admitted"] == 1
+        assert limiter.stats()["in_flight"] == 0
+        assert get_llm_metrics().stats()[STAGE_ANALYZE]["calls"] == 1
+        assert trace[STAGE_ANALYZE]["model"] == "gpt-4o"
+
+    async def test_retries_before_first_chunk(self):
+        """Test a 429 before any output is retried and reported to the limiter"""
+        limiter = AdaptiveLimiter("gpt-4o", initial=8)
+        chain = _StreamChain(["ok"], failures=[APIStatusError(429)])
+
+        assert await self._collect(chain, limiter) == ["ok"]
+
+        assert chain.calls == 2
+        assert limiter.stats()["rate_limited"] == 1
+        assert limiter.stats()["in_flight"] == 0
+        assert get_llm_metrics().stats()[STAGE_ANALYZE]["retries"] == 1
+
+    async def test_slow_first_chunk_times_out(self):
+        """Test a stream that produces nothing within the attempt timeout fails"""
+        limiter = AdaptiveLimiter("gpt-4o", initial=4)
+        chain = _StreamChain(["late"], delay=5)
+        policy = FAST_POLICY._replace(deadline=0.3, attempt_timeout=0.1)
+
+        with pytest.raises(LLMCallTimeout):
+            await self._collect(chain, limiter, policy)
+
+        assert limiter.stats()["in_flight"] == 0
+        assert get_llm_metrics().stats()[STAGE_ANALYZE]["errors"] == 1
+
+    async def test_disconnect_releases_permit(self):
+        """Test closing the stream early frees the limiter slot"""
+        limiter = AdaptiveLimiter("gpt-4o", initial=4)
+
+        with patch('app.routing.get_rate_limiter', return_value=limiter):
+            stream = stream_stage(
+                STAGE_ANALYZE, _StreamChain(["a", "b"]), {"resume_data": "{}"}, "gpt-4o", policy=FAST_POLICY
+            )
+            assert await stream.__anext__() == "a"
+            await stream.aclose()
+
+        assert limiter.stats()["in_flight"] == 0
+        assert get_llm_metrics().stats()[STAGE_ANALYZE]["errors"] == 1
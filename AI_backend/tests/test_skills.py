@@ -0,0 +1,162 @@
+"""
+Tests for the skill matcher and taxonomy
+"""
+import json
+import os
+import pytest
+from app.skills import SkillMatcher, SkillTaxonomy, get_skill_matcher, get_skill_taxonomy
+
+
+@pytest.fixture
+def matcher():
+    return SkillMatcher({
+        "Node.js": ["node", "nodejs"],
+        "Vue.js": ["vue"],
+        "JavaScript": ["js", "ecmascript"],
+        "C++": [],
+        "Machine Learning": ["ml"],
+        "React": []
+    })
+
+
+class TestSkillMatcher:
+    """Test multi-pattern skill matching"""
+
+    def test_matches_aliases_to_canonical_names(self, matcher):
+        """Test aliases resolve to one canonical skill"""
+        assert matcher.skills_in("NodeJS, node and ECMAScript") == ["Node.js", "JavaScript"]
+
+    def test_respects_word_boundaries(self, matcher):
+        """Test skills are not matched inside other words"""
+        assert matcher.find("Managed nodes for a reactive system") == []
+        assert matcher.skills_in("Wrote C++ and React.") == ["C++", "React"]
+
+    def test_prefers_longest_overlapping_term(self, matcher):
+        """Test "Vue.js" is one match, not "vue" plus "js" """
+        matches = matcher.find("Built apps in Vue.js")
+        assert [m.skill for m in matches] == ["Vue.js"]
+
+    def test_reports_offsets(self, matcher):
+        """Test match offsets point at the original text"""
+        text = "Senior ML engineer"
+        match = matcher.find(text)[0]
+        assert match.skill == "Machine Learning"
+        assert text[match.start:match.end] == "ML"
+
+    def test_multiword_terms_across_line_breaks(self, matcher):
+        """Test multi-word skills match across whitespace differences"""
+        assert matcher.skills_in("machine\nlearning") == ["Machine Learning"]
+
+    def test_case_sensitive_terms(self):
+        """Test skills that are also common words only match in their exact case"""
+        matcher = SkillMatcher({"Excel": ["microsoft excel"], "Swift": []}, case_sensitive=["Excel", "Swift"])
+        assert matcher.skills_in("I excel at swift delivery") == []
+        assert matcher.skills_in("Advanced Excel and Swift; microsoft excel") == ["Excel", "Swift"]
+
+    def test_canonical_lookup(self, matcher):
+        """Test direct alias lookup"""
+        assert matcher.canonical(" ECMAScript ") == "JavaScript"
+        assert matcher.canonical("cobol") is None
+
+    def test_empty_matcher(self):
+        """Test an empty vocabulary matches nothing"""
+        assert SkillMatcher().find("python") == []
+
+
+class TestLoad:
+    """Test vocabulary loading"""
+
+    def test_load_vocabulary_file(self, temp_upload_dir):
+        """Test a vocabulary file is compiled"""
+        path = os.path.join(temp_upload_dir, "skills.json")
+        with open(path, "w") as f:
+            json.dump({"skills": [{"name": "Kubernetes", "aliases": ["k8s"]}]}, f)
+
+        assert SkillMatcher.load(path).skills_in("Ran k8s clusters") == ["Kubernetes"]
+
+    def test_missing_file_gives_empty_matcher(self, temp_upload_dir):
+        """Test a missing vocabulary file does not raise"""
+        matcher = SkillMatcher.load(os.path.join(temp_upload_dir, "missing.json"))
+        assert matcher.stats()["terms"] == 0
+
+    def test_bundled_vocabulary(self):
+        """Test the shipped vocabulary loads"""
+        assert get_skill_matcher().canonical("k8s") == "Kubernetes"
+
+    def test_bundled_vocabulary_ignores_common_words(self):
+        """Test everyday words that share a skill's name are not reported as skills"""
+        matcher = get_skill_matcher()
+        assert matcher.skills_in("excel at communication") == []
+        assert matcher.skills_in("An agile, swift team that can react to change in the cloud") == []
+        assert matcher.skills_in("Excel, Swift, Rust and Spark on Oracle") == ["Excel", "Swift", "Rust", "Spark", "Oracle"]
+
+
+@pytest.fixture
+def taxonomy():
+    return SkillTaxonomy(
+        skills=[
+            {"id": "javascript", "name": "JavaScript", "category": "languages", "aliases": ["js", "ecmascript"]},
+            {"id": "python", "name": "Python", "category": "languages", "aliases": []},
+            {"id": "react", "name": "React", "category": "frontend", "aliases": ["reactjs"]},
+            {"id": "kubernetes", "name": "Kubernetes", "category": "devops", "aliases": ["k8s"]},
+            {"id": "node_js", "name": "Node.js", "category": "backend", "aliases": ["node"]}
+        ],
+        categories={
+            "languages": {"name": "Languages", "parent": "engineering"},
+            "frontend": {"name": "Frontend", "parent": "engineering"},
+            "backend": {"name": "Backend", "parent": "engineering"},
+            "devops": {"name": "DevOps", "parent": None},
+            "engineering": {"name": "Engineering", "parent": None}
+        }
+    )
+
+
+class TestSkillTaxonomy:
+    """Test alias normalization and ID-based gap analysis"""
+
+    def test_aliases_share_one_id(self, taxonomy):
+        """Test "JS", "Javascript" and "ECMAScript" are one skill"""
+        ids = {taxonomy.lookup(term) for term in ["JS", "Javascript", "ECMAScript", "javascript"]}
+        assert len(ids) == 1
+        assert taxonomy.lookup("Nodes") is None
+
+    def test_normalize_scans_compound_entries(self, taxonomy):
+        """Test entries that list several skills are split by scanning"""
+        assert taxonomy.names(taxonomy.normalize(["Python 3 / React", "Leadership"])) == ["Python", "React"]
+
+    def test_dedupe_keeps_unknown_skills(self, taxonomy):
+        """Test aliases collapse while unknown skills are kept once"""
+        assert taxonomy.dedupe(["js", "JavaScript", "Leadership", "leadership", "k8s"]) == [
+            "JavaScript", "Leadership", "Kubernetes"
+        ]
+
+    def test_resume_skill_ids(self, taxonomy):
+        """Test skills come from the skills list, technologies and descriptions"""
+        resume_data = {
+            "skills": ["ReactJS"],
+            "experience": [{"technologies": ["node"], "description_summary": "Ran services on k8s"}],
+            "projects": [{"technologies": ["ecmascript"]}]
+        }
+        assert taxonomy.names(taxonomy.resume_skill_ids(resume_data)) == [
+            "JavaScript", "React", "Kubernetes", "Node.js"
+        ]
+
+    def test_gap(self, taxonomy):
+        """Test matched/missing/additional skills and category grouping"""
+        candidate = taxonomy.normalize(["JS", "React"])
+        required = taxonomy.ids_in_text("Looking for React, Python and Kubernetes")
+
+        gap = taxonomy.gap(candidate, required)
+
+        assert gap["matched"] == ["React"]
+        assert gap["missing"] == ["Python", "Kubernetes"]
+        assert gap["additional"] == ["JavaScript"]
+        assert gap["coverage"] == pytest.approx(33.33)
+        assert gap["missing_by_category"] == {"Engineering": ["Python"], "DevOps": ["Kubernetes"]}
+
+    def test_bundled_taxonomy(self):
+        """Test the shipped taxonomy has categories for every skill"""
+        taxonomy = get_skill_taxonomy()
+        react = taxonomy.lookup("react.js")
+        assert taxonomy.category_path(react) == ["frontend", "software_engineering"]
+
@@ -0,0 +1,146 @@
+"""
+Tests for the async stage-graph executor
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.cache import InMemoryResultCache
+from app.workflows.stage_graph import Stage, StageError, StageGraph
+
+
+def sleeper(delay, value):
+    """Build a stage function that sleeps and returns value"""
+    async def func(**inputs):
+        await asyncio.sleep(delay)
+        return value
+    return func
+
+
+class TestStageGraph:
+    """Test dependency ordering, concurrency and per-stage policies"""
+
+    async def test_independent_stages_run_concurrently(self):
+        """Test latency follows the critical path, not the sum of stages"""
+        graph = StageGraph([
+            Stage("a", sleeper(0.2, 1)),
+            Stage("b", sleeper(0.2, 2)),
+            Stage("c", lambda a, b: asyncio.sleep(0, result=a + b), inputs=["a", "b"])
+        ])
+
+        started = time.perf_counter()
+        result = await graph.run({})
+        assert time.perf_counter() - started < 0.35
+        assert result["c"] == 3
+        assert result.timings["c"]["status"] == "ok"
+
+    async def test_initial_values_are_inputs(self):
+        """Test stages can consume values passed to run"""
+        async def double(x):
+            return x * 2
+
+        result = await StageGraph([Stage("double", double, inputs=["x"])]).run({"x": 21})
+        assert result["double"] == 42
+
+    async def test_retry_then_succeed(self):
+        """Test failed attempts are retried"""
+        func = AsyncMock(side_effect=[ValueError("flaky"), "ok"])
+        result = await StageGraph([Stage("s", func, retries=1, backoff=0.01)]).run({})
+        assert result["s"] == "ok"
+        assert result.timings["s"]["attempts"] == 2
+
+    async def test_timeout_uses_fallback(self):
+        """Test a slow stage times out and falls back"""
+        graph = StageGraph([Stage("slow", sleeper(1, "late"), timeout=0.05, fallback=lambda: "fallback")])
+        result = await graph.run({})
+        assert result["slow"] == "fallback"
+        assert result.timings["slow"]["status"] == "fallback"
+
+    async def test_required_failure_cancels_graph(self):
+        """Test a failing stage without fallback raises and cancels siblings"""
+        cancelled = asyncio.Event()
+
+        async def long_stage():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        graph = StageGraph([
+            Stage("boom", AsyncMock(side_effect=RuntimeError("boom"))),
+            Stage("long", long_stage)
+        ])
+        with pytest.raises(StageError) as exc_info:
+            await graph.run({})
+
+        assert exc_info.value.stage == "boom"
+        assert cancelled.is_set()
+
+    async def test_cache_skips_second_run(self):
+        """Test a stage with a cache key runs once per key"""
+        func = AsyncMock(return_value={"score": 80})
+        graph = StageGraph(
+            [Stage("analyze", func, inputs=["text"], cache_key=lambda text: text)],
+            cache=InMemoryResultCache()
+        )
+
+        await graph.run({"text": "resume"})
+        second = await graph.run({"text": "resume"})
+
+        assert func.await_count == 1
+        assert second["analyze"] == {"score": 80}
+        assert second.timings["analyze"]["status"] == "cached"
+
+    async def test_invalid_graphs_rejected(self):
+        """Test unknown inputs and cycles are reported"""
+        with pytest.raises(ValueError):
+            await StageGraph([Stage("a", sleeper(0, 1), inputs=["missing"])]).run({})
+        with pytest.raises(ValueError):
+            await StageGraph([
+                Stage("a", sleeper(0, 1), inputs=["b"]),
+                Stage("b", sleeper(0, 1), inputs=["a"])
+            ]).run({})
+        with pytest.raises(ValueError):
+            StageGraph([Stage("a", sleeper(0, 1)), Stage("a", sleeper(0, 1))])
+
+
+class TestComprehensiveWorkflowGraph:
+    """Test the comprehensive workflow runs research alongside parsing"""
+
+    async def test_research_overlaps_llm_stages(self):
+        """Test total latency is close to the slowest branch"""
+        from app.workflows.resume_analysis_workflow import ResumeAnalysisWorkflow
+
+        parsed = MagicMock()
+        parsed.model_dump.return_value = {"skills": ["Python"]}
+        analysis = MagicMock(matched_keywords=["Python"], recommendations=["Add metrics"])
+        analysis.model_dump.return_value = {"overall_score": 80}
+
+        async def parse_resume(text, raise_errors=False):
+            await asyncio.sleep(0.2)
+            return parsed
+
+        async def analyze(resume, jd, raise_errors=False):
+            await asyncio.sleep(0.2)
+            return analysis
+
+        async def research(*args, **kwargs):
+            await asyncio.sleep(0.3)
+            return {"required_skills": ["Python", "Docker"]}
+
+        workflow = ResumeAnalysisWorkflow("test-key")
+        workflow.parser_agent = MagicMock(parse_resume=parse_resume)
+        workflow.analyzer_agent = MagicMock(analyze_resume_job_fit=analyze, model="gpt-test")
+        workflow.search_tool = MagicMock(gather_market_intelligence=research)
+
+        started = time.perf_counter()
+        result = await workflow.analyze_resume_comprehensive("resume text", "jd", {"job_title": "Engineer"})
+        elapsed = time.perf_counter() - started
+
+        assert result["success"]
+        assert elapsed < 0.6
+        assert result["market_intelligence"] == {"required_skills": ["Python", "Docker"]}
+        assert set(result["processing_metadata"]["stage_timings"]["stages"]) == {
+            "parse", "analyze", "research", "recommendations"
+        }
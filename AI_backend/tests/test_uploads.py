@@ -0,0 +1,34 @@
+"""
+Tests for upload guards
+"""
+import pytest
+from app.uploads import sniff_file_type
+
+
+class TestSniffFileType:
+    """Test magic-byte file type detection"""
+
+    def test_pdf_detected(self):
+        """Test PDF header is recognised regardless of extension"""
+        assert sniff_file_type(b"%PDF-1.7\n...", ".pdf") == ".pdf"
+        assert sniff_file_type(b"%PDF-1.7\n...", ".docx") == ".pdf"
+
+    def test_docx_detected_from_zip_header(self):
+        """Test zip header is treated as DOCX for resume uploads"""
+        assert sniff_file_type(b"PK\x03\x04rest", ".docx") == ".docx"
+
+    def test_zip_archive_detected(self):
+        """Test zip header with .zip extension is an archive"""
+        assert sniff_file_type(b"PK\x03\x04rest", ".zip") == ".zip"
+
+    def test_renamed_binary_rejected(self):
+        """Test unknown binary content with a .pdf name is rejected"""
+        assert sniff_file_type(b"\x89PNG\r\n\x1a\n", ".pdf") is None
+
+    def test_plain_text_accepted(self):
+        """Test UTF-8 text is accepted for .txt uploads"""
+        assert sniff_file_type("Résumé text".encode("utf-8"), ".txt") == ".txt"
+
+    def test_binary_txt_rejected(self):
+        """Test binary content with a .txt name is rejected"""
+        assert sniff_file_type(b"\x00\x01\x02binary", ".txt") is None
@@ -0,0 +1,128 @@
+"""
+Tests for the web search tool
+"""
+import asyncio
+import os
+import time
+import pytest
+from unittest.mock import patch
+from app.tools.market_snapshot import MarketSnapshot
+from app.tools.search_cache import SearchCache, normalize_search_key
+from app.tools.web_search_tool import WebSearchTool
+
+
+def slow_search(delay):
+    """Build a blocking search stub that sleeps before returning one result"""
+    def search(self, query, max_results):
+        time.sleep(delay)
+        return [{"href": f"https://example.com/{len(query)}", "body": "Python and AWS are in demand, a growing trend"}]
+    return search
+
+
+class TestConcurrentSearch:
+    """Test searches run concurrently and off the event loop"""
+
+    async def test_queries_run_concurrently(self):
+        """Test research time is close to the slowest query, not the sum"""
+        tool = WebSearchTool(query_timeout=5, deadline=5, cache=SearchCache(path=None), snapshot=MarketSnapshot())
+        with patch.object(WebSearchTool, '_text_search', slow_search(0.3)):
+            started = time.perf_counter()
+            result = await tool.gather_market_intelligence("Data Engineer", company="Acme")
+            elapsed = time.perf_counter() - started
+
+        # 7 queries of 0.3s each would take 2.1s sequentially
+        assert elapsed < 1.2
+        assert set(result) == {"company_info", "market_trends", "required_skills"}
+        assert "Python" in result["required_skills"]
+
+    async def test_query_timeout_returns_empty(self):
+        """Test a hung query is abandoned after the per-query timeout"""
+        tool = WebSearchTool(query_timeout=0.1, cache=SearchCache(path=None), snapshot=MarketSnapshot())
+        with patch.object(WebSearchTool, '_text_search', slow_search(0.5)):
+            assert await tool._search("python jobs", 3) == []
+
+    async def test_deadline_uses_fallbacks(self):
+        """Test research that misses the global deadline falls back to defaults"""
+        tool = WebSearchTool(query_timeout=5, deadline=0.1, cache=SearchCache(path=None), snapshot=MarketSnapshot())
+        with patch.object(WebSearchTool, '_text_search', slow_search(0.5)):
+            result = await tool.gather_market_intelligence("Software Engineer")
+
+        assert "company_info" not in result
+        assert result["market_trends"]["sources"] == []
+        assert "Problem Solving" in result["required_skills"]
+
+    async def test_deadline_waits_for_cancelled_searches(self):
+        """Test searches cancelled at the deadline have finished unwinding when research returns"""
+        tool = WebSearchTool(query_timeout=5, deadline=0.1, cache=SearchCache(path=None), snapshot=MarketSnapshot())
+        unwound = []
+
+        async def hung_search(*args):
+            try:
+                await asyncio.sleep(5)
+            finally:
+                await asyncio.sleep(0)
+                unwound.append(True)
+
+        with patch.object(WebSearchTool, 'search_job_market_trends', side_effect=hung_search, autospec=False):
+            result = await tool.gather_market_intelligence("Software Engineer")
+
+        assert unwound == [True]
+        assert result["market_trends"]["sources"] == []
+
+
+class TestSearchCache:
+    """Test the two-tier search result cache"""
+
+    def test_key_normalization(self):
+        """Test keys ignore case and extra whitespace"""
+        assert normalize_search_key("company", "  Acme   Corp ") == normalize_search_key("company", "acme corp")
+        assert normalize_search_key("trends", "Engineer", None) == "trends|engineer|"
+
+    async def test_persists_across_instances(self, temp_upload_dir):
+        """Test entries written to SQLite are visible to a new cache"""
+        path = os.path.join(temp_upload_dir, "search.sqlite3")
+        await SearchCache(path=path).set("company", "company|acme", [{"body": "about acme"}])
+
+        value, fresh = await SearchCache(path=path).get("company|acme")
+        assert fresh
+        assert value == [{"body": "about acme"}]
+
+    async def test_stale_entries_served_then_expire(self):
+        """Test entries past their TTL are stale, and dropped after the grace period"""
+        cache = SearchCache(path=None, ttls={"trends": -10}, max_stale=60)
+        await cache.set("trends", "trends|engineer|", [{"body": "growing"}])
+        assert await cache.get("trends|engineer|") == ([{"body": "growing"}], False)
+
+        cache.max_stale = 5
+        assert await cache.get("trends|engineer|") is None
+
+    async def test_repeat_lookup_skips_search(self):
+        """Test a cached company is answered without searching again"""
+        calls = []
+
+        def search(self, query, max_results):
+            calls.append(query)
+            return [{"href": "https://example.com", "body": "About Acme, founded 1999"}]
+
+        tool = WebSearchTool(cache=SearchCache(path=None), snapshot=MarketSnapshot())
+        with patch.object(WebSearchTool, '_text_search', search):
+            first = await tool.search_company_info("Acme")
+            second = await tool.search_company_info("  ACME ")
+
+        assert len(calls) == 3
+        assert first["overview"] == second["overview"]
+
+    async def test_stale_hit_refreshes_in_background(self):
+        """Test a stale entry is returned immediately and refreshed"""
+        cache = SearchCache(path=None, ttls={"skills": -1}, max_stale=60)
+        tool = WebSearchTool(cache=cache, snapshot=MarketSnapshot())
+        key = normalize_search_key("skills", "Engineer", None)
+        await cache.set("skills", key, [{"body": "Python"}])
+
+        with patch.object(WebSearchTool, '_text_search', slow_search(0.05)):
+            skills = await tool.search_skill_requirements("Engineer")
+            assert "Python" in skills
+            await asyncio.gather(*tool._refreshing.values())
+
+        refreshed, _ = await cache.get(key)
+        assert "AWS" in refreshed[0]["body"]
@@ -0,0 +1,138 @@
+"""
+Tests for lazy, shared ResumeAnalysisWorkflow construction and crew execution
+"""
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from app.agents.resume_analyzer_agent import DEPTH_STANDARD, analysis_max_tokens
+from app.routing import STAGE_PARSE, STAGE_SINGLE_PASS, default_call_policy, resolve_route
+from app.workflows import resume_analysis_workflow as workflow_module
+from app.workflows.resume_analysis_workflow import (
+    ResumeAnalysisWorkflow,
+    clear_workflows,
+    get_workflow
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    clear_workflows()
+    yield
+    clear_workflows()
+
+
+class TestLazyComponents:
+    """Test components are only built when used"""
+
+    @patch('app.workflows.resume_analysis_workflow.WebSearchTool')
+    @patch('app.workflows.resume_analysis_workflow.ResumeAnalyzerAgent')
+    @patch('app.workflows.resume_analysis_workflow.ResumeParserAgent')
+    def test_construction_builds_nothing(self, mock_parser, mock_analyzer, mock_search):
+        """Test creating a workflow does not construct agents or tools"""
+        workflow = ResumeAnalysisWorkflow("test-key")
+        mock_parser.assert_not_called()
+        mock_analyzer.assert_not_called()
+        mock_search.assert_not_called()
+
+        assert workflow.parser_agent is workflow.parser_agent
+        mock_parser.assert_called_once_with("test-key")
+        mock_search.assert_not_called()
+
+    @patch('app.workflows.resume_analysis_workflow.WebSearchTool')
+    @patch('app.workflows.resume_analysis_workflow.ResumeAnalyzerAgent')
+    @patch('app.workflows.resume_analysis_workflow.ResumeParserAgent')
+    def test_warm_up_builds_agents(self, mock_parser, mock_analyzer, mock_search):
+        """Test warm-up constructs the agents and search tool up front"""
+        ResumeAnalysisWorkflow("test-key").warm_up()
+        mock_parser.assert_called_once()
+        mock_analyzer.assert_called_once()
+        mock_search.assert_called_once()
+
+    def test_crew_agents_require_crewai(self):
+        """Test CrewAI agents fail clearly when crewai is missing"""
+        with patch.object(workflow_module, 'CREWAI_AVAILABLE', False):
+            with pytest.raises(RuntimeError):
+                ResumeAnalysisWorkflow("test-key")._ensure_crew_agents()
+
+
+class TestStageTimeouts:
+    """Test LLM stage timeouts follow the call policy"""
+
+    def test_llm_stages_outlast_call_deadline_without_retrying(self):
+        """Test LLM stages leave retries to call_llm and time out just after its deadline"""
+        workflow = ResumeAnalysisWorkflow("test-key")
+        margin = workflow_module.WORKFLOW_LLM_STAGE_TIMEOUT_MARGIN_SECONDS
+        stages = {
+            "parse": (workflow.simple_graph.stages["parse"], resolve_route(STAGE_PARSE).max_tokens),
+            "analyze": (workflow.simple_graph.stages["analyze"], analysis_max_tokens(DEPTH_STANDARD)),
+            "single_pass": (workflow.single_pass_graph.stages["single_pass"], resolve_route(STAGE_SINGLE_PASS).max_tokens)
+        }
+        for name, (stage, max_tokens) in stages.items():
+            assert stage.retries == 0, name
+            assert stage.timeout == default_call_policy(max_tokens).deadline + margin, name
+
+
+class TestWorkflowRegistry:
+    """Test workflows are shared per API key"""
+
+    def test_same_instance_per_key(self):
+        """Test repeated lookups reuse the workflow"""
+        assert get_workflow("key-a") is get_workflow("key-a")
+        assert get_workflow("key-a") is not get_workflow("key-b")
+
+    def test_missing_key(self, monkeypatch):
+        """Test a clear error when no key is configured"""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        with pytest.raises(RuntimeError):
+            get_workflow()
+
+
+class TestCrewKickoff:
+    """Test crews run on the bounded executor with a timeout"""
+
+    @pytest.fixture
+    def executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        with patch.object(workflow_module, '_crew_executor', executor):
+            yield executor
+        executor.shutdown(wait=True)
+
+    async def test_queue_time_not_counted(self, executor):
+        """Test a crew queued behind another still gets its full timeout once it starts"""
+        executor.submit(time.sleep, 0.3)
+        crew = MagicMock(kickoff=MagicMock(side_effect=lambda: time.sleep(0.1) or "done"))
+        workflow = ResumeAnalysisWorkflow("test-key", crew_timeout=0.25)
+
+        assert await workflow._kickoff(crew, "analysis", threading.Event()) == "done"
+
+    async def test_timeout_sets_cancel_event(self, executor):
+        """Test a crew running past its timeout is told to stop"""
+        release = threading.Event()
+        crew = MagicMock(kickoff=MagicMock(side_effect=lambda: release.wait(1)))
+        cancel_event = threading.Event()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await ResumeAnalysisWorkflow("test-key", crew_timeout=0.05)._kickoff(crew, "analysis", cancel_event)
+        assert cancel_event.is_set()
+        release.set()
+
+    async def test_cancelled_while_queued_never_runs(self, executor):
+        """Test cancelling a crew that is still queued drops it from the executor"""
+        release = threading.Event()
+        executor.submit(release.wait, 1)
+        crew = MagicMock()
+        cancel_event = threading.Event()
+
+        task = asyncio.ensure_future(ResumeAnalysisWorkflow("test-key")._kickoff(crew, "analysis", cancel_event))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+        executor.shutdown(wait=True)
+
+        crew.kickoff.assert_not_called()
+        assert cancel_event.is_set()